@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos caminhos mais usados da API
+
+Sobe a aplicação contra um banco SQLite temporário (DATABASE_URL), gera dados
+sintéticos na escala escolhida (src/utils/gerador.py) e mede, pelo test client do Flask, a vazão e os
+percentis de latência de cada operação. Os resultados podem ser gravados em JSON
+para comparar execuções.
+
+Uso: python -m benchmarks.bench_api [--escala pequena|media|grande] [--repeticoes 30]
+                                    [--operacoes login,listar_materiais,...] [--saida resultado.json]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmpdir = tempfile.mkdtemp(prefix='fibreco-bench-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}")
+
+from sqlalchemy import func, insert, select
+from src.main import app
+from src.models.auth import db, User
+from src.models.material import Material, MovimentacaoEstoque, Atividade
+from src.utils.gerador import SENHA_PADRAO as SENHA, gerar_dados
+
+ESCALAS = {
+    'pequena': {'materiais': 1000, 'movimentacoes': 10000, 'atividades': 1000},
+    'media': {'materiais': 10000, 'movimentacoes': 100000, 'atividades': 10000},
+    'grande': {'materiais': 100000, 'movimentacoes': 1000000, 'atividades': 50000},
+}
+
+TECNICO = 'tecnico1'
+SUPERVISOR = 'supervisor1'
+
+
+def gerar(materiais, movimentacoes, atividades, pendentes, meses=12):
+    """Popula o banco com o gerador de dados; retorna os ids usados nas operações"""
+    gerar_dados(materiais=materiais, movimentacoes=movimentacoes, atividades=atividades, meses=meses,
+                supervisores=5, tecnicos=50)
+
+    # Atividades em aberto do técnico medido, uma por conclusão
+    tecnico_id = db.session.execute(select(User.id).where(User.username == TECNICO)).scalar()
+    supervisor_id = db.session.execute(select(User.id).where(User.username == SUPERVISOR)).scalar()
+    agora = datetime.utcnow()
+    db.session.execute(insert(Atividade.__table__), [{
+        'titulo': f'Benchmark {i}', 'usuario_id': tecnico_id, 'supervisor_id': supervisor_id,
+        'status': 'pendente', 'data_criacao': agora
+    } for i in range(pendentes)])
+    db.session.commit()
+
+    return {
+        'materiais': db.session.execute(select(Material.id)).scalars().all(),
+        'movimentacao': db.session.execute(select(func.max(MovimentacaoEstoque.id))).scalar(),
+        'atividade_concluida': db.session.execute(
+            select(func.min(Atividade.id)).where(Atividade.status == 'concluida')
+        ).scalar(),
+        'pendentes': db.session.execute(
+            select(Atividade.id).where(Atividade.usuario_id == tecnico_id, Atividade.status == 'pendente',
+                                       Atividade.titulo.like('Benchmark %')).order_by(Atividade.id)
+        ).scalars().all(),
+    }
+
+
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo (valores ordenados)"""
+    if not valores:
+        return None
+    posto = max(math.ceil(p / 100 * len(valores)) - 1, 0)
+    return valores[posto]
+
+
+def medir(nome, requisicao, repeticoes, aquecimento):
+    for _ in range(aquecimento):
+        requisicao()
+    tempos, erros = [], 0
+    inicio_total = time.perf_counter()
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        response = requisicao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        if response.status_code >= 400:
+            erros += 1
+    total = time.perf_counter() - inicio_total
+    tempos.sort()
+    return {
+        'operacao': nome,
+        'repeticoes': repeticoes,
+        'erros': erros,
+        'req_s': round(repeticoes / total, 2) if total else None,
+        'min_ms': round(tempos[0], 2),
+        'p50_ms': round(percentil(tempos, 50), 2),
+        'p90_ms': round(percentil(tempos, 90), 2),
+        'p99_ms': round(percentil(tempos, 99), 2),
+        'max_ms': round(tempos[-1], 2),
+    }
+
+
+def operacoes(client, ids):
+    """Requisições medidas, na ordem de execução"""
+    def login(username):
+        response = client.post('/api/login', json={'username': username, 'password': SENHA})
+        return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+    admin = login('admin')
+    supervisor = login(SUPERVISOR)
+    tecnico = login(TECNICO)
+    rng = random.Random(7)
+    pendentes = iter(ids['pendentes'])
+    agora = datetime.now()
+
+    def concluir():
+        atividade_id = next(pendentes)
+        return client.post(f'/api/atividades/{atividade_id}/concluir', headers=tecnico, json={
+            'descricao_servico': 'Benchmark',
+            'latitude': -8.05, 'longitude': -34.9,
+            'materiais_usados': [{'material_id': rng.choice(ids['materiais']), 'quantidade_usada': 1}]
+        })
+
+    return {
+        'login': lambda: client.post('/api/login', json={'username': 'tecnico2', 'password': SENHA}),
+        'listar_materiais': lambda: client.get('/api/materiais', headers=admin),
+        'criar_movimentacao': lambda: client.post(
+            f"/api/materiais/{rng.choice(ids['materiais'])}/movimentacao", headers=supervisor,
+            json={'tipo_movimentacao': 'entrada', 'quantidade': 1, 'motivo': 'Benchmark'}
+        ),
+        'concluir_atividade': concluir,
+        'dashboard': lambda: client.get('/api/dashboard', headers=admin),
+        'graficos': lambda: client.get('/api/dashboard/graficos', headers=admin),
+        'relatorio_mensal': lambda: client.get(
+            f'/api/relatorios/mensal?mes={agora.month}&ano={agora.year}', headers=admin
+        ),
+        'pdf_movimentacao': lambda: client.get(f"/api/movimentacoes/{ids['movimentacao']}/pdf", headers=admin),
+        'pdf_atividade': lambda: client.get(f"/api/atividades/{ids['atividade_concluida']}/pdf", headers=admin),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', choices=list(ESCALAS), default='pequena')
+    parser.add_argument('--materiais', type=int, help='Sobrescreve o número de materiais da escala')
+    parser.add_argument('--movimentacoes', type=int, help='Sobrescreve o número de movimentações da escala')
+    parser.add_argument('--atividades', type=int, help='Sobrescreve o número de atividades da escala')
+    parser.add_argument('--repeticoes', type=int, default=30)
+    parser.add_argument('--aquecimento', type=int, default=2)
+    parser.add_argument('--operacoes', help='Lista separada por vírgulas (padrão: todas)')
+    parser.add_argument('--saida', help='Arquivo JSON para gravar os resultados')
+    args = parser.parse_args()
+
+    escala = dict(ESCALAS[args.escala])
+    for chave in ('materiais', 'movimentacoes', 'atividades'):
+        if getattr(args, chave) is not None:
+            escala[chave] = getattr(args, chave)
+
+    # O log de requisições lentas não deve poluir a saída do benchmark
+    app.config['SLOW_REQUEST_MS'] = float('inf')
+    # O benchmark de login repete o mesmo usuário e IP muito acima do limite de tentativas
+    app.config.update(LOGIN_RATE_USERNAME_BURST=0, LOGIN_RATE_IP_BURST=0)
+
+    with app.app_context():
+        inicio = time.perf_counter()
+        ids = gerar(escala['materiais'], escala['movimentacoes'], escala['atividades'],
+                    pendentes=args.repeticoes + args.aquecimento)
+        geracao_s = round(time.perf_counter() - inicio, 1)
+
+    client = app.test_client()
+    disponiveis = operacoes(client, ids)
+    selecionadas = args.operacoes.split(',') if args.operacoes else list(disponiveis)
+    desconhecidas = [nome for nome in selecionadas if nome not in disponiveis]
+    if desconhecidas:
+        parser.error(f"Operações desconhecidas: {', '.join(desconhecidas)}")
+
+    print(f"Escala {args.escala}: {escala['materiais']} materiais, {escala['movimentacoes']} movimentações, "
+          f"{escala['atividades']} atividades (gerado em {geracao_s} s)")
+    print(f"  {'operação':<22}{'req/s':>9}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  erros")
+    resultados = []
+    for nome in selecionadas:
+        resultado = medir(nome, disponiveis[nome], args.repeticoes, args.aquecimento)
+        resultados.append(resultado)
+        print(f"  {nome:<22}{resultado['req_s']:>9.1f}{resultado['p50_ms']:>10.2f}{resultado['p90_ms']:>10.2f}"
+              f"{resultado['p99_ms']:>10.2f}{resultado['max_ms']:>10.2f}  {resultado['erros']}")
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump({
+                'escala': args.escala,
+                'dados': escala,
+                'geracao_s': geracao_s,
+                'repeticoes': args.repeticoes,
+                'data': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'resultados': resultados,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark de criação de atividades: POST individual x POST /atividades/bulk
+
+Usa um banco SQLite temporário (DATABASE_URL) com um supervisor, técnicos
+e um material. Uso: python -m benchmarks.bench_atividades_bulk [--atividades 200]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmpdir = tempfile.mkdtemp(prefix='fibreco-bench-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}")
+
+from sqlalchemy import event
+from src.main import app
+from src.models.auth import db, User, UserRole
+from src.models.material import Material
+
+
+def preparar(tecnicos):
+    with app.app_context():
+        supervisor = User(username='bench_sup', email='bench_sup@bench', nome_completo='Supervisor Bench', role=UserRole.SUPERVISOR)
+        supervisor.set_password('bench123')
+        db.session.add(supervisor)
+        for i in range(tecnicos):
+            tecnico = User(username=f'bench_tec{i}', email=f'bench_tec{i}@bench', nome_completo=f'Técnico {i}', role=UserRole.USER)
+            tecnico.set_password('bench123')
+            db.session.add(tecnico)
+        db.session.flush()
+        material = Material(nome='Cabo Drop 1 Fibra', categoria='cabos', quantidade=1000000,
+                            unidade='metro', usuario_id=supervisor.id)
+        db.session.add(material)
+        db.session.commit()
+        ids = [u.id for u in User.query.filter_by(role=UserRole.USER).all()]
+        return ids, material.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--atividades', type=int, default=200)
+    parser.add_argument('--tecnicos', type=int, default=20)
+    parser.add_argument('--saida', help='Arquivo JSON para gravar os resultados')
+    args = parser.parse_args()
+
+    usuario_ids, material_id = preparar(args.tecnicos)
+    client = app.test_client()
+    token = client.post('/api/login', json={'username': 'bench_sup', 'password': 'bench123'}).json['token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    consultas = [0]
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: consultas.__setitem__(0, consultas[0] + 1))
+
+    itens = [{
+        'titulo': f'Instalação cliente {i}',
+        'usuario_id': usuario_ids[i % len(usuario_ids)],
+        'material_id': material_id,
+        'quantidade_necessaria': 80
+    } for i in range(args.atividades)]
+
+    resultados = {'atividades': args.atividades}
+
+    consultas[0] = 0
+    inicio = time.perf_counter()
+    for item in itens:
+        r = client.post('/api/atividades', json=item, headers=headers)
+        assert r.status_code == 201, r.get_json()
+    resultados['individual'] = {'ms': round((time.perf_counter() - inicio) * 1000, 1), 'consultas': consultas[0]}
+
+    consultas[0] = 0
+    inicio = time.perf_counter()
+    r = client.post('/api/atividades/bulk', json={'atividades': itens}, headers=headers)
+    assert r.status_code == 201, r.get_json()
+    resultados['bulk'] = {'ms': round((time.perf_counter() - inicio) * 1000, 1), 'consultas': consultas[0]}
+
+    print(f"Criação de {args.atividades} atividades")
+    for nome in ('individual', 'bulk'):
+        print(f"  {nome:<12} {resultados[nome]['ms']:>9.1f} ms  {resultados[nome]['consultas']:>6} consultas SQL")
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
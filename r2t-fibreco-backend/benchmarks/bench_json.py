@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialização e compressão dos payloads de listagem
+
+Uso: python -m benchmarks.bench_json [--linhas 10000] [--repeticoes 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from src.utils.json_provider import FastJSONProvider, orjson
+from src.utils.compression import compress_body
+
+
+def gerar_materiais(linhas):
+    """Gera linhas no formato de Material.to_dict()"""
+    base = datetime(2025, 1, 1)
+    categorias = ['cabos', 'caixas', 'conectores', 'plaquetas', 'tubetes']
+    return [{
+        'id': i,
+        'nome': f'Cabo Fig8 {12 + i % 4 * 12} Fibras SM lote {i}',
+        'categoria': categorias[i % len(categorias)],
+        'subcategoria': 'fig8',
+        'quantidade': (i * 37) % 2000,
+        'quantidade_minima': 100,
+        'unidade': 'metro',
+        'localizacao': f'Estoque B - Bobina {i % 40}',
+        'fornecedor': 'Prysmian',
+        'preco_unitario': 3.2 + (i % 10) / 10,
+        'codigo_interno': f'CB-FG8-{i:06d}',
+        'codigo_fornecedor': f'PRY-{i:06d}',
+        'descricao': 'Cabo óptico autossustentado figura 8, fibras monomodo',
+        'usuario_id': i % 20 + 1,
+        'usuario_nome': f'Técnico {i % 20 + 1}',
+        'data_cadastro': (base + timedelta(minutes=i)).isoformat(),
+        'data_atualizacao': (base + timedelta(minutes=i)).isoformat(),
+        'ativo': True,
+        'status_estoque': 'estoque_ok'
+    } for i in range(linhas)]
+
+
+def medir(func, repeticoes):
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, min(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--linhas', type=int, default=10000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--saida', help='Arquivo JSON para gravar os resultados')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    payload = gerar_materiais(args.linhas)
+    providers = {'json (Flask padrão)': DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = FastJSONProvider(app, backend='orjson')
+    else:
+        print('orjson não instalado; medindo apenas o provider padrão')
+
+    resultados = {'linhas': args.linhas, 'encoders': {}, 'compressao': {}}
+    corpo = None
+    with app.app_context():
+        for nome, provider in providers.items():
+            corpo, ms = medir(lambda: provider.response(payload).get_data(), args.repeticoes)
+            resultados['encoders'][nome] = {'ms': round(ms, 2), 'bytes': len(corpo)}
+
+    for encoding in ('gzip', 'deflate'):
+        for nivel in (1, 6, 9):
+            comprimido, ms = medir(lambda: compress_body(corpo, encoding, nivel), args.repeticoes)
+            resultados['compressao'][f'{encoding}-{nivel}'] = {'ms': round(ms, 2), 'bytes': len(comprimido)}
+
+    print(f"Payload de {args.linhas} materiais")
+    for nome, r in resultados['encoders'].items():
+        print(f"  encode {nome:<20} {r['ms']:>9.2f} ms  {r['bytes']:>10} bytes")
+    for nome, r in resultados['compressao'].items():
+        print(f"  {nome:<27} {r['ms']:>9.2f} ms  {r['bytes']:>10} bytes "
+              f"({r['bytes'] / len(corpo) * 100:.1f}%)")
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
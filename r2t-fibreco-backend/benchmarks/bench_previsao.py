@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark da previsão de consumo sobre o agregado diário
+
+Gera movimentações de saída num banco SQLite temporário (DATABASE_URL) e mede:
+reconstrução completa do agregado, relatório de reposição de todos os materiais,
+previsão de um material e o custo incremental de gravar uma saída.
+
+Uso: python -m benchmarks.bench_previsao [--movimentacoes 1000000] [--materiais 500] [--dias 1095]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmpdir = tempfile.mkdtemp(prefix='fibreco-bench-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}")
+
+from sqlalchemy import insert
+from src.main import app
+from src.models.auth import db
+from src.models.consumo import ConsumoDiario
+from src.models.material import Material, MovimentacaoEstoque
+from src.utils.previsao import previsao_material, previsoes, recalcular_consumo
+
+
+def gerar(movimentacoes, materiais, dias, lote=50000):
+    rng = random.Random(42)
+    agora = datetime.utcnow()
+    db.session.execute(insert(Material), [{
+        'nome': f'Material {i}', 'categoria': 'cabos', 'quantidade': 100000,
+        'quantidade_minima': 100, 'unidade': 'metro'
+    } for i in range(materiais)])
+    db.session.commit()
+    ids = [m.id for m in Material.query.all()]
+
+    # Inserção direta na tabela (sem ORM) para gerar o histórico rapidamente
+    tabela = MovimentacaoEstoque.__table__
+    connection = db.session.connection()
+    for inicio in range(0, movimentacoes, lote):
+        connection.execute(insert(tabela), [{
+            'material_id': rng.choice(ids),
+            'tipo_movimentacao': 'saida',
+            'quantidade': rng.randint(1, 50),
+            'quantidade_anterior': 0,
+            'quantidade_atual': 0,
+            'data_movimentacao': agora - timedelta(minutes=rng.randint(0, dias * 1440))
+        } for _ in range(min(lote, movimentacoes - inicio))])
+    db.session.commit()
+
+
+def medir(func, repeticoes=1):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return round(min(tempos) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movimentacoes', type=int, default=1000000)
+    parser.add_argument('--materiais', type=int, default=500)
+    parser.add_argument('--dias', type=int, default=1095)
+    parser.add_argument('--saida', help='Arquivo JSON para gravar os resultados')
+    args = parser.parse_args()
+
+    resultados = {'movimentacoes': args.movimentacoes, 'materiais': args.materiais, 'dias': args.dias}
+    with app.app_context():
+        inicio = time.perf_counter()
+        gerar(args.movimentacoes, args.materiais, args.dias)
+        resultados['geracao_s'] = round(time.perf_counter() - inicio, 1)
+
+        resultados['reconstrucao_ms'] = medir(recalcular_consumo)
+        resultados['linhas_agregado'] = ConsumoDiario.query.count()
+
+        materiais = Material.query.all()
+        resultados['reposicao_todos_ms'] = medir(lambda: previsoes(materiais), 3)
+        resultados['previsao_um_material_ms'] = medir(lambda: previsao_material(materiais[0]), 5)
+
+        def saida():
+            material = materiais[0]
+            db.session.add(MovimentacaoEstoque(
+                material_id=material.id, tipo_movimentacao='saida', quantidade=1,
+                quantidade_anterior=material.quantidade, quantidade_atual=material.quantidade - 1
+            ))
+            db.session.commit()
+        resultados['saida_incremental_ms'] = medir(saida, 5)
+
+    print(f"{args.movimentacoes} movimentações, {args.materiais} materiais, {args.dias} dias "
+          f"(gerado em {resultados['geracao_s']} s)")
+    print(f"  reconstrução do agregado   {resultados['reconstrucao_ms']:>10.2f} ms  ({resultados['linhas_agregado']} linhas)")
+    print(f"  reposição (todos)          {resultados['reposicao_todos_ms']:>10.2f} ms")
+    print(f"  previsão de um material    {resultados['previsao_um_material_ms']:>10.2f} ms")
+    print(f"  saída + agregado (commit)  {resultados['saida_incremental_ms']:>10.2f} ms")
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
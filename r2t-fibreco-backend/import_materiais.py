@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Importa materiais de um CSV (upsert por codigo_interno)
+
+Uso: python import_materiais.py materiais.csv [--dry-run] [--usuario admin] [--lote 500]
+"""
+import argparse
+import json
+import os
+import sys
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.main import app
+from src.models.auth import User
+from src.utils.importacao import LOTE_PADRAO, abrir_csv, importar_materiais
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('arquivo', help='Arquivo CSV (UTF-8) com cabeçalho')
+    parser.add_argument('--dry-run', action='store_true', help='Apenas valida, sem gravar')
+    parser.add_argument('--usuario', help='Username do proprietário dos materiais novos')
+    parser.add_argument('--lote', type=int, default=LOTE_PADRAO, help='Linhas por transação')
+    parser.add_argument('--separador', choices=[',', ';'], help='Separador (padrão: detectado pelo cabeçalho)')
+    parser.add_argument('--relatorio', help='Arquivo JSON para gravar o relatório completo')
+    args = parser.parse_args()
+
+    with app.app_context():
+        usuario_id = None
+        responsavel = 'Sistema'
+        if args.usuario:
+            usuario = User.query.filter_by(username=args.usuario).first()
+            if not usuario:
+                print(f"Usuário '{args.usuario}' não encontrado")
+                return 1
+            usuario_id = usuario.id
+            responsavel = usuario.nome_completo
+
+        with open(args.arquivo, 'rb') as arquivo:
+            leitor = abrir_csv(arquivo, args.separador)
+            if 'codigo_interno' not in (leitor.fieldnames or []):
+                print('O CSV precisa da coluna codigo_interno')
+                return 1
+            relatorio = importar_materiais(leitor, usuario_id=usuario_id, responsavel=responsavel,
+                                           dry_run=args.dry_run, lote=args.lote)
+
+    prefixo = '[dry-run] ' if args.dry_run else ''
+    print(f"{prefixo}{relatorio['linhas']} linhas: {relatorio['criados']} criados, "
+          f"{relatorio['atualizados']} atualizados, {relatorio['total_erros']} com erro")
+    for erro in relatorio['erros'][:20]:
+        print(f"  linha {erro['linha']} ({erro['codigo_interno'] or '-'}): {'; '.join(erro['erros'])}")
+    if relatorio['total_erros'] > 20:
+        print(f"  ... e mais {relatorio['total_erros'] - 20} erros")
+
+    if args.relatorio:
+        with open(args.relatorio, 'w') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
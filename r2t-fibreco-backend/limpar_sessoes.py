@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Remove as sessões expiradas ou encerradas (logout / limite por usuário) e o
+histórico de sincronização mais antigo que SYNC_CHANGES_RETENTION_DAYS
+
+Alternativa à limpeza periódica da aplicação (SESSION_CLEANUP_INTERVAL = 0),
+para rodar via cron. As sessões são apagadas em lotes, com um commit por lote.
+
+Uso: python limpar_sessoes.py [--lote 1000]
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.main import app
+from src.utils.change_log import expurgar_alteracoes
+from src.utils.sessoes import DEFAULT_SESSION_CLEANUP_BATCH, limpar_sessoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lote', type=int, default=DEFAULT_SESSION_CLEANUP_BATCH, help='Sessões apagadas por commit')
+    args = parser.parse_args()
+
+    with app.app_context():
+        inicio = time.perf_counter()
+        removidas = limpar_sessoes(lote=args.lote)
+        alteracoes = expurgar_alteracoes()
+    print(f"{removidas} sessões e {alteracoes} alterações de sincronização removidas "
+          f"em {time.perf_counter() - inicio:.1f} s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
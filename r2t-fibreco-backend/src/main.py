@@ -3,7 +3,7 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, jsonify
 from flask_cors import CORS
 from src.models.auth import db
 from src.models.material import Material, MovimentacaoEstoque
@@ -11,6 +11,26 @@ from src.models.auth import User, Session, UserRole
 from src.routes.material import material_bp
 from src.routes.auth import auth_bp
 from src.routes.notifications import notifications_bp
+from src.routes.sync import sync_bp
+from src.routes.export import export_bp
+from src.routes.profiles import profiles_bp
+from src.utils.static_assets import StaticAssets
+from src.utils.json_provider import init_json_provider
+from src.utils.compression import init_compression
+from src.utils.instrumentation import init_instrumentation
+from src.utils.metrics import init_metrics
+from src.utils.profiler import init_profiler
+from src.utils.senhas import init_senhas
+from src.utils.limite_login import init_limite_login
+from src.utils.sessoes import init_sessoes
+from src.utils.tokens import init_tokens
+from src.utils.schema import upgrade_schema
+from src.utils.table_versions import init_table_versions
+from src.utils.change_log import init_change_log
+from src.utils.search import init_search
+from src.utils.autocomplete import init_autocomplete
+from src.utils.alertas import init_alertas
+from src.utils.previsao import init_previsao
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -18,8 +38,20 @@ app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 # Habilitar CORS para todas as rotas
 CORS(app)
 
+# Tempo, consultas SQL e tamanho de cada requisição (Server-Timing e log de requisições lentas);
+# registrado antes da compressão para medir o corpo já comprimido
+init_instrumentation(app)
+
+# JSON rápido (orjson quando disponível) e compressão gzip/deflate das respostas
+init_json_provider(app)
+init_compression(app)
+
 # Configurar banco de dados
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# DATABASE_URL permite apontar para outro banco (ex.: banco temporário dos benchmarks)
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL',
+    f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
@@ -27,29 +59,66 @@ db.init_app(app)
 app.register_blueprint(material_bp, url_prefix='/api')
 app.register_blueprint(auth_bp, url_prefix='/api')
 app.register_blueprint(notifications_bp, url_prefix='/api')
+app.register_blueprint(sync_bp, url_prefix='/api')
+app.register_blueprint(export_bp, url_prefix='/api')
+app.register_blueprint(profiles_bp, url_prefix='/api')
+
+# Métricas no formato do Prometheus em /metrics (latência por endpoint, PDFs, uploads,
+# movimentações, autenticação e pool de conexões)
+init_metrics(app, db)
+
+# Perfil das requisições com cProfile (?__profile=1 para admins ou amostragem por PROFILE_SAMPLE_RATE)
+init_profiler(app)
+
+# Hash de senhas (método configurável, calculado num pool de threads limitado) e
+# limite de tentativas de login por username e por IP
+# TRUSTED_PROXIES: proxies reversos na frente da aplicação (1 com o nginx do INSTALLATION_GUIDE)
+app.config['TRUSTED_PROXIES'] = int(os.environ.get('TRUSTED_PROXIES', '0'))
+init_senhas(app)
+init_limite_login(app)
+
+# Limpeza periódica das sessões expiradas e limite de sessões ativas por usuário
+init_sessoes(app)
+
+# Tokens de acesso: sessões na tabela (padrão) ou assinados com HMAC (AUTH_TOKEN_MODE = 'signed')
+init_tokens(app)
 
 
 # Criar tabelas do banco
 with app.app_context():
     db.create_all()
 
+# Índices (e demais ajustes) em bancos criados por versões anteriores
+upgrade_schema(app)
+
+# Versões por tabela usadas nos ETags das listagens
+init_table_versions(app)
+
+# Registro de alterações para a sincronização incremental (/api/sync)
+init_change_log(app)
+
+# Detecção de estoque baixo (flag indexado + notificações)
+init_alertas(app)
+
+# Agregado diário de consumo usado na previsão e no relatório de reposição
+init_previsao(app)
+
+# Índice de busca textual de materiais (FTS5) e índice de prefixos do autocomplete
+init_search(app)
+init_autocomplete()
+
+# Índice em memória dos arquivos do frontend (com variantes gzip/brotli pré-geradas)
+app.config.setdefault('STATIC_INDEX_MAX_AGE', 60)
+static_assets = StaticAssets(app.static_folder, index_max_age=app.config['STATIC_INDEX_MAX_AGE'])
+
 # Rota catch-all para servir o frontend (deve vir por último)
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+    if app.static_folder is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
-
+    return static_assets.serve(path)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5002, debug=True)
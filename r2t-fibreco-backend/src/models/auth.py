@@ -1,8 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import enum
 
+from src.utils.senhas import gerar_hash, precisa_rehash, verificar_senha
+
 db = SQLAlchemy()
 
 class UserRole(enum.Enum):
@@ -10,6 +11,16 @@ class UserRole(enum.Enum):
     SUPERVISOR = "supervisor"
     ADMIN = "admin"
 
+ROLE_HIERARCHY = {
+    UserRole.USER: 1,
+    UserRole.SUPERVISOR: 2,
+    UserRole.ADMIN: 3
+}
+
+def role_has_permission(role, required_role):
+    """Verifica se o role atende ao role requerido (sem precisar carregar o usuário)"""
+    return ROLE_HIERARCHY.get(role, 0) >= ROLE_HIERARCHY.get(required_role, 0)
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -25,11 +36,15 @@ class User(db.Model):
     
     def set_password(self, password):
         """Define a senha do usuário com hash"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = gerar_hash(password)
     
     def check_password(self, password):
         """Verifica se a senha está correta"""
-        return check_password_hash(self.password_hash, password)
+        return verificar_senha(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Verifica se o hash foi gerado com parâmetros diferentes dos configurados"""
+        return precisa_rehash(self.password_hash)
     
     def is_admin(self):
         """Verifica se o usuário é administrador"""
@@ -45,12 +60,7 @@ class User(db.Model):
     
     def has_permission(self, required_role):
         """Verifica se o usuário tem permissão baseada no role"""
-        role_hierarchy = {
-            UserRole.USER: 1,
-            UserRole.SUPERVISOR: 2,
-            UserRole.ADMIN: 3
-        }
-        return role_hierarchy.get(self.role, 0) >= role_hierarchy.get(required_role, 0)
+        return role_has_permission(self.role, required_role)
     
     def to_dict(self):
         """Converte o usuário para dicionário"""
@@ -72,11 +82,15 @@ class Session(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     token = db.Column(db.String(255), unique=True, nullable=False)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
-    data_expiracao = db.Column(db.DateTime, nullable=False)
+    data_expiracao = db.Column(db.DateTime, nullable=False, index=True)  # limpeza das expiradas
     ativo = db.Column(db.Boolean, default=True)
     
     user = db.relationship('User', backref=db.backref('sessions', lazy=True))
     
+    __table_args__ = (
+        db.Index('ix_sessions_user_ativo', 'user_id', 'ativo'),  # limite de sessões por usuário
+    )
+    
     def is_valid(self):
         """Verifica se a sessão ainda é válida"""
         return self.ativo and datetime.utcnow() < self.data_expiracao
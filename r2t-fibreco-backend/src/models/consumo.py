@@ -0,0 +1,13 @@
+from src.models.auth import db
+
+class ConsumoDiario(db.Model):
+    """Total de saídas de cada material por dia (agregado usado na previsão)"""
+    __tablename__ = 'consumo_diario'
+    
+    material_id = db.Column(db.Integer, db.ForeignKey('material.id'), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    movimentos = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ConsumoDiario {self.material_id} {self.dia}={self.quantidade}>'
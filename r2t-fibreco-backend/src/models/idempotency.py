@@ -0,0 +1,19 @@
+from datetime import datetime
+from src.models.auth import db
+
+class IdempotencyKey(db.Model):
+    """Resposta registrada para uma chave de idempotência enviada pelo cliente"""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (db.UniqueConstraint('user_id', 'chave', name='uq_idempotency_user_chave'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    chave = db.Column(db.String(255), nullable=False)
+    endpoint = db.Column(db.String(100), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)  # None enquanto a requisição está em andamento
+    resposta = db.Column(db.Text, nullable=True)  # JSON da resposta original
+    corpo_hash = db.Column(db.String(64), nullable=True)  # SHA-256 do corpo da requisição original
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.chave} - {self.status_code}>'
@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy.ext.hybrid import hybrid_property
 from src.models.auth import db
 from src.utils.timezone import get_recife_time_utc
 
@@ -10,28 +11,42 @@ class Material(db.Model):
     subcategoria = db.Column(db.String(50), nullable=True)  # fig8, CTO, GP, SC APC, precom, etc.
     quantidade = db.Column(db.Integer, nullable=False, default=0)
     quantidade_minima = db.Column(db.Integer, nullable=False, default=10)
+    # Soma das reservas ativas (mantida junto com o livro de reservas, ver ReservaEstoque)
+    quantidade_reservada = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     unidade = db.Column(db.String(20), nullable=False, default='unidade')  # unidade, metro, rolo, etc.
     localizacao = db.Column(db.String(100), nullable=True)  # onde está armazenado
     fornecedor = db.Column(db.String(100), nullable=True)
     preco_unitario = db.Column(db.Float, nullable=True)
-    codigo_interno = db.Column(db.String(50), nullable=True)
+    codigo_interno = db.Column(db.String(50), nullable=True, index=True)  # chave da importação CSV
     codigo_fornecedor = db.Column(db.String(50), nullable=True)
     descricao = db.Column(db.Text, nullable=True)
-    usuario_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # Usuário proprietário do material
+    usuario_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)  # Usuário proprietário do material
     data_cadastro = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     data_atualizacao = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     ativo = db.Column(db.Boolean, nullable=False, default=True)
+    # Ligado ao atingir quantidade_minima e desligado com histerese (ver src/utils/alertas.py)
+    alerta_estoque = db.Column(db.Boolean, nullable=False, default=False, server_default='0', index=True)
 
     def __repr__(self):
         return f'<Material {self.nome}>'
 
-    def to_dict(self):
+    @hybrid_property
+    def disponivel(self):
+        """Quantidade em estoque que não está reservada para atividades"""
+        return self.quantidade - (self.quantidade_reservada or 0)
+
+    @disponivel.expression
+    def disponivel(cls):
+        return cls.quantidade - cls.quantidade_reservada
+
+    def to_dict(self, usuarios=None):
+        """``usuarios``: mapa {id: User} já carregado pelas listagens; sem ele o proprietário é buscado"""
         from src.models.auth import User
         
         # Buscar informações do usuário proprietário
         usuario_nome = None
         if self.usuario_id:
-            user = User.query.get(self.usuario_id)
+            user = usuarios.get(self.usuario_id) if usuarios is not None else User.query.get(self.usuario_id)
             if user:
                 usuario_nome = user.nome_completo
         
@@ -42,6 +57,8 @@ class Material(db.Model):
             'subcategoria': self.subcategoria,
             'quantidade': self.quantidade,
             'quantidade_minima': self.quantidade_minima,
+            'quantidade_reservada': self.quantidade_reservada or 0,
+            'disponivel': self.disponivel,
             'unidade': self.unidade,
             'localizacao': self.localizacao,
             'fornecedor': self.fornecedor,
@@ -54,7 +71,8 @@ class Material(db.Model):
             'data_cadastro': self.data_cadastro.isoformat() if self.data_cadastro else None,
             'data_atualizacao': self.data_atualizacao.isoformat() if self.data_atualizacao else None,
             'ativo': self.ativo,
-            'status_estoque': self.get_status_estoque()
+            'status_estoque': self.get_status_estoque(),
+            'alerta_estoque': self.alerta_estoque
         }
 
     def get_status_estoque(self):
@@ -66,6 +84,11 @@ class Material(db.Model):
             return 'estoque_ok'
 
 class MovimentacaoEstoque(db.Model):
+    __table_args__ = (
+        # Exportação por período e "últimas movimentações" do dashboard
+        db.Index('ix_movimentacao_estoque_data', 'data_movimentacao'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     material_id = db.Column(db.Integer, db.ForeignKey('material.id'), nullable=False)
     tipo_movimentacao = db.Column(db.String(20), nullable=False)  # entrada, saida, ajuste
@@ -83,14 +106,15 @@ class MovimentacaoEstoque(db.Model):
     def __repr__(self):
         return f'<MovimentacaoEstoque {self.tipo_movimentacao} - {self.quantidade}>'
 
-    def to_dict(self):
+    def to_dict(self, usuarios=None):
+        """``usuarios``: mapa {id: User} já carregado pelas listagens; sem ele o responsável é buscado"""
         import json
         from src.models.auth import User
         
         # Buscar o usuário responsável se responsavel_id estiver definido
         responsavel_nome = self.responsavel
         if self.responsavel_id:
-            user = User.query.get(self.responsavel_id)
+            user = usuarios.get(self.responsavel_id) if usuarios is not None else User.query.get(self.responsavel_id)
             if user:
                 responsavel_nome = user.nome_completo
         
@@ -111,6 +135,14 @@ class MovimentacaoEstoque(db.Model):
         }
 
 class Atividade(db.Model):
+    __table_args__ = (
+        # Índices das listagens por escopo (supervisor/usuário) ordenadas por data
+        db.Index('ix_atividade_supervisor_data', 'supervisor_id', 'data_criacao'),
+        db.Index('ix_atividade_usuario_data', 'usuario_id', 'data_criacao'),
+        db.Index('ix_atividade_status_data', 'status', 'data_criacao'),
+        db.Index('ix_atividade_data_criacao', 'data_criacao'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(200), nullable=False)
     descricao = db.Column(db.Text, nullable=True)
@@ -135,6 +167,7 @@ class Atividade(db.Model):
     usuario = db.relationship('User', foreign_keys=[usuario_id], backref='atividades_atribuidas')
     supervisor = db.relationship('User', foreign_keys=[supervisor_id], backref='atividades_criadas')
     material = db.relationship('Material', backref='atividades')
+    reservas = db.relationship('ReservaEstoque', backref='atividade', cascade='all, delete-orphan')
 
     def __repr__(self):
         return f'<Atividade {self.titulo} - {self.usuario.nome_completo if self.usuario else "N/A"}>'
@@ -164,6 +197,25 @@ class Atividade(db.Model):
             'endereco': self.endereco
         }
 
+    def to_summary_dict(self):
+        """Projeção leve para listagens (sem textos longos e imagens)"""
+        return {
+            'id': self.id,
+            'titulo': self.titulo,
+            'usuario_id': self.usuario_id,
+            'usuario_nome': self.usuario.nome_completo if self.usuario else None,
+            'supervisor_id': self.supervisor_id,
+            'supervisor_nome': self.supervisor.nome_completo if self.supervisor else None,
+            'material_id': self.material_id,
+            'material_nome': self.material.nome if self.material else None,
+            'quantidade_necessaria': self.quantidade_necessaria,
+            'status': self.status,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'data_limite': self.data_limite.isoformat() if self.data_limite else None,
+            'data_conclusao': self.data_conclusao.isoformat() if self.data_conclusao else None,
+            'endereco': self.endereco
+        }
+
 class MaterialUsado(db.Model):
     """Materiais usados na conclusão de uma atividade"""
     id = db.Column(db.Integer, primary_key=True)
@@ -189,3 +241,36 @@ class MaterialUsado(db.Model):
             'data_uso': self.data_uso.isoformat() if self.data_uso else None
         }
 
+class ReservaEstoque(db.Model):
+    """Livro de reservas de estoque feitas por atividades
+    
+    Uma reserva nasce 'ativa' na criação da atividade e termina 'liberada'
+    (cancelamento/edição) ou 'consumida' (conclusão). A soma das reservas
+    ativas de cada material fica em Material.quantidade_reservada.
+    """
+    __tablename__ = 'reserva_estoque'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    atividade_id = db.Column(db.Integer, db.ForeignKey('atividade.id'), nullable=False, index=True)
+    material_id = db.Column(db.Integer, db.ForeignKey('material.id'), nullable=False, index=True)
+    quantidade = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='ativa')  # ativa, liberada, consumida
+    data_criacao = db.Column(db.DateTime, nullable=False, default=get_recife_time_utc)
+    data_encerramento = db.Column(db.DateTime, nullable=True)
+    
+    # Relacionamentos
+    material = db.relationship('Material', backref='reservas')
+    
+    def __repr__(self):
+        return f'<ReservaEstoque {self.material_id} - {self.quantidade} ({self.status})>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'atividade_id': self.atividade_id,
+            'material_id': self.material_id,
+            'quantidade': self.quantidade,
+            'status': self.status,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'data_encerramento': self.data_encerramento.isoformat() if self.data_encerramento else None
+        }
@@ -10,14 +10,16 @@ class Notification(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     message = db.Column(db.Text, nullable=False)
-    type = db.Column(db.String(50), nullable=False)  # 'atividade_atribuida', 'atividade_concluida'
+    type = db.Column(db.String(50), nullable=False)  # 'atividade_atribuida', 'atividade_concluida', 'estoque_baixo'
     activity_id = db.Column(db.Integer, db.ForeignKey('atividade.id'), nullable=True)
+    material_id = db.Column(db.Integer, db.ForeignKey('material.id'), nullable=True)  # alertas de estoque
     read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, nullable=False, default=get_recife_time_utc)
     
     # Relacionamentos
     user = db.relationship('User', backref='notifications')
     activity = db.relationship('Atividade', backref='notifications')
+    material = db.relationship('Material')
     
     def __repr__(self):
         return f'<Notification {self.title} - {self.user.username if self.user else "N/A"}>'
@@ -30,6 +32,7 @@ class Notification(db.Model):
             'message': self.message,
             'type': self.type,
             'activity_id': self.activity_id,
+            'material_id': self.material_id,
             'read': self.read,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'activity_title': self.activity.titulo if self.activity else None
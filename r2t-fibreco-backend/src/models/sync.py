@@ -0,0 +1,19 @@
+from datetime import datetime
+from src.models.auth import db
+
+class ChangeLog(db.Model):
+    """Sequência monotônica de alterações usada pela sincronização incremental"""
+    __tablename__ = 'sync_changes'
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    id = db.Column(db.Integer, primary_key=True)  # cursor da sincronização
+    table_name = db.Column(db.String(64), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    operacao = db.Column(db.String(10), nullable=False)  # upsert, delete
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)  # retenção
+    # Donos da linha antes da alteração: quem a via recebe o tombstone se ela sair do seu escopo
+    usuario_id = db.Column(db.Integer, nullable=True)
+    supervisor_id = db.Column(db.Integer, nullable=True)
+    
+    def __repr__(self):
+        return f'<ChangeLog {self.id} {self.operacao} {self.table_name}:{self.row_id}>'
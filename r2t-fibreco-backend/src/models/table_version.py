@@ -0,0 +1,11 @@
+from src.models.auth import db
+
+class TableVersion(db.Model):
+    """Versão de cada tabela, incrementada a cada commit que a altera"""
+    __tablename__ = 'table_versions'
+    
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<TableVersion {self.table_name}={self.version}>'
@@ -1,10 +1,18 @@
 from flask import Blueprint, request, jsonify, session, g
+from werkzeug.local import LocalProxy
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
+import math
 import secrets
 import functools
 
 from ..models.auth import db, User, Session, UserRole
+from ..utils.limite_login import verificar_tentativa
+from ..utils.metrics import registrar_auth, registrar_login_bloqueado
+from ..utils.principal import Principal
+from ..utils.senhas import HashOcupado
+from ..utils.sessoes import aplicar_limite_por_usuario, encerrar_sessoes_do_usuario, valores_encerramento
+from ..utils.tokens import assinar_token, modo_assinado, revogado, revogar, verificar_token
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -19,12 +27,31 @@ def login_required(f):
         if token.startswith('Bearer '):
             token = token[7:]
         
+        if modo_assinado():
+            # Token assinado: conferido em memória, sem consulta por requisição
+            dados = verificar_token(token)
+            if not dados or revogado(dados):
+                registrar_auth('invalido')
+                return jsonify({'error': 'Token inválido ou expirado'}), 401
+            registrar_auth('hit')
+            
+            # O usuário só é carregado se a rota usar request.current_user
+            principal = Principal(dados['uid'], UserRole(dados['role']))
+            request.current_user = LocalProxy(lambda: principal.user)
+            g.principal = principal
+            g.user_id = principal.id
+            return f(*args, **kwargs)
+        
         user_session = Session.query.filter_by(token=token, ativo=True).first()
         if not user_session or not user_session.is_valid():
+            registrar_auth('invalido')
             return jsonify({'error': 'Token inválido ou expirado'}), 401
+        registrar_auth('miss')
         
-        request.current_user = user_session.user
-        g.user_id = user_session.user.id
+        user = user_session.user
+        request.current_user = user
+        g.principal = Principal(user.id, user.role, user)
+        g.user_id = user.id
         return f(*args, **kwargs)
     
     return decorated_function
@@ -34,7 +61,8 @@ def role_required(required_role):
     def decorator(f):
         @functools.wraps(f)
         def decorated_function(*args, **kwargs):
-            if not hasattr(request, 'current_user') or not request.current_user.has_permission(required_role):
+            principal = g.get('principal')
+            if principal is None or not principal.has_permission(required_role):
                 role_names = {
                     UserRole.USER: 'usuário',
                     UserRole.SUPERVISOR: 'supervisor',
@@ -64,10 +92,32 @@ def login():
         if not username or not password:
             return jsonify({'error': 'Username e password são obrigatórios'}), 400
         
+        # Limite de tentativas antes de qualquer consulta ou hash
+        bloqueio = verificar_tentativa(username, request.remote_addr or '')
+        if bloqueio:
+            motivo, espera = bloqueio
+            registrar_login_bloqueado(motivo)
+            response = jsonify({'error': 'Muitas tentativas de login. Tente novamente mais tarde'})
+            response.headers['Retry-After'] = str(math.ceil(espera))
+            return response, 429
+        
         # Buscar usuário
         user = User.query.filter_by(username=username, ativo=True).first()
-        if not user or not user.check_password(password):
-            return jsonify({'error': 'Credenciais inválidas'}), 401
+        try:
+            if not user or not user.check_password(password):
+                return jsonify({'error': 'Credenciais inválidas'}), 401
+        except HashOcupado:
+            registrar_login_bloqueado('ocupado')
+            response = jsonify({'error': 'Servidor ocupado. Tente novamente em instantes'})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        
+        # Hash gerado com parâmetros antigos: regrava com os atuais (a senha só é conhecida aqui)
+        if user.password_needs_rehash():
+            try:
+                user.set_password(password)
+            except HashOcupado:
+                pass  # fica para o próximo login
         
         # Gerar token de sessão
         token = secrets.token_urlsafe(32)
@@ -79,11 +129,18 @@ def login():
             token=token,
             data_expiracao=expiration
         )
+        if modo_assinado():
+            # A sessão guarda só o identificador (jti) do token assinado
+            token = assinar_token(user_session.token, user.id, user.role, expiration)
         
         # Atualizar último login
         user.ultimo_login = datetime.utcnow()
         
         db.session.add(user_session)
+        db.session.flush()
+        
+        # Sessões além do limite por usuário: encerra as mais antigas
+        aplicar_limite_por_usuario(user.id)
         db.session.commit()
         
         return jsonify({
@@ -106,10 +163,15 @@ def logout():
         if token.startswith('Bearer '):
             token = token[7:]
         
+        if modo_assinado():
+            token = verificar_token(token)['jti']
+            revogar(token)
+        
         # Desativar sessão
         user_session = Session.query.filter_by(token=token).first()
         if user_session:
-            user_session.ativo = False
+            for coluna, valor in valores_encerramento().items():
+                setattr(user_session, coluna, valor)
             db.session.commit()
         
         return jsonify({'message': 'Logout realizado com sucesso'}), 200
@@ -239,6 +301,9 @@ def update_user(user_id):
                 # Verificar se pode alterar para este role
                 if not current_user.has_permission(new_role):
                     return jsonify({'error': 'Você não tem permissão para alterar para este role'}), 403
+                if new_role != user.role and modo_assinado():
+                    # O role vai dentro do token: os tokens já emitidos precisam ser revogados
+                    encerrar_sessoes_do_usuario(user.id)
                 user.role = new_role
             except ValueError:
                 return jsonify({'error': 'Role inválido. Use "user", "supervisor" ou "admin"'}), 400
@@ -0,0 +1,230 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from sqlalchemy import select, func
+from sqlalchemy.orm import aliased
+from src.models.auth import db, User
+from src.models.material import Material, MovimentacaoEstoque, Atividade
+from src.routes.auth import login_required, supervisor_required
+from src.routes.material import parse_data_filtro
+from src.utils.principal import principal_atual, escopo_materiais, escopo_movimentacoes, escopo_atividades
+from datetime import datetime, date
+import csv
+import io
+import tempfile
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # openpyxl é opcional; sem ele apenas CSV
+    Workbook = None
+
+export_bp = Blueprint('export', __name__)
+
+# Linhas por lote lidas do banco (yield_per) e por bloco enviado ao cliente
+EXPORT_BATCH_SIZE = 2000
+# Limite de linhas de uma planilha do Excel (a exportação continua em outra aba)
+XLSX_MAX_ROWS = 1048576
+
+
+def _consulta_materiais(args, principal):
+    proprietario = aliased(User)
+    colunas = [
+        ('id', Material.id),
+        ('nome', Material.nome),
+        ('categoria', Material.categoria),
+        ('subcategoria', Material.subcategoria),
+        ('codigo_interno', Material.codigo_interno),
+        ('codigo_fornecedor', Material.codigo_fornecedor),
+        ('fornecedor', Material.fornecedor),
+        ('unidade', Material.unidade),
+        ('quantidade', Material.quantidade),
+        ('quantidade_reservada', Material.quantidade_reservada),
+        ('disponivel', Material.disponivel),
+        ('quantidade_minima', Material.quantidade_minima),
+        ('preco_unitario', Material.preco_unitario),
+        ('valor_estoque', Material.quantidade * Material.preco_unitario),
+        ('localizacao', Material.localizacao),
+        ('proprietario', proprietario.nome_completo),
+        ('ativo', Material.ativo),
+        ('data_cadastro', Material.data_cadastro),
+        ('data_atualizacao', Material.data_atualizacao),
+    ]
+    stmt = select(*[c for _, c in colunas]).outerjoin(proprietario, Material.usuario_id == proprietario.id)
+    stmt = escopo_materiais(stmt, principal)
+    if args.get('ativo') is not None:
+        stmt = stmt.where(Material.ativo == (args['ativo'].lower() == 'true'))
+    if args.get('categoria'):
+        stmt = stmt.where(Material.categoria == args['categoria'])
+    return colunas, stmt, Material.data_cadastro, Material.id
+
+
+def _consulta_movimentacoes(args, principal):
+    responsavel = aliased(User)
+    colunas = [
+        ('id', MovimentacaoEstoque.id),
+        ('data_movimentacao', MovimentacaoEstoque.data_movimentacao),
+        ('material_id', MovimentacaoEstoque.material_id),
+        ('material_nome', Material.nome),
+        ('codigo_interno', Material.codigo_interno),
+        ('tipo_movimentacao', MovimentacaoEstoque.tipo_movimentacao),
+        ('quantidade', MovimentacaoEstoque.quantidade),
+        ('quantidade_anterior', MovimentacaoEstoque.quantidade_anterior),
+        ('quantidade_atual', MovimentacaoEstoque.quantidade_atual),
+        ('unidade', Material.unidade),
+        ('preco_unitario', Material.preco_unitario),
+        ('valor', MovimentacaoEstoque.quantidade * Material.preco_unitario),
+        ('motivo', MovimentacaoEstoque.motivo),
+        ('responsavel', func.coalesce(responsavel.nome_completo, MovimentacaoEstoque.responsavel)),
+    ]
+    stmt = select(*[c for _, c in colunas])\
+        .join(Material, MovimentacaoEstoque.material_id == Material.id)\
+        .outerjoin(responsavel, MovimentacaoEstoque.responsavel_id == responsavel.id)
+    stmt = escopo_movimentacoes(stmt, principal)
+    if args.get('material_id'):
+        stmt = stmt.where(MovimentacaoEstoque.material_id == int(args['material_id']))
+    if args.get('tipo'):
+        stmt = stmt.where(MovimentacaoEstoque.tipo_movimentacao == args['tipo'])
+    return colunas, stmt, MovimentacaoEstoque.data_movimentacao, MovimentacaoEstoque.id
+
+
+def _consulta_atividades(args, principal):
+    usuario = aliased(User)
+    supervisor = aliased(User)
+    colunas = [
+        ('id', Atividade.id),
+        ('titulo', Atividade.titulo),
+        ('status', Atividade.status),
+        ('usuario', usuario.nome_completo),
+        ('supervisor', supervisor.nome_completo),
+        ('material_id', Atividade.material_id),
+        ('material_nome', Material.nome),
+        ('quantidade_necessaria', Atividade.quantidade_necessaria),
+        ('data_criacao', Atividade.data_criacao),
+        ('data_limite', Atividade.data_limite),
+        ('data_conclusao', Atividade.data_conclusao),
+        ('endereco', Atividade.endereco),
+        ('latitude', Atividade.latitude),
+        ('longitude', Atividade.longitude),
+    ]
+    stmt = select(*[c for _, c in colunas])\
+        .outerjoin(usuario, Atividade.usuario_id == usuario.id)\
+        .outerjoin(supervisor, Atividade.supervisor_id == supervisor.id)\
+        .outerjoin(Material, Atividade.material_id == Material.id)
+    stmt = escopo_atividades(stmt, principal)
+    if args.get('status'):
+        stmt = stmt.where(Atividade.status.in_(args['status'].split(',')))
+    return colunas, stmt, Atividade.data_criacao, Atividade.id
+
+
+CONSULTAS = {
+    'materiais': _consulta_materiais,
+    'movimentacoes': _consulta_movimentacoes,
+    'atividades': _consulta_atividades,
+}
+
+
+def _valor(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _lotes(stmt):
+    """Percorre o resultado em lotes sem carregar tudo em memória"""
+    result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for lote in result.partitions():
+        yield lote
+
+
+def _gerar_csv(cabecalho, stmt, separador):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=separador)
+    # BOM para o Excel reconhecer UTF-8 (acentos)
+    buffer.write('\ufeff')
+    writer.writerow(cabecalho)
+    for lote in _lotes(stmt):
+        for linha in lote:
+            writer.writerow([_valor(v) for v in linha])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _gerar_xlsx(recurso, cabecalho, stmt):
+    """Grava a planilha em modo write-only num arquivo temporário"""
+    workbook = Workbook(write_only=True)
+    planilha = None
+    linhas = XLSX_MAX_ROWS
+    abas = 0
+    for lote in _lotes(stmt):
+        for linha in lote:
+            if linhas >= XLSX_MAX_ROWS:
+                abas += 1
+                planilha = workbook.create_sheet(recurso if abas == 1 else f'{recurso}_{abas}')
+                planilha.append(cabecalho)
+                linhas = 1
+            planilha.append([None if v is None else v for v in linha])
+            linhas += 1
+    if planilha is None:
+        workbook.create_sheet(recurso).append(cabecalho)
+    arquivo = tempfile.TemporaryFile()
+    workbook.save(arquivo)
+    arquivo.seek(0)
+    return arquivo
+
+
+def _ler_arquivo(arquivo, tamanho=64 * 1024):
+    try:
+        while True:
+            bloco = arquivo.read(tamanho)
+            if not bloco:
+                break
+            yield bloco
+    finally:
+        arquivo.close()
+
+
+@export_bp.route('/export/<recurso>.<formato>', methods=['GET'])
+@login_required
+@supervisor_required
+def exportar(recurso, formato):
+    """Exportar materiais, movimentações ou atividades em CSV ou XLSX
+    
+    Mesmo escopo das listagens: supervisores exportam apenas as atividades que criaram.
+    """
+    if recurso not in CONSULTAS:
+        return jsonify({'error': f"Recurso inválido. Use: {', '.join(CONSULTAS)}"}), 404
+    if formato not in ('csv', 'xlsx'):
+        return jsonify({'error': 'Formato inválido. Use csv ou xlsx'}), 404
+    if formato == 'xlsx' and Workbook is None:
+        return jsonify({'error': 'Exportação XLSX indisponível: instale o pacote openpyxl'}), 501
+    
+    try:
+        colunas, stmt, coluna_data, coluna_id = CONSULTAS[recurso](request.args, principal_atual())
+        data_inicio = parse_data_filtro(request.args.get('data_inicio'))
+        data_fim = parse_data_filtro(request.args.get('data_fim'), fim=True)
+    except ValueError:
+        return jsonify({'error': 'Filtro inválido. Datas no formato AAAA-MM-DD ou ISO 8601'}), 400
+    
+    if data_inicio:
+        stmt = stmt.where(coluna_data >= data_inicio)
+    if data_fim:
+        stmt = stmt.where(coluna_data < data_fim)
+    stmt = stmt.order_by(coluna_data, coluna_id)
+    cabecalho = [nome for nome, _ in colunas]
+    
+    nome_arquivo = f"{recurso}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+    headers = {'Content-Disposition': f'attachment; filename="{nome_arquivo}"'}
+    
+    if formato == 'xlsx':
+        arquivo = _gerar_xlsx(recurso, cabecalho, stmt)
+        return Response(_ler_arquivo(arquivo), headers=headers,
+                        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    
+    separador = request.args.get('separador', ',')
+    if separador not in (',', ';', '\t'):
+        return jsonify({'error': "separador deve ser ',', ';' ou tab"}), 400
+    return Response(stream_with_context(_gerar_csv(cabecalho, stmt, separador)),
+                    headers=headers, mimetype='text/csv')
@@ -1,8 +1,18 @@
 from flask import Blueprint, jsonify, request, send_from_directory, make_response, send_file, g
 from src.models.material import Material, MovimentacaoEstoque, Atividade, MaterialUsado, db
 from src.routes.auth import login_required, supervisor_required, admin_required
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload, defer
 from src.utils.timezone import get_recife_time_utc
+from src.utils.table_versions import conditional_get
+from src.utils.idempotency import idempotent
+from src.utils import reservas
+from src.utils.previsao import previsao_material, previsoes
+from src.utils.importacao import abrir_csv, importar_materiais
+from src.utils.metrics import medir_pdf, registrar_upload
+from src.utils.principal import (principal_atual, escopo_materiais, escopo_movimentacoes, escopo_atividades,
+                                 pode_acessar_atividade)
 import os
 import uuid
 import requests
@@ -20,16 +30,34 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
 material_bp = Blueprint('material', __name__)
 
+def _carregar_usuarios(ids):
+    """Carrega de uma vez os usuários referenciados; retorna {id: User} para os to_dict()"""
+    from src.models.auth import User
+    ids = {i for i in ids if i}
+    return {u.id: u for u in User.query.filter(User.id.in_(ids)).all()} if ids else {}
+
+def _quantidade_necessaria(valor):
+    """Converte quantidade_necessaria: ausente vale 0; informada, deve ser um inteiro positivo
+    
+    Retorna None se o valor for inválido.
+    """
+    if valor is None or valor == '':
+        return 0
+    if isinstance(valor, bool):
+        return None
+    try:
+        quantidade = int(valor)
+    except (TypeError, ValueError):
+        return None
+    return quantidade if quantidade > 0 else None
+
 @material_bp.route('/materiais', methods=['GET'])
 @login_required
+@conditional_get('material')
 def get_materiais():
     """Listar materiais baseado no papel do usuário"""
-    from src.models.auth import User
-    from flask import g
     
-    user = User.query.get(g.user_id)
-    if not user:
-        return jsonify({'error': 'Usuário não encontrado'}), 404
+    user = principal_atual()
     
     categoria = request.args.get('categoria')
     subcategoria = request.args.get('subcategoria')
@@ -40,30 +68,104 @@ def get_materiais():
     query = Material.query.filter_by(ativo=ativo)
     
     # Filtrar por usuário baseado no papel
-    if user.role.value == 'user':
-        # Usuários comuns veem apenas seus materiais
-        query = query.filter_by(usuario_id=user.id)
-    # Admins e Supervisores veem todos os materiais
+    query = escopo_materiais(query, user)
     
     if categoria:
         query = query.filter_by(categoria=categoria)
     if subcategoria:
         query = query.filter_by(subcategoria=subcategoria)
+    if request.args.get('disponivel', '').lower() == 'true':
+        # Apenas materiais com saldo livre (não reservado)
+        query = query.filter(Material.disponivel > 0)
+    
+    # Filtrar por status de estoque no banco (mesmas regras de get_status_estoque)
+    if status == 'sem_estoque':
+        query = query.filter(Material.quantidade <= 0)
+    elif status == 'estoque_baixo':
+        query = query.filter(Material.quantidade > 0, Material.quantidade <= Material.quantidade_minima)
+    elif status == 'estoque_ok':
+        query = query.filter(Material.quantidade > Material.quantidade_minima)
+    elif status:
+        return jsonify([])
     
     materiais = query.all()
+    # Proprietários carregados de uma vez
+    usuarios = _carregar_usuarios(m.usuario_id for m in materiais)
     
-    # Filtrar por status de estoque se especificado
-    if status:
-        materiais = [m for m in materiais if m.get_status_estoque() == status]
+    return jsonify([material.to_dict(usuarios) for material in materiais])
+
+@material_bp.route('/alertas', methods=['GET'])
+@login_required
+@conditional_get('material')
+def get_alertas():
+    """Listar materiais em alerta de estoque baixo"""
+    
+    user = principal_atual()
+    
+    # Consulta pelo índice de alerta_estoque em vez de varrer a tabela
+    query = Material.query.filter(Material.alerta_estoque == True, Material.ativo == True)
+    query = escopo_materiais(query, user)
+    
+    materiais = query.order_by((Material.quantidade - Material.quantidade_minima).asc(), Material.nome).all()
     
-    return jsonify([material.to_dict() for material in materiais])
+    # Pré-carregar os proprietários
+    usuarios = _carregar_usuarios(m.usuario_id for m in materiais)
+    
+    return jsonify({
+        'alertas': [material.to_dict(usuarios) for material in materiais],
+        'total': len(materiais)
+    })
+
+@material_bp.route('/materiais/search', methods=['GET'])
+@login_required
+@conditional_get('material')
+def search_materiais():
+    """Buscar materiais por nome, descrição, códigos ou fornecedor"""
+    from src.utils.search import buscar_materiais
+    
+    user = principal_atual()
+    
+    consulta = request.args.get('q', '').strip()
+    if not consulta:
+        return jsonify({'error': 'Parâmetro q é obrigatório'}), 400
+    
+    limite = max(1, min(request.args.get('limit', 20, type=int), 100))
+    
+    # Usuários comuns buscam apenas entre seus materiais
+    usuario_id = user.id if user.is_user() else None
+    ids = buscar_materiais(consulta, usuario_id=usuario_id, limite=limite)
+    if not ids:
+        return jsonify([])
+    
+    materiais = {m.id: m for m in Material.query.filter(Material.id.in_(ids)).all()}
+    
+    # Carregar os proprietários de uma vez
+    usuarios = _carregar_usuarios(m.usuario_id for m in materiais.values())
+    
+    return jsonify([materiais[i].to_dict(usuarios) for i in ids if i in materiais])
+
+@material_bp.route('/materiais/autocomplete', methods=['GET'])
+@login_required
+def autocomplete_materiais():
+    """Sugestões de materiais pelo início do nome ou do código interno"""
+    from flask import current_app
+    from src.utils.autocomplete import obter_indice
+    
+    prefixo = request.args.get('prefix', '')
+    limite = max(1, min(request.args.get('limit', 10, type=int), 50))
+    
+    # Usuários comuns recebem apenas sugestões dos seus materiais
+    user = principal_atual()
+    usuario_id = user.id if user.is_user() else None
+    
+    indice = obter_indice(current_app.config.get('AUTOCOMPLETE_REFRESH_SECONDS', 5))
+    return jsonify(indice.buscar(prefixo, limite=limite, usuario_id=usuario_id))
 
 @material_bp.route('/materiais', methods=['POST'])
 @login_required
 @admin_required
 def create_material():
     """Criar um novo material"""
-    from src.models.auth import User
     from flask import g
     
     data = request.json
@@ -75,16 +177,14 @@ def create_material():
         return jsonify({'error': 'Categoria é obrigatória'}), 400
     
     # Obter usuário atual
-    user = User.query.get(g.user_id)
-    if not user:
-        return jsonify({'error': 'Usuário não encontrado'}), 404
+    user = principal_atual()
     
     # Determinar o proprietário do material
     usuario_id = data.get('usuario_id')
-    if user.role.value == 'user':
+    if user.is_user():
         # Usuários comuns só podem criar materiais para si mesmos
         usuario_id = user.id
-    elif user.role.value in ['supervisor', 'admin'] and not usuario_id:
+    elif not usuario_id:
         # Supervisores e admins podem criar materiais para outros usuários
         # Se não especificado, atribuir ao usuário atual
         usuario_id = user.id
@@ -130,8 +230,45 @@ def create_material():
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+@material_bp.route('/materiais/import', methods=['POST'])
+@login_required
+@admin_required
+def importar_materiais_csv():
+    """Importar materiais de um CSV (upsert por codigo_interno)
+    
+    Aceita multipart com o campo "arquivo" ou o CSV direto no corpo
+    (Content-Type: text/csv). Use ?dry_run=true para apenas validar.
+    """
+    
+    if 'arquivo' in request.files:
+        arquivo = request.files['arquivo'].stream
+    elif request.mimetype == 'text/csv':
+        arquivo = request.stream
+    else:
+        return jsonify({'error': 'Envie o CSV no campo "arquivo" ou com Content-Type text/csv'}), 400
+    
+    separador = request.args.get('separador')
+    if separador not in (None, ',', ';'):
+        return jsonify({'error': "separador deve ser ',' ou ';'"}), 400
+    dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+    
+    user = principal_atual()
+    try:
+        leitor = abrir_csv(arquivo, separador)
+        if 'codigo_interno' not in (leitor.fieldnames or []):
+            return jsonify({'error': 'O CSV precisa da coluna codigo_interno'}), 400
+        relatorio = importar_materiais(leitor, usuario_id=user.id, responsavel=user.nome_completo, dry_run=dry_run)
+        return jsonify(relatorio), 200
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'O arquivo deve estar em UTF-8'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @material_bp.route('/materiais/<int:material_id>', methods=['GET'])
 @login_required
+@conditional_get('material')
 def get_material(material_id):
     """Obter um material específico"""
     material = Material.query.get_or_404(material_id)
@@ -171,6 +308,10 @@ def update_material(material_id):
     if nova_quantidade is not None:
         # Converter para int para evitar erro de tipo
         nova_quantidade = int(nova_quantidade)
+        reservado = material.quantidade_reservada or 0
+        if nova_quantidade < reservado:
+            db.session.rollback()
+            return jsonify({'error': f'Quantidade menor que o reservado para atividades ({reservado})'}), 400
         if nova_quantidade != quantidade_anterior:
             material.quantidade = nova_quantidade
             
@@ -218,31 +359,57 @@ def delete_material(material_id):
 
 @material_bp.route('/materiais/<int:material_id>/movimentacoes', methods=['GET'])
 @login_required
+@conditional_get('material', 'movimentacao_estoque')
 def get_movimentacoes_material(material_id):
     """Obter histórico de movimentações de um material"""
     material = Material.query.get_or_404(material_id)
     movimentacoes = MovimentacaoEstoque.query.filter_by(material_id=material_id).order_by(MovimentacaoEstoque.data_movimentacao.desc()).all()
-    return jsonify([mov.to_dict() for mov in movimentacoes])
+    responsaveis = _carregar_usuarios(mov.responsavel_id for mov in movimentacoes)
+    return jsonify([mov.to_dict(responsaveis) for mov in movimentacoes])
 
-@material_bp.route('/materiais/<int:material_id>/movimentacao', methods=['POST'])
+@material_bp.route('/materiais/<int:material_id>/previsao', methods=['GET'])
+@login_required
+def get_previsao_material(material_id):
+    """Previsão de consumo, dias até a ruptura e sugestão de reposição"""
+    material = Material.query.get_or_404(material_id)
+    return jsonify(previsao_material(material))
+
+@material_bp.route('/reposicao', methods=['GET'])
 @login_required
 @supervisor_required
-def criar_movimentacao(material_id):
-    """Criar uma nova movimentação de estoque"""
-    import json
-    from src.models.auth import User
+def get_reposicao():
+    """Relatório de reposição: materiais que atingiram o ponto de reposição"""
+    query = Material.query.filter_by(ativo=True)
+    categoria = request.args.get('categoria')
+    if categoria:
+        query = query.filter_by(categoria=categoria)
     
-    material = Material.query.get_or_404(material_id)
-    data = request.json
+    itens = previsoes(query.all())
+    if request.args.get('todos', 'false').lower() != 'true':
+        itens = [item for item in itens if item['repor']]
+    
+    # Mais urgentes primeiro; sem consumo registrado vão para o fim
+    itens.sort(key=lambda item: (not item['repor'], item['dias_ate_ruptura'] is None, item['dias_ate_ruptura'] or 0))
     
+    return jsonify({
+        'itens': itens,
+        'total': len(itens),
+        'gerado_em': datetime.utcnow().isoformat()
+    })
+
+def registrar_movimentacao(material, data):
+    """Valida e aplica uma movimentação de estoque (sem commit)
+    
+    Retorna (dados_resposta, status_http).
+    """
     tipo = data.get('tipo_movimentacao')
     quantidade = data.get('quantidade', 0)
     
     if not tipo or tipo not in ['entrada', 'saida']:
-        return jsonify({'error': 'Tipo de movimentação inválido'}), 400
+        return {'error': 'Tipo de movimentação inválido'}, 400
     
     if quantidade <= 0:
-        return jsonify({'error': 'Quantidade deve ser maior que zero'}), 400
+        return {'error': 'Quantidade deve ser maior que zero'}, 400
     
     quantidade_anterior = material.quantidade
     
@@ -250,8 +417,9 @@ def criar_movimentacao(material_id):
         nova_quantidade = quantidade_anterior + quantidade
     else:  # saida
         nova_quantidade = quantidade_anterior - quantidade
-        if nova_quantidade < 0:
-            return jsonify({'error': 'Quantidade insuficiente em estoque'}), 400
+        # O saldo reservado para atividades abertas não pode ser retirado
+        if quantidade > material.disponivel:
+            return {'error': f'Quantidade insuficiente em estoque. Disponível: {material.disponivel}'}, 400
     
     # Atualizar quantidade do material
     material.quantidade = nova_quantidade
@@ -263,7 +431,7 @@ def criar_movimentacao(material_id):
     
     # Criar movimentação
     movimentacao = MovimentacaoEstoque(
-        material_id=material_id,
+        material_id=material.id,
         tipo_movimentacao=tipo,
         quantidade=quantidade,
         quantidade_anterior=quantidade_anterior,
@@ -274,16 +442,34 @@ def criar_movimentacao(material_id):
         imagens=imagens_json
     )
     
+    db.session.add(movimentacao)
+    db.session.flush()
+    return movimentacao.to_dict(), 201
+
+@material_bp.route('/materiais/<int:material_id>/movimentacao', methods=['POST'])
+@login_required
+@supervisor_required
+@idempotent
+def criar_movimentacao(material_id):
+    """Criar uma nova movimentação de estoque"""
+    material = Material.query.get_or_404(material_id)
+    data = request.json
+    
     try:
-        db.session.add(movimentacao)
+        resultado, status = registrar_movimentacao(material, data)
+        if status >= 400:
+            db.session.rollback()
+            return jsonify(resultado), status
+        
         db.session.commit()
-        return jsonify(movimentacao.to_dict()), 201
+        return jsonify(resultado), status
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
 @material_bp.route('/categorias', methods=['GET'])
 @login_required
+@conditional_get('material')
 def get_categorias():
     """Obter lista de categorias disponíveis"""
     categorias = db.session.query(Material.categoria).distinct().filter_by(ativo=True).all()
@@ -291,6 +477,7 @@ def get_categorias():
 
 @material_bp.route('/subcategorias', methods=['GET'])
 @login_required
+@conditional_get('material')
 def get_subcategorias():
     """Obter lista de subcategorias disponíveis"""
     categoria = request.args.get('categoria')
@@ -304,6 +491,7 @@ def get_subcategorias():
 
 @material_bp.route('/usuarios', methods=['GET'])
 @login_required
+@conditional_get('users')
 def get_usuarios():
     """Obter lista de usuários para seleção de responsável"""
     from src.models.auth import User
@@ -344,6 +532,7 @@ def upload_image():
     # Salvar arquivo
     file_path = os.path.join(upload_dir, unique_filename)
     file.save(file_path)
+    registrar_upload(os.path.getsize(file_path))
     
     return jsonify({
         'filename': unique_filename,
@@ -358,6 +547,7 @@ def uploaded_file(filename):
 
 @material_bp.route('/movimentacoes/<int:movimentacao_id>/pdf', methods=['GET'])
 @login_required
+@medir_pdf('movimentacao')
 def gerar_pdf_movimentacao(movimentacao_id):
     """Gerar PDF da movimentação"""
     movimentacao = MovimentacaoEstoque.query.get_or_404(movimentacao_id)
@@ -504,55 +694,117 @@ def gerar_pdf_movimentacao(movimentacao_id):
 
 # ==================== ROTAS DE ATIVIDADES ====================
 
+ATIVIDADE_SORT_FIELDS = ('data_criacao', 'data_limite', 'data_conclusao', 'status', 'titulo')
+
+def parse_data_filtro(valor, fim=False):
+    """Converte filtro de data; 'AAAA-MM-DD' em data_fim inclui o dia inteiro"""
+    if not valor:
+        return None
+    data = datetime.fromisoformat(valor)
+    if fim and len(valor) == 10:
+        data += timedelta(days=1)
+    return data
+
 @material_bp.route('/atividades', methods=['GET'])
 @login_required
+@conditional_get('atividade', 'material')
 def get_atividades():
     """Listar atividades baseado no papel do usuário"""
     from src.models.auth import User
-    from flask import g
     
-    user = User.query.get(g.user_id)
-    if not user:
-        return jsonify({'error': 'Usuário não encontrado'}), 404
+    user = principal_atual()
+    
+    # Base query: admins veem todas, supervisores as que criaram e usuários as atribuídas a eles
+    query = escopo_atividades(Atividade.query, user)
     
+    # Filtros (dentro do escopo do usuário)
     status = request.args.get('status')
+    if status:
+        status_list = [s.strip() for s in status.split(',') if s.strip()]
+        query = query.filter(Atividade.status.in_(status_list))
     
-    # Base query
-    if user.role.value == 'admin':
-        # Admins veem todas as atividades
-        query = Atividade.query
-    elif user.role.value == 'supervisor':
-        # Supervisores veem atividades que criaram
-        query = Atividade.query.filter_by(supervisor_id=user.id)
+    for campo in ('usuario_id', 'supervisor_id'):
+        valor = request.args.get(campo)
+        if valor:
+            try:
+                query = query.filter(getattr(Atividade, campo) == int(valor))
+            except ValueError:
+                return jsonify({'error': f'{campo} inválido'}), 400
+    
+    try:
+        data_inicio = parse_data_filtro(request.args.get('data_inicio'))
+        data_fim = parse_data_filtro(request.args.get('data_fim'), fim=True)
+    except ValueError:
+        return jsonify({'error': 'Data inválida. Use o formato AAAA-MM-DD ou ISO 8601'}), 400
+    if data_inicio:
+        query = query.filter(Atividade.data_criacao >= data_inicio)
+    if data_fim:
+        query = query.filter(Atividade.data_criacao < data_fim)
+    
+    # Ordenação
+    sort = request.args.get('sort', 'data_criacao')
+    if sort not in ATIVIDADE_SORT_FIELDS:
+        return jsonify({'error': f"sort deve ser um de: {', '.join(ATIVIDADE_SORT_FIELDS)}"}), 400
+    order = request.args.get('order', 'desc')
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': "order deve ser 'asc' ou 'desc'"}), 400
+    coluna = getattr(Atividade, sort)
+    if order == 'desc':
+        query = query.order_by(coluna.desc(), Atividade.id.desc())
     else:
-        # Usuários comuns veem atividades atribuídas a eles
-        query = Atividade.query.filter_by(usuario_id=user.id)
+        query = query.order_by(coluna.asc(), Atividade.id.asc())
+    
+    # Carregar usuário, supervisor e material na mesma consulta (evita N+1 no to_dict)
+    resumo = request.args.get('fields') == 'summary'
+    if resumo:
+        query = query.options(
+            joinedload(Atividade.usuario).load_only(User.id, User.nome_completo),
+            joinedload(Atividade.supervisor).load_only(User.id, User.nome_completo),
+            joinedload(Atividade.material).load_only(Material.id, Material.nome),
+            defer(Atividade.descricao),
+            defer(Atividade.observacoes),
+            defer(Atividade.descricao_servico),
+            defer(Atividade.imagens_conclusao)
+        )
+    else:
+        query = query.options(
+            joinedload(Atividade.usuario),
+            joinedload(Atividade.supervisor),
+            joinedload(Atividade.material)
+        )
+    serializar = Atividade.to_summary_dict if resumo else Atividade.to_dict
     
-    if status:
-        query = query.filter_by(status=status)
+    # Sem page/per_page mantém a resposta antiga (lista completa)
+    if 'page' not in request.args and 'per_page' not in request.args:
+        return jsonify([serializar(atividade) for atividade in query.all()])
+    
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 50)), 1), 200)
+    except ValueError:
+        return jsonify({'error': 'page e per_page devem ser números inteiros'}), 400
     
-    atividades = query.order_by(Atividade.data_criacao.desc()).all()
-    return jsonify([atividade.to_dict() for atividade in atividades])
+    paginacao = query.paginate(page=page, per_page=per_page, error_out=False)
+    return jsonify({
+        'atividades': [serializar(atividade) for atividade in paginacao.items],
+        'total': paginacao.total,
+        'page': page,
+        'per_page': per_page,
+        'pages': paginacao.pages
+    })
 
 @material_bp.route('/atividades/<int:atividade_id>', methods=['GET'])
 @login_required
+@conditional_get('atividade', 'material')
 def get_atividade(atividade_id):
     """Obter uma atividade específica"""
-    from src.models.auth import User
-    from flask import g
     
-    user = User.query.get(g.user_id)
+    user = principal_atual()
     atividade = Atividade.query.get_or_404(atividade_id)
     
     # Verificar se o usuário pode acessar esta atividade
-    if user.role.value == 'admin':
-        pass  # Admins podem ver todas as atividades
-    elif user.role.value == 'supervisor':
-        if atividade.supervisor_id != user.id:
-            return jsonify({'error': 'Acesso negado'}), 403
-    else:
-        if atividade.usuario_id != user.id:
-            return jsonify({'error': 'Acesso negado'}), 403
+    if not pode_acessar_atividade(user, atividade):
+        return jsonify({'error': 'Acesso negado'}), 403
     
     return jsonify(atividade.to_dict())
 
@@ -577,6 +829,10 @@ def create_atividade():
     if not usuario or usuario.role.value != 'user':
         return jsonify({'error': 'Usuário inválido ou não é um usuário comum'}), 400
     
+    quantidade = _quantidade_necessaria(data.get('quantidade_necessaria'))
+    if quantidade is None:
+        return jsonify({'error': 'quantidade_necessaria deve ser um inteiro positivo'}), 400
+    
     # Verificar material apenas se fornecido
     material = None
     if data.get('material_id'):
@@ -584,9 +840,9 @@ def create_atividade():
         if not material:
             return jsonify({'error': 'Material não encontrado'}), 404
         
-        # Verificar se há estoque suficiente apenas se quantidade for fornecida
-        if data.get('quantidade_necessaria') and material.quantidade < data['quantidade_necessaria']:
-            return jsonify({'error': 'Estoque insuficiente'}), 400
+        # Verificar se há saldo disponível (não reservado) apenas se quantidade for fornecida
+        if quantidade and material.disponivel < quantidade:
+            return jsonify({'error': f'Estoque insuficiente. Disponível: {material.disponivel}'}), 400
     
     atividade = Atividade(
         titulo=data['titulo'],
@@ -594,10 +850,15 @@ def create_atividade():
         usuario_id=data['usuario_id'],
         supervisor_id=g.user_id,
         material_id=data.get('material_id'),  # Opcional
-        quantidade_necessaria=data.get('quantidade_necessaria', 0),  # Opcional, padrão 0
+        quantidade_necessaria=quantidade,  # Opcional, padrão 0
         data_limite=datetime.fromisoformat(data['data_limite']) if data.get('data_limite') else None,
         observacoes=data.get('observacoes')
     )
+    try:
+        reservas.reservar(atividade, material, quantidade)
+    except reservas.EstoqueInsuficiente as e:
+        db.session.rollback()
+        return jsonify({'error': f'Estoque insuficiente. Disponível: {e.material.disponivel}'}), 400
     
     try:
         db.session.add(atividade)
@@ -612,27 +873,163 @@ def create_atividade():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@material_bp.route('/atividades/<int:atividade_id>/concluir', methods=['POST'])
+ATIVIDADES_BULK_MAX = 500
+
+@material_bp.route('/atividades/bulk', methods=['POST'])
 @login_required
-def concluir_atividade(atividade_id):
-    """Concluir atividade (usuário responsável)"""
+@supervisor_required
+@idempotent
+def create_atividades_bulk():
+    """Criar várias atividades de uma vez (apenas supervisores)
+    
+    Corpo: {"padrao": {...campos comuns...}, "atividades": [{...}, ...]}.
+    Cada item herda os campos de "padrao". Tudo ou nada: se algum item
+    for inválido nenhuma atividade é criada.
+    """
     from src.models.auth import User
-    from src.models.material import MaterialUsado
-    from flask import g
-    import json
+    from src.routes.notifications import build_activity_assigned_notification
     
-    user = User.query.get(g.user_id)
-    atividade = Atividade.query.get_or_404(atividade_id)
     data = request.json or {}
+    padrao = data.get('padrao') or {}
+    itens = data.get('atividades')
+    if not isinstance(itens, list) or not itens:
+        return jsonify({'error': 'Informe a lista de atividades'}), 400
+    if len(itens) > ATIVIDADES_BULK_MAX:
+        return jsonify({'error': f'Máximo de {ATIVIDADES_BULK_MAX} atividades por requisição'}), 400
+    
+    itens = [{**padrao, **(item if isinstance(item, dict) else {})} for item in itens]
+    for item in itens:
+        for campo in ('usuario_id', 'material_id'):
+            try:
+                item[campo] = int(item[campo]) if item.get(campo) else None
+            except (TypeError, ValueError):
+                item[campo] = -1  # reportado como inválido/não encontrado abaixo
+    
+    # Uma consulta para todos os usuários e outra para todos os materiais
+    usuario_ids = {item['usuario_id'] for item in itens if item['usuario_id']}
+    material_ids = {item['material_id'] for item in itens if item['material_id']}
+    usuarios = {u.id: u for u in User.query.filter(User.id.in_(usuario_ids)).all()} if usuario_ids else {}
+    materiais = {m.id: m for m in Material.query.filter(Material.id.in_(material_ids)).all()} if material_ids else {}
+    
+    erros = []
+    atividades = []
+    reservando = []
+    pendente = {}  # reservas dos itens anteriores do lote, por material
+    for indice, item in enumerate(itens):
+        if not item.get('titulo'):
+            erros.append({'indice': indice, 'error': 'Título é obrigatório'})
+            continue
+        if not item.get('usuario_id'):
+            erros.append({'indice': indice, 'error': 'Usuário responsável é obrigatório'})
+            continue
+        
+        usuario = usuarios.get(item['usuario_id'])
+        if not usuario or usuario.role.value != 'user':
+            erros.append({'indice': indice, 'error': 'Usuário inválido ou não é um usuário comum'})
+            continue
+        
+        quantidade = _quantidade_necessaria(item.get('quantidade_necessaria'))
+        if quantidade is None:
+            erros.append({'indice': indice, 'error': 'quantidade_necessaria deve ser um inteiro positivo'})
+            continue
+        if item.get('material_id'):
+            material = materiais.get(item['material_id'])
+            if not material:
+                erros.append({'indice': indice, 'error': 'Material não encontrado'})
+                continue
+            disponivel = material.disponivel - pendente.get(material.id, 0)
+            if quantidade and disponivel < quantidade:
+                erros.append({'indice': indice, 'error': f'Estoque insuficiente. Disponível: {disponivel}'})
+                continue
+            pendente[material.id] = pendente.get(material.id, 0) + quantidade
+        
+        try:
+            data_limite = datetime.fromisoformat(item['data_limite']) if item.get('data_limite') else None
+        except (TypeError, ValueError):
+            erros.append({'indice': indice, 'error': 'data_limite inválida'})
+            continue
+        
+        atividade = Atividade(
+            titulo=item['titulo'],
+            descricao=item.get('descricao'),
+            usuario_id=item['usuario_id'],
+            supervisor_id=g.user_id,
+            material_id=item.get('material_id'),
+            quantidade_necessaria=quantidade,
+            data_limite=data_limite,
+            observacoes=item.get('observacoes'),
+            endereco=item.get('endereco'),
+            usuario=usuario
+        )
+        reservando.append((atividade, materiais.get(item['material_id']), quantidade))
+        atividades.append(atividade)
+    
+    if erros:
+        # Descarta as atividades já montadas (a sessão não pode ser gravada)
+        db.session.rollback()
+        return jsonify({'error': 'Nenhuma atividade foi criada', 'erros': erros}), 400
+    
+    try:
+        reservas.reservar_lote(reservando)
+    except reservas.EstoqueInsuficiente as e:
+        db.session.rollback()
+        return jsonify({'error': f'Estoque insuficiente de {e.material.nome}. Disponível: {e.material.disponivel}'}), 400
     
+    try:
+        # Atividades e notificações na mesma transação
+        db.session.add_all(atividades)
+        db.session.flush()
+        notificacoes = [build_activity_assigned_notification(a) for a in atividades]
+        db.session.add_all([n for n in notificacoes if n])
+        ids = [a.id for a in atividades]  # antes do commit, que expira os objetos
+        db.session.commit()
+        
+        return jsonify({'ids': ids, 'total': len(ids)}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def processar_conclusao(user, atividade, data):
+    """Valida e aplica a conclusão de uma atividade (sem commit)
+    
+    Retorna (dados_resposta, status_http).
+    """
     # Verificar se o usuário pode concluir esta atividade
-    if user.role.value == 'user' and atividade.usuario_id != user.id:
-        return jsonify({'error': 'Você não pode concluir esta atividade'}), 403
-    elif user.role.value not in ['admin', 'supervisor'] and atividade.usuario_id != user.id:
-        return jsonify({'error': 'Acesso negado'}), 403
+    if user.is_user() and atividade.usuario_id != user.id:
+        return {'error': 'Você não pode concluir esta atividade'}, 403
     
     if atividade.status != 'pendente':
-        return jsonify({'error': 'Atividade já foi processada'}), 400
+        return {'error': 'Atividade já foi processada'}, 400
+    
+    # Agregar quantidades por material (o mesmo material pode vir repetido)
+    materiais_usados = data.get('materiais_usados', [])
+    consumo = {}
+    for material_data in materiais_usados:
+        material_id = material_data.get('material_id')
+        quantidade_usada = material_data.get('quantidade_usada', 0)
+        
+        if not material_id or quantidade_usada <= 0:
+            continue
+        try:
+            material_id = int(material_id)
+        except (TypeError, ValueError):
+            return {'error': f'Material ID {material_id} não encontrado'}, 404
+        consumo[material_id] = consumo.get(material_id, 0) + quantidade_usada
+    
+    # Carregar todos os materiais de uma vez e validar antes de alterar qualquer coisa
+    materiais = {}
+    if consumo:
+        materiais = {m.id: m for m in Material.query.filter(Material.id.in_(consumo)).all()}
+    reservado = reservas.reservado_por_material(atividade)
+    for material_id, quantidade_usada in consumo.items():
+        material = materiais.get(material_id)
+        if not material:
+            return {'error': f'Material ID {material_id} não encontrado'}, 404
+        
+        # Verificar se há estoque suficiente: saldo livre mais o que a própria atividade reservou
+        disponivel = material.disponivel + reservado.get(material_id, 0)
+        if disponivel < quantidade_usada:
+            return {'error': f'Estoque insuficiente de {material.nome}. Disponível: {disponivel}, Necessário: {quantidade_usada}'}, 400
     
     # Atualizar status da atividade
     atividade.status = 'concluida'
@@ -648,33 +1045,17 @@ def concluir_atividade(atividade_id):
     atividade.longitude = data.get('longitude')
     atividade.endereco = data.get('endereco', '')
     
-    # Processar materiais usados
-    materiais_usados = data.get('materiais_usados', [])
+    # Encerrar as reservas e aplicar as baixas de estoque
+    reservas.consumir(atividade)
     movimentacoes_criadas = []
-    
-    for material_data in materiais_usados:
-        material_id = material_data.get('material_id')
-        quantidade_usada = material_data.get('quantidade_usada', 0)
-        
-        if not material_id or quantidade_usada <= 0:
-            continue
-            
-        # Buscar o material
-        material = Material.query.get(material_id)
-        if not material:
-            return jsonify({'error': f'Material ID {material_id} não encontrado'}), 404
-        
-        # Verificar se há estoque suficiente
-        if material.quantidade < quantidade_usada:
-            return jsonify({'error': f'Estoque insuficiente de {material.nome}. Disponível: {material.quantidade}, Necessário: {quantidade_usada}'}), 400
-        
-        # Salvar quantidade anterior para a movimentação
+    for material_id, quantidade_usada in consumo.items():
+        material = materiais[material_id]
         quantidade_anterior = material.quantidade
         quantidade_atual = quantidade_anterior - quantidade_usada
         
         # Criar movimentação de saída
-        movimentacao = MovimentacaoEstoque(
-            material_id=material_id,
+        movimentacoes_criadas.append(MovimentacaoEstoque(
+            material=material,
             tipo_movimentacao='saida',
             quantidade=quantidade_usada,
             quantidade_anterior=quantidade_anterior,
@@ -682,40 +1063,55 @@ def concluir_atividade(atividade_id):
             motivo=f'Atividade concluída: {atividade.titulo}',
             responsavel=user.nome_completo,
             responsavel_id=user.id
-        )
-        
-        # Criar registro de material usado
-        material_usado = MaterialUsado(
-            atividade_id=atividade_id,
-            material_id=material_id,
-            quantidade_usada=quantidade_usada
-        )
+        ))
         
         # Atualizar estoque do material
         material.quantidade = quantidade_atual
-        
-        # Adicionar ao session
-        db.session.add(movimentacao)
-        db.session.add(material_usado)
-        movimentacoes_criadas.append(movimentacao)
+    
+    db.session.add_all(movimentacoes_criadas)
+    
+    # Registros de material usado não precisam ser carregados de volta: inserção em lote
+    if consumo:
+        db.session.execute(insert(MaterialUsado), [
+            {'atividade_id': atividade.id, 'material_id': material_id, 'quantidade_usada': quantidade_usada}
+            for material_id, quantidade_usada in consumo.items()
+        ])
+    
+    db.session.flush()
+    
+    response_data = {
+        'message': 'Atividade concluída com sucesso',
+        'atividade': atividade.to_dict(),
+        'materiais_usados': len(materiais_usados),
+        'movimentacoes': [mov.to_dict() for mov in movimentacoes_criadas]
+    }
+    
+    if movimentacoes_criadas:
+        materiais_nomes = [mov.material.nome for mov in movimentacoes_criadas]
+        response_data['message'] += f'. Materiais retirados do estoque: {", ".join(materiais_nomes)}.'
+    else:
+        response_data['message'] += ' Nenhum material foi retirado do estoque.'
+    
+    return response_data, 200
+
+@material_bp.route('/atividades/<int:atividade_id>/concluir', methods=['POST'])
+@login_required
+@idempotent
+def concluir_atividade(atividade_id):
+    """Concluir atividade (usuário responsável)"""
+    
+    user = principal_atual()
+    atividade = Atividade.query.get_or_404(atividade_id)
+    data = request.json or {}
     
     try:
-        db.session.commit()
-        
-        response_data = {
-            'message': 'Atividade concluída com sucesso',
-            'atividade': atividade.to_dict(),
-            'materiais_usados': len(materiais_usados),
-            'movimentacoes': [mov.to_dict() for mov in movimentacoes_criadas]
-        }
+        resultado, status = processar_conclusao(user, atividade, data)
+        if status >= 400:
+            db.session.rollback()
+            return jsonify(resultado), status
         
-        if movimentacoes_criadas:
-            materiais_nomes = [mov.material.nome for mov in movimentacoes_criadas]
-            response_data['message'] += f'. Materiais retirados do estoque: {", ".join(materiais_nomes)}.'
-        else:
-            response_data['message'] += ' Nenhum material foi retirado do estoque.'
-        
-        return jsonify(response_data)
+        db.session.commit()
+        return jsonify(resultado), status
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -743,7 +1139,22 @@ def update_atividade(atividade_id):
     if 'descricao' in data:
         atividade.descricao = data['descricao']
     if 'quantidade_necessaria' in data:
-        atividade.quantidade_necessaria = data['quantidade_necessaria']
+        quantidade = _quantidade_necessaria(data['quantidade_necessaria'])
+        if quantidade is None:
+            return jsonify({'error': 'quantidade_necessaria deve ser um inteiro positivo'}), 400
+        # Refazer a reserva com a nova quantidade
+        material = atividade.material
+        if material and quantidade:
+            disponivel = material.disponivel + reservas.reservado_por_material(atividade).get(material.id, 0)
+            if disponivel < quantidade:
+                return jsonify({'error': f'Estoque insuficiente. Disponível: {disponivel}'}), 400
+        reservas.liberar(atividade)
+        try:
+            reservas.reservar(atividade, material, quantidade)
+        except reservas.EstoqueInsuficiente as e:
+            db.session.rollback()
+            return jsonify({'error': f'Estoque insuficiente. Disponível: {e.material.disponivel}'}), 400
+        atividade.quantidade_necessaria = quantidade
     if 'data_limite' in data:
         atividade.data_limite = datetime.fromisoformat(data['data_limite']) if data['data_limite'] else None
     if 'observacoes' in data:
@@ -778,6 +1189,7 @@ def delete_atividade(atividade_id):
         return jsonify({'error': 'Apenas atividades pendentes podem ser deletadas'}), 400
     
     try:
+        reservas.liberar(atividade)
         db.session.delete(atividade)
         db.session.commit()
         return jsonify({'message': 'Atividade deletada com sucesso'})
@@ -785,11 +1197,41 @@ def delete_atividade(atividade_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@material_bp.route('/atividades/<int:atividade_id>/cancelar', methods=['POST'])
+@login_required
+@supervisor_required
+def cancelar_atividade(atividade_id):
+    """Cancelar atividade e liberar o estoque reservado"""
+    
+    atividade = Atividade.query.get_or_404(atividade_id)
+    user = principal_atual()
+    
+    # Supervisores cancelam apenas as atividades que criaram
+    if not user.is_admin() and atividade.supervisor_id != user.id:
+        return jsonify({'error': 'Você não pode cancelar esta atividade'}), 403
+    
+    if atividade.status not in ('pendente', 'em_andamento'):
+        return jsonify({'error': 'Apenas atividades pendentes ou em andamento podem ser canceladas'}), 400
+    
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        reservas.liberar(atividade)
+        atividade.status = 'cancelada'
+        if data.get('motivo'):
+            atividade.observacoes = f"{atividade.observacoes}\n" if atividade.observacoes else ''
+            atividade.observacoes += f"Cancelada: {data['motivo']}"
+        db.session.commit()
+        return jsonify(atividade.to_dict())
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @material_bp.route('/relatorios/mensal', methods=['GET'])
 @login_required
+@medir_pdf('relatorio_mensal')
 def relatorio_mensal():
     """Gerar relatório mensal para admins"""
-    from src.models.auth import User
     from src.models.material import Material, MovimentacaoEstoque, Atividade, MaterialUsado
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -803,8 +1245,8 @@ def relatorio_mensal():
     import json
     
     # Verificar se é admin
-    user = User.query.get(g.user_id)
-    if user.role.value != 'admin':
+    user = principal_atual()
+    if not user.is_admin():
         return jsonify({'error': 'Acesso negado. Apenas administradores podem acessar relatórios mensais.'}), 403
     
     # Obter parâmetros da query
@@ -826,7 +1268,7 @@ def relatorio_mensal():
     
     # Coletar dados
     # Atividades do mês
-    atividades_mes = Atividade.query.filter(
+    atividades_mes = Atividade.query.options(joinedload(Atividade.usuario)).filter(
         Atividade.data_criacao >= data_inicio,
         Atividade.data_criacao <= data_fim
     ).all()
@@ -835,13 +1277,13 @@ def relatorio_mensal():
     atividades_concluidas = [a for a in atividades_mes if a.status == 'concluida']
     
     # Movimentações de estoque
-    movimentacoes_mes = MovimentacaoEstoque.query.filter(
+    movimentacoes_mes = MovimentacaoEstoque.query.options(joinedload(MovimentacaoEstoque.material)).filter(
         MovimentacaoEstoque.data_movimentacao >= data_inicio,
         MovimentacaoEstoque.data_movimentacao <= data_fim
     ).all()
     
     # Materiais mais usados
-    materiais_usados = MaterialUsado.query.join(Atividade).filter(
+    materiais_usados = MaterialUsado.query.join(Atividade).options(joinedload(MaterialUsado.material)).filter(
         Atividade.data_conclusao >= data_inicio,
         Atividade.data_conclusao <= data_fim
     ).all()
@@ -1056,6 +1498,7 @@ def relatorio_mensal():
 
 @material_bp.route('/atividades/<int:atividade_id>/pdf', methods=['GET'])
 @login_required
+@medir_pdf('atividade')
 def gerar_pdf_atividade(atividade_id):
     """Gerar PDF da atividade concluída"""
     from src.models.material import MaterialUsado
@@ -1376,7 +1819,8 @@ def visualizar_imagens_atividade(atividade_id):
     atividade = Atividade.query.get_or_404(atividade_id)
     
     # Verificar se o usuário tem acesso à atividade
-    if request.current_user.role.value == 'user' and atividade.usuario_id != request.current_user.id:
+    user = principal_atual()
+    if user.is_user() and atividade.usuario_id != user.id:
         return jsonify({'error': 'Acesso negado'}), 403
     
     if not atividade.imagens_conclusao:
@@ -1614,21 +2058,14 @@ def serve_uploaded_file(filename):
 @login_required
 def get_dashboard():
     """Obter dados para dashboard baseado no papel do usuário"""
-    from src.models.auth import User
-    from flask import g
     
-    user = User.query.get(g.user_id)
-    if not user:
-        return jsonify({'error': 'Usuário não encontrado'}), 404
+    user = principal_atual()
     
     # Base query para materiais
     materiais_query = Material.query.filter_by(ativo=True)
     
     # Filtrar por usuário baseado no papel
-    if user.role.value == 'user':
-        # Usuários comuns veem apenas seus materiais
-        materiais_query = materiais_query.filter_by(usuario_id=user.id)
-    # Admins e Supervisores veem todos os materiais
+    materiais_query = escopo_materiais(materiais_query, user)
     
     # Estatísticas de materiais
     total_materiais = materiais_query.count()
@@ -1637,20 +2074,20 @@ def get_dashboard():
         Material.quantidade > 0, 
         Material.quantidade <= Material.quantidade_minima
     ).count()
+    # Com estoque físico, mas todo comprometido com reservas de atividades
+    materiais_sem_disponivel = materiais_query.filter(
+        Material.quantidade > 0,
+        Material.disponivel <= 0
+    ).count()
+    materiais_com_reserva = materiais_query.filter(Material.quantidade_reservada > 0).count()
     
-    # Últimas movimentações
-    if user.role.value == 'user':
-        # Usuários comuns veem apenas movimentações de seus materiais
-        ultimas_movimentacoes = MovimentacaoEstoque.query.join(Material).filter(
-            Material.usuario_id == user.id
-        ).order_by(
-            MovimentacaoEstoque.data_movimentacao.desc()
-        ).limit(10).all()
-    else:
-        # Admins e Supervisores veem todas as movimentações
-        ultimas_movimentacoes = MovimentacaoEstoque.query.order_by(
-            MovimentacaoEstoque.data_movimentacao.desc()
-        ).limit(10).all()
+    # Últimas movimentações (usuários comuns veem apenas as de seus materiais)
+    ultimas_movimentacoes = escopo_movimentacoes(MovimentacaoEstoque.query, user).options(
+        joinedload(MovimentacaoEstoque.material)
+    ).order_by(
+        MovimentacaoEstoque.data_movimentacao.desc()
+    ).limit(10).all()
+    responsaveis = _carregar_usuarios(mov.responsavel_id for mov in ultimas_movimentacoes)
     
     # Materiais por categoria
     categorias_count = db.session.query(
@@ -1659,8 +2096,7 @@ def get_dashboard():
     ).filter_by(ativo=True)
     
     # Filtrar categorias por usuário se necessário
-    if user.role.value == 'user':
-        categorias_count = categorias_count.filter_by(usuario_id=user.id)
+    categorias_count = escopo_materiais(categorias_count, user)
     
     categorias_count = categorias_count.group_by(Material.categoria).all()
     
@@ -1668,7 +2104,9 @@ def get_dashboard():
         'total_materiais': total_materiais,
         'materiais_sem_estoque': materiais_sem_estoque,
         'materiais_estoque_baixo': materiais_estoque_baixo,
-        'ultimas_movimentacoes': [mov.to_dict() for mov in ultimas_movimentacoes],
+        'materiais_sem_disponivel': materiais_sem_disponivel,
+        'materiais_com_reserva': materiais_com_reserva,
+        'ultimas_movimentacoes': [mov.to_dict(responsaveis) for mov in ultimas_movimentacoes],
         'materiais_por_categoria': [{'categoria': cat, 'count': count} for cat, count in categorias_count]
     })
 
@@ -1676,21 +2114,16 @@ def get_dashboard():
 @login_required
 def get_dashboard_graficos():
     """Obter dados para gráficos do dashboard baseado no papel do usuário"""
-    from src.models.auth import User
-    from flask import g
     from datetime import datetime, timedelta
     import calendar
     
-    user = User.query.get(g.user_id)
-    if not user:
-        return jsonify({'error': 'Usuário não encontrado'}), 404
+    user = principal_atual()
     
     # Base query para materiais
     materiais_query = Material.query.filter_by(ativo=True)
     
     # Filtrar por usuário baseado no papel
-    if user.role.value == 'user':
-        materiais_query = materiais_query.filter_by(usuario_id=user.id)
+    materiais_query = escopo_materiais(materiais_query, user)
     
     # 1. Gráfico de Materiais por Categoria (Pizza)
     categorias_data = db.session.query(
@@ -1699,8 +2132,7 @@ def get_dashboard_graficos():
         db.func.sum(Material.quantidade).label('total_quantidade')
     ).filter_by(ativo=True)
     
-    if user.role.value == 'user':
-        categorias_data = categorias_data.filter_by(usuario_id=user.id)
+    categorias_data = escopo_materiais(categorias_data, user)
     
     categorias_data = categorias_data.group_by(Material.categoria).all()
     
@@ -1720,10 +2152,7 @@ def get_dashboard_graficos():
         MovimentacaoEstoque.data_movimentacao >= data_inicio
     )
     
-    if user.role.value == 'user':
-        movimentacoes_query = movimentacoes_query.join(Material).filter(
-            Material.usuario_id == user.id
-        )
+    movimentacoes_query = escopo_movimentacoes(movimentacoes_query, user)
     
     movimentacoes_mensais = db.session.query(
         db.func.strftime('%Y-%m', MovimentacaoEstoque.data_movimentacao).label('mes'),
@@ -1734,10 +2163,7 @@ def get_dashboard_graficos():
         MovimentacaoEstoque.data_movimentacao >= data_inicio
     )
     
-    if user.role.value == 'user':
-        movimentacoes_mensais = movimentacoes_mensais.join(Material).filter(
-            Material.usuario_id == user.id
-        )
+    movimentacoes_mensais = escopo_movimentacoes(movimentacoes_mensais, user)
     
     movimentacoes_mensais = movimentacoes_mensais.group_by(
         db.func.strftime('%Y-%m', MovimentacaoEstoque.data_movimentacao),
@@ -1759,17 +2185,7 @@ def get_dashboard_graficos():
         }
     
     # 3. Gráfico de Atividades por Status (Barras)
-    atividades_query = Atividade.query
-    
-    if user.role.value == 'admin':
-        # Admins veem todas as atividades
-        pass
-    elif user.role.value == 'supervisor':
-        # Supervisores veem atividades que criaram
-        atividades_query = atividades_query.filter_by(supervisor_id=user.id)
-    else:
-        # Usuários comuns veem atividades atribuídas a eles
-        atividades_query = atividades_query.filter_by(usuario_id=user.id)
+    atividades_query = escopo_atividades(Atividade.query, user)
     
     atividades_por_status = db.session.query(
         Atividade.status,
@@ -1778,10 +2194,7 @@ def get_dashboard_graficos():
         Atividade.data_criacao >= data_inicio
     )
     
-    if user.role.value == 'supervisor':
-        atividades_por_status = atividades_por_status.filter_by(supervisor_id=user.id)
-    elif user.role.value == 'user':
-        atividades_por_status = atividades_por_status.filter_by(usuario_id=user.id)
+    atividades_por_status = escopo_atividades(atividades_por_status, user)
     
     atividades_por_status = atividades_por_status.group_by(Atividade.status).all()
     
@@ -1820,8 +2233,7 @@ def get_dashboard_graficos():
         Atividade.status == 'concluida'
     )
     
-    if user.role.value == 'user':
-        materiais_mais_usados = materiais_mais_usados.filter(Material.usuario_id == user.id)
+    materiais_mais_usados = escopo_materiais(materiais_mais_usados, user)
     
     materiais_mais_usados = materiais_mais_usados.group_by(
         Material.id, Material.nome
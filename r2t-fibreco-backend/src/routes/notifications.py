@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, request, g
 from src.models.notification import Notification
 from src.models.auth import User, db
 from src.routes.auth import login_required
+from sqlalchemy.orm import joinedload
 import json
 
 notifications_bp = Blueprint('notifications', __name__)
@@ -15,6 +16,7 @@ def get_notifications():
         
         # Buscar notificações não lidas primeiro, depois as lidas
         notifications = Notification.query.filter_by(user_id=user_id)\
+            .options(joinedload(Notification.activity))\
             .order_by(Notification.read.asc(), Notification.created_at.desc())\
             .limit(50).all()
         
@@ -83,18 +85,28 @@ def create_notification(user_id, title, message, notification_type, activity_id=
         print(f"Erro ao criar notificação: {e}")
         return None
 
+def build_activity_assigned_notification(activity):
+    """Monta (sem adicionar à sessão) a notificação de atividade atribuída"""
+    if not (activity.usuario and activity.usuario.role.value == 'user'):
+        return None
+    return Notification(
+        user_id=activity.usuario_id,
+        title="Nova Atividade Atribuída",
+        message=f"Uma nova atividade foi atribuída para você: {activity.titulo}",
+        type='atividade_atribuida',
+        activity_id=activity.id
+    )
+
 def notify_activity_assigned(activity):
     """Notificar quando uma atividade é atribuída a um fibreco"""
-    if activity.usuario and activity.usuario.role.value == 'user':
-        title = "Nova Atividade Atribuída"
-        message = f"Uma nova atividade foi atribuída para você: {activity.titulo}"
-        
+    notification = build_activity_assigned_notification(activity)
+    if notification:
         create_notification(
-            user_id=activity.usuario_id,
-            title=title,
-            message=message,
-            notification_type='atividade_atribuida',
-            activity_id=activity.id
+            user_id=notification.user_id,
+            title=notification.title,
+            message=notification.message,
+            notification_type=notification.type,
+            activity_id=notification.activity_id
         )
 
 def notify_activity_completed(activity):
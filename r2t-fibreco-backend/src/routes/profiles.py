@@ -0,0 +1,41 @@
+import io
+import pstats
+
+from flask import Blueprint, current_app, jsonify, request, send_file
+from src.routes.auth import login_required, admin_required
+from src.utils.profiler import caminho_perfil, listar_perfis
+
+profiles_bp = Blueprint('profiles', __name__)
+
+
+@profiles_bp.route('/profiles', methods=['GET'])
+@login_required
+@admin_required
+def get_profiles():
+    """Listar os perfis gravados mais recentes"""
+    perfis = listar_perfis(current_app.config['PROFILE_DIR'])
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'perfis': perfis[:max(limit, 0)], 'total': len(perfis)})
+
+
+@profiles_bp.route('/profiles/<nome>', methods=['GET'])
+@login_required
+@admin_required
+def get_profile(nome):
+    """Baixar um perfil (pstats) ou ver o resumo em texto com ?formato=texto"""
+    caminho = caminho_perfil(current_app.config['PROFILE_DIR'], nome)
+    if caminho is None:
+        return jsonify({'error': 'Perfil não encontrado'}), 404
+
+    if request.args.get('formato') != 'texto':
+        return send_file(caminho, mimetype='application/octet-stream', as_attachment=True, download_name=nome)
+
+    ordenar = request.args.get('sort', 'cumulative')
+    if ordenar not in ('cumulative', 'tottime', 'calls', 'ncalls'):
+        return jsonify({'error': 'Ordenação inválida'}), 400
+    limit = min(request.args.get('limit', 40, type=int), 500)
+
+    saida = io.StringIO()
+    stats = pstats.Stats(caminho, stream=saida)
+    stats.strip_dirs().sort_stats(ordenar).print_stats(limit)
+    return current_app.response_class(saida.getvalue(), mimetype='text/plain')
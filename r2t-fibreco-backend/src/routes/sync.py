@@ -0,0 +1,197 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy.orm import joinedload
+from src.models.auth import db, User, UserRole
+from src.models.material import Material, Atividade
+from src.models.notification import Notification
+from src.routes.auth import login_required
+from src.routes.material import registrar_movimentacao, processar_conclusao
+from src.models.sync import ChangeLog
+from src.utils.change_log import cursor_atual, menor_cursor, alteracoes_desde, visiveis_antes
+from src.utils.idempotency import buscar_resposta, registrar_resposta
+from src.utils.principal import principal_atual, escopo_materiais, escopo_atividades
+
+sync_bp = Blueprint('sync', __name__)
+
+SYNC_LIMITE_PADRAO = 500
+SYNC_LIMITE_MAXIMO = 5000
+SYNC_MAX_OPERACOES = 200
+
+def _escopo_notificacoes(query, user):
+    return query.filter(Notification.user_id == user.id)
+
+# Mesmas regras dos escopos, aplicadas aos donos anteriores registrados no ChangeLog
+def _historico_materiais(query, user):
+    return query.filter(ChangeLog.usuario_id == user.id) if user.is_user() else query
+
+def _historico_atividades(query, user):
+    if user.is_supervisor():
+        return query.filter(ChangeLog.supervisor_id == user.id)
+    if user.is_user():
+        return query.filter(ChangeLog.usuario_id == user.id)
+    return query
+
+def _historico_notificacoes(query, user):
+    return query.filter(ChangeLog.usuario_id == user.id)
+
+# tabela -> (chave na resposta, modelo, escopo, escopo no histórico, relacionamentos carregados junto)
+ENTIDADES = {
+    'material': ('materiais', Material, escopo_materiais, _historico_materiais, []),
+    'atividade': ('atividades', Atividade, escopo_atividades, _historico_atividades,
+                  [Atividade.material, Atividade.usuario, Atividade.supervisor]),
+    'notifications': ('notifications', Notification, _escopo_notificacoes, _historico_notificacoes,
+                      [Notification.activity]),
+}
+
+def _carregar_proprietarios(materiais):
+    """Carrega de uma vez os proprietários dos materiais; retorna {id: User} para o to_dict()"""
+    ids = {m.usuario_id for m in materiais if m.usuario_id}
+    return {u.id: u for u in User.query.filter(User.id.in_(ids)).all()} if ids else {}
+
+def _carregar(table_name, user, ids=None):
+    _, model, escopo, _, relacionamentos = ENTIDADES[table_name]
+    query = escopo(model.query, user)
+    for relacionamento in relacionamentos:
+        query = query.options(joinedload(relacionamento))
+    if ids is not None:
+        query = query.filter(model.id.in_(ids))
+    elif model is Material:
+        query = query.filter(Material.ativo == True)
+    return query.all()
+
+def _removidos(table_name, user, ids_alterados, linhas, since):
+    """Ids alterados que saíram do escopo do usuário (excluídos ou transferidos)
+
+    Só entram as linhas que o usuário via antes da alteração: ids de outros
+    usuários não são expostos.
+    """
+    historico = ENTIDADES[table_name][3]
+    fora = set(ids_alterados) - {linha.id for linha in linhas}
+    return visiveis_antes(table_name, fora, since, lambda query: historico(query, user))
+
+def _serializar(table_name, linhas, removidos=()):
+    upserts = []
+    inativos = set()
+    usuarios = _carregar_proprietarios(linhas) if table_name == 'material' else None
+    for linha in linhas:
+        # Materiais desativados (soft delete) viram tombstones
+        if table_name == 'material' and not linha.ativo:
+            inativos.add(linha.id)
+            continue
+        upserts.append(linha.to_dict(usuarios) if usuarios is not None else linha.to_dict())
+    return {'upserts': upserts, 'tombstones': sorted(set(removidos) | inativos)}
+
+@sync_bp.route('/sync', methods=['GET'])
+@login_required
+def get_sync():
+    """Retornar materiais, atividades e notificações alterados desde o cursor"""
+    user = principal_atual()
+    
+    since = request.args.get('since', 0, type=int)
+    limite = max(1, min(request.args.get('limit', SYNC_LIMITE_PADRAO, type=int), SYNC_LIMITE_MAXIMO))
+    
+    # Sem cursor (ou cursor anterior ao histórico retido): carga completa
+    if since <= 0 or since < menor_cursor() - 1:
+        cursor = cursor_atual()
+        resposta = {'cursor': cursor, 'has_more': False, 'reset': True}
+        for table_name, (chave, _, _, _, _) in ENTIDADES.items():
+            linhas = _carregar(table_name, user)
+            resposta[chave] = _serializar(table_name, linhas)
+        return jsonify(resposta)
+    
+    alteracoes = alteracoes_desde(since, limite)
+    has_more = len(alteracoes) > limite
+    alteracoes = alteracoes[:limite]
+    
+    ids_por_tabela = {table_name: [] for table_name in ENTIDADES}
+    for table_name, row_id, _ in alteracoes:
+        if table_name in ids_por_tabela:
+            ids_por_tabela[table_name].append(row_id)
+    
+    resposta = {
+        'cursor': alteracoes[-1].seq if alteracoes else since,
+        'has_more': has_more,
+        'reset': False
+    }
+    for table_name, ids in ids_por_tabela.items():
+        chave = ENTIDADES[table_name][0]
+        linhas = _carregar(table_name, user, ids) if ids else []
+        resposta[chave] = _serializar(table_name, linhas, _removidos(table_name, user, ids, linhas, since))
+    
+    return jsonify(resposta)
+
+def _operacao_movimentacao(user, operacao):
+    if not user.has_permission(UserRole.SUPERVISOR):
+        return {'error': 'Acesso negado. Perfil de supervisor ou superior requerido'}, 403
+    material = Material.query.get(operacao.get('material_id'))
+    if not material:
+        return {'error': 'Material não encontrado'}, 404
+    return registrar_movimentacao(material, operacao)
+
+def _operacao_concluir(user, operacao):
+    atividade = Atividade.query.get(operacao.get('atividade_id'))
+    if not atividade:
+        return {'error': 'Atividade não encontrada'}, 404
+    return processar_conclusao(user, atividade, operacao)
+
+OPERACOES = {
+    'movimentacao': _operacao_movimentacao,
+    'concluir': _operacao_concluir,
+}
+
+@sync_bp.route('/sync', methods=['POST'])
+@login_required
+def post_sync():
+    """Aplicar um lote de operações feitas offline, cada uma com sua chave de idempotência"""
+    user = principal_atual()
+    
+    data = request.get_json() or {}
+    operacoes = data.get('operacoes')
+    if not isinstance(operacoes, list):
+        return jsonify({'error': 'Campo operacoes deve ser uma lista'}), 400
+    if len(operacoes) > SYNC_MAX_OPERACOES:
+        return jsonify({'error': f'Máximo de {SYNC_MAX_OPERACOES} operações por lote'}), 400
+    
+    resultados = []
+    try:
+        for operacao in operacoes:
+            chave = operacao.get('chave') if isinstance(operacao, dict) else None
+            tipo = operacao.get('tipo') if isinstance(operacao, dict) else None
+            if not chave:
+                resultados.append({'chave': None, 'tipo': tipo, 'status': 400,
+                                   'resposta': {'error': 'Chave de idempotência é obrigatória'}})
+                continue
+            
+            # Operação já aplicada em um envio anterior: devolve o resultado guardado
+            anterior = buscar_resposta(user.id, chave)
+            if anterior is not None:
+                dados, status = anterior
+                resultados.append({'chave': chave, 'tipo': tipo, 'status': status, 'resposta': dados, 'repetida': True})
+                continue
+            
+            handler = OPERACOES.get(tipo)
+            if handler is None:
+                dados, status = {'error': 'Tipo de operação inválido'}, 400
+            else:
+                # Cada operação roda em um savepoint para não afetar as demais
+                savepoint = db.session.begin_nested()
+                try:
+                    dados, status = handler(user, operacao)
+                    if status >= 400:
+                        savepoint.rollback()
+                    else:
+                        savepoint.commit()
+                except Exception as e:
+                    savepoint.rollback()
+                    dados, status = {'error': str(e)}, 500
+            
+            # Erros internos não são guardados para que o cliente possa tentar de novo
+            if status < 500:
+                registrar_resposta(user.id, chave, f'sync:{tipo}', dados, status)
+            resultados.append({'chave': chave, 'tipo': tipo, 'status': status, 'resposta': dados})
+        
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+    
+    return jsonify({'resultados': resultados, 'cursor': cursor_atual()})
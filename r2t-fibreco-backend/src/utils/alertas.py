@@ -0,0 +1,113 @@
+from sqlalchemy import Integer, case, cast, event, inspect
+from sqlalchemy.orm import Session as OrmSession
+
+from src.models.auth import User, UserRole
+from src.models.material import Material
+from src.models.notification import Notification
+
+# Margem acima do mínimo para sair do alerta (evita alertas repetidos quando
+# o estoque oscila em torno de quantidade_minima)
+DEFAULT_HYSTERESIS = 0.1
+
+_hysteresis = DEFAULT_HYSTERESIS
+_listeners_registered = False
+
+
+def limite_saida(quantidade_minima):
+    """Quantidade a partir da qual o alerta é encerrado"""
+    minimo = quantidade_minima or 0
+    return minimo + max(int(minimo * _hysteresis), 1)
+
+
+def _limite_saida_sql():
+    """limite_saida como expressão SQL (o CAST do SQLite trunca como int() para valores >= 0)"""
+    margem = cast(Material.quantidade_minima * _hysteresis, Integer)
+    return Material.quantidade_minima + case((margem > 1, margem), else_=1)
+
+
+def _novo_estado(material):
+    """True/False quando o material cruza um limiar, None quando não muda"""
+    if material.ativo is False:
+        return False if material.alerta_estoque else None
+    if not material.alerta_estoque and material.quantidade <= (material.quantidade_minima or 0):
+        return True
+    if material.alerta_estoque and material.quantidade >= limite_saida(material.quantidade_minima):
+        return False
+    return None
+
+
+def _notificacoes(session, material, destinatarios):
+    if material.quantidade <= 0:
+        titulo = "Material Sem Estoque"
+        mensagem = f"O material '{material.nome}' está sem estoque"
+    else:
+        titulo = "Estoque Baixo"
+        mensagem = (f"O material '{material.nome}' atingiu o estoque mínimo: "
+                    f"{material.quantidade} {material.unidade} (mínimo {material.quantidade_minima})")
+    for user_id in destinatarios:
+        session.add(Notification(
+            user_id=user_id,
+            title=titulo,
+            message=mensagem,
+            type='estoque_baixo',
+            material=material
+        ))
+
+
+def _before_flush(session, flush_context, instances):
+    # Só olha os materiais alterados nesta transação: O(1) por movimentação
+    entraram = []
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Material) or obj.quantidade is None:
+            continue
+        if obj in session.dirty:
+            attrs = inspect(obj).attrs
+            if not (attrs.quantidade.history.has_changes() or attrs.quantidade_minima.history.has_changes()
+                    or attrs.ativo.history.has_changes()):
+                continue
+        novo = _novo_estado(obj)
+        if novo is None:
+            continue
+        obj.alerta_estoque = novo
+        if novo:
+            entraram.append(obj)
+
+    # A notificação sai só na entrada do alerta (o flag faz a deduplicação)
+    if entraram:
+        destinatarios = [user_id for (user_id,) in session.query(User.id).filter(
+            User.role.in_([UserRole.ADMIN, UserRole.SUPERVISOR]), User.ativo == True
+        )]
+        for material in entraram:
+            _notificacoes(session, material, destinatarios)
+
+
+def reconciliar():
+    """Acerta o flag dos materiais gravados sem passar pela detecção (uso na inicialização)"""
+    from src.models.auth import db
+    Material.query.filter(
+        Material.alerta_estoque == False,
+        Material.ativo == True,
+        Material.quantidade <= Material.quantidade_minima
+    ).update({'alerta_estoque': True}, synchronize_session=False)
+    Material.query.filter(
+        Material.alerta_estoque == True,
+        Material.ativo == True,
+        Material.quantidade >= _limite_saida_sql()
+    ).update({'alerta_estoque': False}, synchronize_session=False)
+    Material.query.filter(
+        Material.alerta_estoque == True,
+        Material.ativo == False
+    ).update({'alerta_estoque': False}, synchronize_session=False)
+    db.session.commit()
+
+
+def init_alertas(app):
+    """Registra a detecção de estoque baixo e acerta os flags existentes"""
+    global _hysteresis, _listeners_registered
+    app.config.setdefault('STOCK_ALERT_HYSTERESIS', DEFAULT_HYSTERESIS)
+    _hysteresis = app.config['STOCK_ALERT_HYSTERESIS']
+    if not _listeners_registered:
+        event.listen(OrmSession, 'before_flush', _before_flush)
+        _listeners_registered = True
+    with app.app_context():
+        reconciliar()
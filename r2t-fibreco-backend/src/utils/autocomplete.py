@@ -0,0 +1,207 @@
+import bisect
+import re
+import threading
+import time
+import unicodedata
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession, object_session
+
+from src.models.auth import db
+from src.models.material import Material
+from src.models.sync import ChangeLog
+
+DEFAULT_REFRESH_SECONDS = 5
+MAX_SCAN = 5000
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com espaços simples"""
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(ch for ch in texto if not unicodedata.combining(ch))
+    return re.sub(r'\s+', ' ', texto).strip().lower()
+
+
+class PrefixIndex:
+    """Índice de prefixos em arrays ordenados (bisect)
+
+    ``_principal`` guarda o nome completo e o código interno de cada material;
+    ``_secundario`` guarda o nome a partir de cada palavra seguinte, para que
+    "12 fib" encontre "Cabo Fig8 12 Fibras". Resultados do principal vêm antes.
+    """
+
+    def __init__(self):
+        self._principal = []  # (chave, material_id)
+        self._secundario = []
+        self._dados = {}  # material_id -> (nome, codigo_interno, unidade, usuario_id)
+        self._lock = threading.Lock()
+        self.cursor = 0
+        self.carregado = False
+        self.atualizado_em = 0.0
+
+    @staticmethod
+    def _chaves(nome, codigo_interno):
+        nome = normalizar(nome)
+        principais = {nome}
+        if codigo_interno:
+            principais.add(normalizar(codigo_interno))
+        palavras = nome.split(' ')
+        secundarias = {' '.join(palavras[i:]) for i in range(1, len(palavras))}
+        return principais - {''}, secundarias - principais
+
+    def _inserir(self, material_id, dados):
+        principais, secundarias = self._chaves(dados[0], dados[1])
+        for chave in principais:
+            bisect.insort(self._principal, (chave, material_id))
+        for chave in secundarias:
+            bisect.insort(self._secundario, (chave, material_id))
+        self._dados[material_id] = dados
+
+    def _retirar(self, material_id):
+        dados = self._dados.pop(material_id, None)
+        if dados is None:
+            return
+        principais, secundarias = self._chaves(dados[0], dados[1])
+        for array, chaves in ((self._principal, principais), (self._secundario, secundarias)):
+            for chave in chaves:
+                i = bisect.bisect_left(array, (chave, material_id))
+                if i < len(array) and array[i] == (chave, material_id):
+                    del array[i]
+
+    def carregar(self, linhas, cursor):
+        """Reconstrói o índice inteiro a partir de (id, nome, codigo_interno, unidade, usuario_id)"""
+        principal, secundario, dados = [], [], {}
+        for material_id, nome, codigo_interno, unidade, usuario_id in linhas:
+            principais, secundarias = self._chaves(nome, codigo_interno)
+            principal.extend((chave, material_id) for chave in principais)
+            secundario.extend((chave, material_id) for chave in secundarias)
+            dados[material_id] = (nome, codigo_interno, unidade, usuario_id)
+        principal.sort()
+        secundario.sort()
+        with self._lock:
+            self._principal, self._secundario, self._dados = principal, secundario, dados
+            self.cursor = cursor
+            self.carregado = True
+            self.atualizado_em = time.monotonic()
+
+    def atualizar(self, material_id, dados):
+        """Insere, altera (dados) ou remove (dados=None) um material"""
+        with self._lock:
+            if dados is not None and self._dados.get(material_id) == dados:
+                return
+            self._retirar(material_id)
+            if dados is not None:
+                self._inserir(material_id, dados)
+
+    def _varrer(self, array, prefixo, limite, usuario_id, vistos, resultado):
+        i = bisect.bisect_left(array, (prefixo,))
+        fim = min(len(array), i + MAX_SCAN)
+        while i < fim and len(resultado) < limite:
+            chave, material_id = array[i]
+            if not chave.startswith(prefixo):
+                break
+            if material_id not in vistos:
+                vistos.add(material_id)
+                dados = self._dados[material_id]
+                if usuario_id is None or dados[3] == usuario_id:
+                    resultado.append(material_id)
+            i += 1
+
+    def buscar(self, prefixo, limite=10, usuario_id=None):
+        prefixo = normalizar(prefixo)
+        if not prefixo:
+            return []
+        vistos, resultado = set(), []
+        with self._lock:
+            self._varrer(self._principal, prefixo, limite, usuario_id, vistos, resultado)
+            self._varrer(self._secundario, prefixo, limite, usuario_id, vistos, resultado)
+            return [{
+                'id': material_id,
+                'nome': self._dados[material_id][0],
+                'codigo_interno': self._dados[material_id][1],
+                'unidade': self._dados[material_id][2]
+            } for material_id in resultado]
+
+    def __len__(self):
+        return len(self._dados)
+
+
+indice_materiais = PrefixIndex()
+
+_listeners_registered = False
+
+
+def _dados_material(material):
+    if not material.ativo:
+        return None
+    return (material.nome, material.codigo_interno, material.unidade, material.usuario_id)
+
+
+def _registrar_pendente(mapper, connection, target, removido=False):
+    session = object_session(target)
+    if session is not None:
+        pendentes = session.info.setdefault('autocomplete_pendentes', {})
+        pendentes[target.id] = None if removido else _dados_material(target)
+
+
+def _after_delete(mapper, connection, target):
+    _registrar_pendente(mapper, connection, target, removido=True)
+
+
+def _after_commit(session):
+    pendentes = session.info.pop('autocomplete_pendentes', None)
+    if pendentes and indice_materiais.carregado:
+        for material_id, dados in pendentes.items():
+            indice_materiais.atualizar(material_id, dados)
+
+
+def _after_rollback(session):
+    session.info.pop('autocomplete_pendentes', None)
+
+
+def init_autocomplete():
+    """Mantém o índice atualizado com os commits feitos neste processo"""
+    global _listeners_registered
+    if not _listeners_registered:
+        event.listen(Material, 'after_insert', _registrar_pendente)
+        event.listen(Material, 'after_update', _registrar_pendente)
+        event.listen(Material, 'after_delete', _after_delete)
+        event.listen(OrmSession, 'after_commit', _after_commit)
+        event.listen(OrmSession, 'after_rollback', _after_rollback)
+        _listeners_registered = True
+
+
+def _reconstruir():
+    from src.utils.change_log import cursor_atual
+    cursor = cursor_atual()
+    linhas = db.session.query(
+        Material.id, Material.nome, Material.codigo_interno, Material.unidade, Material.usuario_id
+    ).filter(Material.ativo == True).all()
+    indice_materiais.carregar(linhas, cursor)
+
+
+def _sincronizar():
+    """Aplica alterações feitas por outros processos, lidas de sync_changes"""
+    alterados = db.session.query(ChangeLog.id, ChangeLog.row_id).filter(
+        ChangeLog.id > indice_materiais.cursor,
+        ChangeLog.table_name == 'material'
+    ).order_by(ChangeLog.id).all()
+    if alterados:
+        ids = {row_id for _, row_id in alterados}
+        encontrados = {m.id: m for m in db.session.query(Material).filter(Material.id.in_(ids))}
+        for material_id in ids:
+            material = encontrados.get(material_id)
+            indice_materiais.atualizar(material_id, _dados_material(material) if material else None)
+        indice_materiais.cursor = alterados[-1][0]
+    indice_materiais.atualizado_em = time.monotonic()
+
+
+def obter_indice(refresh_seconds=DEFAULT_REFRESH_SECONDS):
+    """Retorna o índice, carregando-o na primeira chamada e sincronizando periodicamente"""
+    if not indice_materiais.carregado:
+        _reconstruir()
+    elif time.monotonic() - indice_materiais.atualizado_em > refresh_seconds:
+        _sincronizar()
+    return indice_materiais
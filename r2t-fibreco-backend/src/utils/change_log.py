@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event, func, insert, null, select
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.orm.attributes import get_history
+
+from src.models.auth import db
+from src.models.sync import ChangeLog
+
+# Tabelas replicadas para os clientes offline
+SYNC_TABLES = {'material', 'atividade', 'notifications'}
+# Colunas que definem quem vê cada linha: (usuario_id, supervisor_id) do ChangeLog
+DONOS = {
+    'material': ('usuario_id', None),
+    'atividade': ('usuario_id', 'supervisor_id'),
+    'notifications': ('user_id', None),
+}
+# Dias de histórico mantidos; clientes com cursor mais antigo recebem a carga completa
+DEFAULT_SYNC_CHANGES_RETENTION_DAYS = 30
+
+_listeners_registered = False
+
+
+def _record(session, changes):
+    if changes:
+        session.connection().execute(insert(ChangeLog.__table__), [
+            {'table_name': table_name, 'row_id': row_id, 'operacao': operacao,
+             'usuario_id': usuario_id, 'supervisor_id': supervisor_id}
+            for table_name, row_id, operacao, usuario_id, supervisor_id in changes
+        ])
+
+
+def _valor_anterior(obj, coluna):
+    if coluna is None:
+        return None
+    historico = get_history(obj, coluna, passive=True)
+    if historico.deleted:
+        return historico.deleted[0]
+    return getattr(obj, coluna)
+
+
+def _donos_anteriores(obj):
+    return tuple(_valor_anterior(obj, coluna) for coluna in DONOS[obj.__table__.name])
+
+
+def _after_flush(session, flush_context):
+    changes = []
+    for obj in session.new:
+        if obj.__table__.name in SYNC_TABLES:
+            # Linha nova: ninguém a via antes
+            changes.append((obj.__table__.name, obj.id, 'upsert', None, None))
+    for obj in session.dirty:
+        if obj.__table__.name in SYNC_TABLES and session.is_modified(obj, include_collections=False):
+            changes.append((obj.__table__.name, obj.id, 'upsert') + _donos_anteriores(obj))
+    for obj in session.deleted:
+        if obj.__table__.name in SYNC_TABLES:
+            changes.append((obj.__table__.name, obj.id, 'delete') + _donos_anteriores(obj))
+    _record(session, changes)
+
+
+def _do_orm_execute(orm_execute_state):
+    # UPDATE/DELETE em massa: registra as linhas afetadas antes de executar
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    statement = orm_execute_state.statement
+    table = statement.table
+    if table.name not in SYNC_TABLES:
+        return None
+
+    # Lidos antes do comando: são os donos anteriores à alteração
+    linhas = select(table.c.id, *[table.c[coluna] if coluna else null() for coluna in DONOS[table.name]])
+    if statement.whereclause is not None:
+        linhas = linhas.where(statement.whereclause)
+    operacao = 'delete' if orm_execute_state.is_delete else 'upsert'
+    connection = orm_execute_state.session.connection()
+    _record(orm_execute_state.session, [
+        (table.name, row_id, operacao, usuario_id, supervisor_id)
+        for row_id, usuario_id, supervisor_id in connection.execute(linhas)
+    ])
+    return None
+
+
+def init_change_log(app):
+    """Registra os listeners que alimentam a tabela sync_changes"""
+    global _listeners_registered
+    app.config.setdefault('SYNC_CHANGES_RETENTION_DAYS', DEFAULT_SYNC_CHANGES_RETENTION_DAYS)
+    if not _listeners_registered:
+        event.listen(OrmSession, 'after_flush', _after_flush)
+        event.listen(OrmSession, 'do_orm_execute', _do_orm_execute)
+        _listeners_registered = True
+
+
+def cursor_atual():
+    """Maior sequência registrada (0 quando ainda não há alterações)"""
+    return db.session.query(func.coalesce(func.max(ChangeLog.id), 0)).scalar()
+
+
+def menor_cursor():
+    return db.session.query(func.coalesce(func.min(ChangeLog.id), 0)).scalar()
+
+
+def expurgar_alteracoes(agora=None):
+    """Remove as alterações mais antigas que SYNC_CHANGES_RETENTION_DAYS (0 desativa)
+
+    A alteração mais recente é sempre mantida: ``menor_cursor`` marca o início
+    do histórico retido, e um cursor anterior a ele leva à carga completa.
+    """
+    dias = current_app.config.get('SYNC_CHANGES_RETENTION_DAYS', DEFAULT_SYNC_CHANGES_RETENTION_DAYS)
+    if not dias:
+        return 0
+    limite = (agora or datetime.utcnow()) - timedelta(days=dias)
+    removidas = ChangeLog.query.filter(ChangeLog.created_at < limite, ChangeLog.id < cursor_atual())\
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return removidas
+
+
+def visiveis_antes(table_name, row_ids, cursor, filtro):
+    """Quais ``row_ids`` o usuário via antes de alguma alteração posterior ao cursor
+
+    ``filtro`` restringe a consulta de ChangeLog pelos donos anteriores
+    (usuario_id/supervisor_id) conforme o papel do usuário.
+    """
+    if not row_ids:
+        return set()
+    query = db.session.query(ChangeLog.row_id).distinct()\
+        .filter(ChangeLog.table_name == table_name, ChangeLog.id > cursor, ChangeLog.row_id.in_(row_ids))
+    return {row_id for row_id, in filtro(query)}
+
+
+def alteracoes_desde(cursor, limite):
+    """Última alteração de cada linha com sequência > cursor, em ordem de sequência
+
+    Retorna até ``limite + 1`` itens (table_name, row_id, seq) para que o
+    chamador saiba se há mais páginas.
+    """
+    seq = func.max(ChangeLog.id).label('seq')
+    return db.session.query(ChangeLog.table_name, ChangeLog.row_id, seq)\
+        .filter(ChangeLog.id > cursor)\
+        .group_by(ChangeLog.table_name, ChangeLog.row_id)\
+        .order_by(seq)\
+        .limit(limite + 1).all()
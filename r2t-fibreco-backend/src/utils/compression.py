@@ -0,0 +1,58 @@
+import gzip
+import zlib
+
+from flask import request
+
+DEFAULT_MIMETYPES = ['application/json', 'text/html', 'text/csv']
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    for encoding in ('gzip', 'deflate'):
+        if accepted[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress_body(data, encoding, level=6):
+    """Comprime o corpo da resposta com gzip ou deflate"""
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return zlib.compress(data, level)
+
+
+def init_compression(app):
+    """Comprime respostas da API acima de ``COMPRESS_MIN_SIZE`` bytes"""
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in app.config['COMPRESS_MIMETYPES']):
+            return response
+
+        # A resposta varia conforme o Accept-Encoding mesmo quando não comprimimos
+        response.vary.add('Accept-Encoding')
+
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        response.set_data(compress_body(data, encoding, app.config['COMPRESS_LEVEL']))
+        response.headers['Content-Encoding'] = encoding
+
+        # O corpo comprimido não é byte a byte igual ao original
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    return compress_response
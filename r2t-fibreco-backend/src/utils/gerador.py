@@ -0,0 +1,366 @@
+import heapq
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+
+from src.models.auth import db, User, UserRole
+from src.models.material import Material, MovimentacaoEstoque, Atividade, MaterialUsado, ReservaEstoque
+from src.models.notification import Notification
+from src.utils.senhas import gerar_hash
+
+LOTE_PADRAO = 50000
+SENHA_PADRAO = 'senha123'
+
+# Modelos por categoria: (subcategoria, nome com {v}, variantes, unidade, fornecedores, preço, mínimo, estoque inicial)
+CATALOGO = {
+    'cabos': [
+        ('fig8', 'Cabo Fig8 {v} Fibras SM', [2, 4, 6, 12, 24, 36, 48], 'metro', ['Prysmian', 'Furukawa'], (2.5, 9.0), (300, 500), (1000, 8000)),
+        ('drop', 'Cabo Drop {v} Fibra(s) Flat', [1, 2, 4], 'metro', ['Furukawa', 'Intelbras'], (0.8, 2.0), (500, 1000), (2000, 10000)),
+        ('autossustentado', 'Cabo AS80 {v} Fibras', [12, 24, 48, 72], 'metro', ['Prysmian', 'Furukawa'], (4.0, 14.0), (200, 400), (500, 5000)),
+    ],
+    'caixas': [
+        ('cto', 'Caixa CTO {v} Portas', [8, 16], 'unidade', ['Intelbras', 'Furukawa'], (85.0, 130.0), (3, 5), (10, 40)),
+        ('gp', 'Caixa GP {v} Fibras', [12, 24, 48], 'unidade', ['Furukawa'], (150.0, 320.0), (3, 5), (5, 30)),
+        ('ceo', 'Caixa de Emenda CEO {v} Fibras', [24, 48, 144], 'unidade', ['Furukawa', 'Fibracem'], (200.0, 600.0), (2, 4), (5, 20)),
+    ],
+    'conectores': [
+        ('sc_apc', 'Conector SC/APC {v}', ['Monomodo', 'Campo', 'Fast'], 'unidade', ['Furukawa', 'Intelbras'], (6.0, 12.0), (30, 50), (100, 400)),
+        ('precom', 'Conector Precom SC/APC {v}', ['Padrão', 'Reforçado'], 'unidade', ['Precom'], (10.0, 15.0), (20, 30), (80, 300)),
+    ],
+    'plaquetas': [
+        ('emenda', 'Plaqueta de Emenda {v} Fibras', [12, 24, 36], 'unidade', ['Furukawa'], (15.0, 40.0), (5, 10), (20, 80)),
+        ('identificacao', 'Plaqueta de Identificação {v}', ['CTO', 'Cabo', 'Poste'], 'unidade', ['Hellermann'], (0.5, 2.0), (50, 100), (200, 1000)),
+    ],
+    'tubetes': [
+        ('protecao', 'Tubete {v}mm Preto', [40, 45, 60], 'unidade', ['Hellermann'], (2.0, 4.0), (50, 100), (200, 800)),
+    ],
+    'cordões': [
+        ('patch_cord', 'Cordão Óptico SC/APC-SC/APC {v}m', [1, 2, 3, 5, 10], 'unidade', ['Furukawa'], (15.0, 45.0), (10, 20), (40, 150)),
+    ],
+    'splitters': [
+        ('1x8', 'Splitter 1x8 {v}', ['SC/APC', 'Sem Conector'], 'unidade', ['Intelbras', 'Furukawa'], (30.0, 60.0), (5, 10), (20, 60)),
+        ('1x16', 'Splitter 1x16 {v}', ['SC/APC', 'Sem Conector'], 'unidade', ['Intelbras'], (55.0, 90.0), (3, 5), (10, 40)),
+    ],
+    'acessórios': [
+        ('fixacao', 'Abraçadeira Plástica {v}mm', [150, 200, 300], 'unidade', ['Hellermann'], (0.2, 0.8), (200, 500), (1000, 5000)),
+        ('fixacao', 'Alça Preformada {v}', ['Drop', 'Fig8', 'AS80'], 'unidade', ['Fibracem'], (1.5, 6.0), (50, 100), (200, 600)),
+    ],
+}
+
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+         'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sabrina', 'Thiago', 'Vanessa', 'Wagner']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Ferreira', 'Almeida', 'Barbosa',
+              'Cavalcanti', 'Albuquerque', 'Melo', 'Araújo', 'Rocha']
+BAIRROS = ['Boa Viagem', 'Casa Forte', 'Graças', 'Espinheiro', 'Madalena', 'Torre', 'Várzea', 'Imbiribeira',
+           'Pina', 'Casa Amarela', 'Afogados', 'Encruzilhada']
+SERVICOS = ['Instalação de cliente', 'Manutenção de CTO', 'Lançamento de cabo', 'Fusão em caixa de emenda',
+            'Troca de drop', 'Reparo de rompimento', 'Ativação de splitter']
+
+# Centro aproximado de Recife e raio (graus) das atividades geradas
+CENTRO = (-8.0476, -34.8770)
+RAIO = 0.08
+
+
+def limpar():
+    """Apaga os dados de todas as tabelas (menos as versões usadas nos ETags)"""
+    connection = db.session.connection()
+    for tabela in reversed(db.metadata.sorted_tables):
+        if tabela.name != 'table_versions':
+            connection.execute(delete(tabela))
+    db.session.commit()
+
+
+class _Gravador:
+    """Acumula linhas por tabela e grava em executemany de ``lote`` linhas"""
+
+    def __init__(self, lote, commit_a_cada):
+        self.lote = lote
+        self.commit_a_cada = commit_a_cada
+        self.buffers = {}
+        self.totais = {}
+        self.pendentes = 0
+
+    def adicionar(self, tabela, linha):
+        buffer = self.buffers.setdefault(tabela, [])
+        buffer.append(linha)
+        if len(buffer) >= self.lote:
+            self.gravar(tabela)
+
+    def gravar(self, tabela):
+        if not self.buffers.get(tabela):
+            return
+        # Tabelas referenciadas (chaves estrangeiras) são gravadas antes
+        for anterior in db.metadata.sorted_tables:
+            if anterior is tabela:
+                break
+            if self.buffers.get(anterior):
+                self._inserir(anterior)
+        self._inserir(tabela)
+
+    def _inserir(self, tabela):
+        linhas = self.buffers[tabela]
+        db.session.execute(insert(tabela), linhas)
+        self.totais[tabela.name] = self.totais.get(tabela.name, 0) + len(linhas)
+        self.buffers[tabela] = []
+        self.pendentes += len(linhas)
+        if self.pendentes >= self.commit_a_cada:
+            db.session.commit()
+            self.pendentes = 0
+
+    def gravar_tudo(self):
+        # Ordem das chaves estrangeiras
+        for tabela in db.metadata.sorted_tables:
+            self.gravar(tabela)
+        db.session.commit()
+
+
+def _pesos_popularidade(rng, quantidade):
+    """Pesos acumulados no estilo Zipf: poucos materiais concentram a maior parte do uso"""
+    pesos = [1 / (posicao + 1) ** 0.8 for posicao in range(quantidade)]
+    rng.shuffle(pesos)
+    acumulado, total = [], 0.0
+    for peso in pesos:
+        total += peso
+        acumulado.append(total)
+    return acumulado
+
+
+def gerar_dados(materiais=500, movimentacoes=20000, atividades=2000, meses=6, admins=1, supervisores=3,
+                tecnicos=20, semente=42, senha=SENHA_PADRAO, lote=LOTE_PADRAO, agora=None, log=None):
+    """Gera um conjunto de dados sintético e reprodutível (mesma semente, mesmos dados)
+
+    O banco precisa estar vazio (ver ``limpar``). As linhas são gravadas com ids
+    explícitos em executemany de ``lote`` linhas, em transações grandes.
+    O estoque de cada material segue as movimentações em ordem cronológica, e as
+    conclusões de atividades geram as saídas e os registros de material usado.
+    Retorna o número de linhas gravadas por tabela.
+    """
+    if db.session.execute(select(func.count()).select_from(User)).scalar() or \
+            db.session.execute(select(func.count()).select_from(Material)).scalar():
+        raise ValueError('O banco já tem usuários ou materiais; limpe-o antes de gerar os dados')
+    if materiais < 1 or admins < 1 or supervisores < 1 or tecnicos < 1:
+        raise ValueError('São necessários ao menos um material, um admin, um supervisor e um técnico')
+
+    rng = random.Random(semente)
+    agora = agora or datetime.utcnow()
+    dias = max(meses * 30, 1)
+    inicio = (agora - timedelta(days=dias)).replace(hour=0, minute=0, second=0, microsecond=0)
+    gravador = _Gravador(lote, commit_a_cada=lote * 10)
+    _log = log or (lambda mensagem: None)
+
+    # Usuários (o hash é calculado uma vez: todos usam a mesma senha)
+    senha_hash = gerar_hash(senha)
+    usuarios = [('admin' if i == 0 else f'admin{i + 1}', UserRole.ADMIN) for i in range(admins)]
+    usuarios += [(f'supervisor{i + 1}', UserRole.SUPERVISOR) for i in range(supervisores)]
+    usuarios += [(f'tecnico{i + 1}', UserRole.USER) for i in range(tecnicos)]
+    nomes = {}
+    ids_por_role = {UserRole.ADMIN: [], UserRole.SUPERVISOR: [], UserRole.USER: []}
+    for user_id, (username, role) in enumerate(usuarios, start=1):
+        nomes[user_id] = f'{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}'
+        ids_por_role[role].append(user_id)
+        gravador.adicionar(User.__table__, {
+            'id': user_id, 'username': username, 'email': f'{username}@fibreco.local',
+            'password_hash': senha_hash, 'role': role, 'nome_completo': nomes[user_id],
+            'ativo': True, 'data_criacao': inicio
+        })
+    admins_ids, supervisores_ids, tecnicos_ids = (
+        ids_por_role[UserRole.ADMIN], ids_por_role[UserRole.SUPERVISOR], ids_por_role[UserRole.USER]
+    )
+
+    # Materiais: distribuídos pelas categorias e subcategorias do catálogo
+    modelos = [(categoria, modelo) for categoria, lista in CATALOGO.items() for modelo in lista]
+    estoque, minimos, unidades = [0], [0], [None]  # índice = id do material
+    movimentacao_id = 0
+
+    def movimentar(material_id, tipo, quantidade, quando, motivo, responsavel_id):
+        nonlocal movimentacao_id
+        anterior = estoque[material_id]
+        atual = anterior + quantidade if tipo == 'entrada' else anterior - quantidade
+        estoque[material_id] = atual
+        movimentacao_id += 1
+        gravador.adicionar(MovimentacaoEstoque.__table__, {
+            'id': movimentacao_id, 'material_id': material_id, 'tipo_movimentacao': tipo,
+            'quantidade': quantidade, 'quantidade_anterior': anterior, 'quantidade_atual': atual,
+            'motivo': motivo, 'responsavel': nomes[responsavel_id], 'responsavel_id': responsavel_id,
+            'data_movimentacao': quando
+        })
+
+    for material_id in range(1, materiais + 1):
+        categoria, (subcategoria, nome, variantes, unidade, fornecedores, preco, minimo, inicial) = modelos[
+            (material_id - 1) % len(modelos)]
+        quantidade_minima = rng.randint(*minimo)
+        estoque.append(0)
+        minimos.append(quantidade_minima)
+        unidades.append(unidade)
+        gravador.adicionar(Material.__table__, {
+            'id': material_id,
+            'nome': nome.format(v=rng.choice(variantes)),
+            'categoria': categoria,
+            'subcategoria': subcategoria,
+            'quantidade': 0,
+            'quantidade_minima': quantidade_minima,
+            'quantidade_reservada': 0,
+            'unidade': unidade,
+            'localizacao': f'Estoque {"ABCDEFGH"[material_id % 8]} - Prateleira {material_id % 12 + 1}',
+            'fornecedor': rng.choice(fornecedores),
+            'preco_unitario': round(rng.uniform(*preco), 2),
+            'codigo_interno': f'{categoria[:2].upper()}-{material_id:07d}',
+            'usuario_id': rng.choice(admins_ids),
+            'data_cadastro': inicio,
+            'data_atualizacao': inicio,
+            'ativo': True,
+            'alerta_estoque': False
+        })
+        movimentar(material_id, 'entrada', rng.randint(*inicial), inicio, 'Estoque inicial', admins_ids[0])
+    _log(f'{len(usuarios)} usuários e {materiais} materiais')
+
+    ids_materiais = list(range(1, materiais + 1))
+    popularidade = _pesos_popularidade(rng, materiais)
+    reservado = [0] * (materiais + 1)
+    atividade_id = material_usado_id = notificacao_id = reserva_id = 0
+    conclusoes = []  # heap (data_conclusao, atividade_id, técnico, título, consumo)
+
+    def notificar(user_id, titulo, mensagem, tipo, quando, lida, atividade=None):
+        nonlocal notificacao_id
+        notificacao_id += 1
+        gravador.adicionar(Notification.__table__, {
+            'id': notificacao_id, 'user_id': user_id, 'title': titulo, 'message': mensagem,
+            'type': tipo, 'activity_id': atividade, 'read': lida, 'created_at': quando
+        })
+
+    def aplicar_conclusoes(ate):
+        nonlocal material_usado_id
+        while conclusoes and conclusoes[0][0] <= ate:
+            quando, concluida_id, tecnico_id, titulo, consumo = heapq.heappop(conclusoes)
+            for material_id, quantidade in consumo:
+                quantidade = min(quantidade, estoque[material_id] - reservado[material_id])
+                if quantidade <= 0:
+                    continue
+                movimentar(material_id, 'saida', quantidade, quando, f'Atividade concluída: {titulo}', tecnico_id)
+                material_usado_id += 1
+                gravador.adicionar(MaterialUsado.__table__, {
+                    'id': material_usado_id, 'atividade_id': concluida_id, 'material_id': material_id,
+                    'quantidade_usada': quantidade, 'data_uso': quando
+                })
+
+    def quantidade_tipica(material_id):
+        return rng.randint(10, 300) if unidades[material_id] == 'metro' else rng.randint(1, 10)
+
+    for dia in range(dias):
+        dia_inicio = inicio + timedelta(days=dia)
+        # Volumes diários distribuídos de forma uniforme (o resto vai para os primeiros dias)
+        n_movimentacoes = movimentacoes // dias + (1 if dia < movimentacoes % dias else 0)
+        n_atividades = atividades // dias + (1 if dia < atividades % dias else 0)
+        recente = (dias - dia) <= 3
+
+        eventos = [(dia_inicio + timedelta(seconds=rng.randint(7 * 3600, 18 * 3600)), 'movimentacao')
+                   for _ in range(n_movimentacoes)]
+        eventos += [(dia_inicio + timedelta(seconds=rng.randint(7 * 3600, 18 * 3600)), 'atividade')
+                    for _ in range(n_atividades)]
+        eventos.sort(key=lambda evento: evento[0])
+        sorteados = iter(rng.choices(ids_materiais, cum_weights=popularidade, k=len(eventos) * 4))
+
+        for quando, tipo in eventos:
+            aplicar_conclusoes(quando)
+            if tipo == 'movimentacao':
+                material_id = next(sorteados)
+                quantidade = quantidade_tipica(material_id)
+                responsavel_id = rng.choice(supervisores_ids + admins_ids)
+                # Saída sem saldo (ou estoque abaixo do mínimo) vira reposição
+                disponivel = estoque[material_id] - reservado[material_id]
+                if disponivel - quantidade < minimos[material_id] and rng.random() < 0.7:
+                    movimentar(material_id, 'entrada', quantidade * rng.randint(5, 20), quando,
+                               'Reposição de estoque', responsavel_id)
+                elif quantidade <= disponivel:
+                    movimentar(material_id, 'saida', quantidade, quando,
+                               rng.choice(['Uso em obra', 'Transferência entre bases', 'Ajuste de inventário']),
+                               responsavel_id)
+                continue
+
+            atividade_id += 1
+            tecnico_id = rng.choice(tecnicos_ids)
+            supervisor_id = rng.choice(supervisores_ids)
+            titulo = f'{rng.choice(SERVICOS)} - {rng.choice(BAIRROS)}'
+            sorteio = rng.random()
+            if recente:
+                status = 'pendente' if sorteio < 0.6 else 'em_andamento' if sorteio < 0.8 else 'concluida'
+            else:
+                status = 'concluida' if sorteio < 0.92 else 'cancelada' if sorteio < 0.95 else 'pendente'
+
+            material_id = next(sorteados) if rng.random() < 0.5 else None
+            quantidade_necessaria = quantidade_tipica(material_id) if material_id else None
+            data_conclusao = None
+            linha = {
+                'id': atividade_id, 'titulo': titulo,
+                'descricao': f'Ordem de serviço {atividade_id:06d}',
+                'usuario_id': tecnico_id, 'supervisor_id': supervisor_id,
+                'material_id': material_id, 'quantidade_necessaria': quantidade_necessaria,
+                'status': status, 'data_criacao': quando,
+                'data_limite': quando + timedelta(days=rng.randint(1, 7)),
+                'data_conclusao': None, 'observacoes': None, 'descricao_servico': None,
+                'latitude': None, 'longitude': None, 'endereco': None
+            }
+            if status == 'concluida':
+                data_conclusao = min(quando + timedelta(minutes=rng.randint(30, 72 * 60)), agora)
+                bairro = titulo.rsplit(' - ', 1)[1]
+                linha.update({
+                    'data_conclusao': data_conclusao,
+                    'descricao_servico': f'{titulo.split(" - ")[0]} realizada sem intercorrências',
+                    'latitude': round(CENTRO[0] + rng.uniform(-RAIO, RAIO), 6),
+                    'longitude': round(CENTRO[1] + rng.uniform(-RAIO, RAIO), 6),
+                    'endereco': f'Rua {rng.randint(1, 500)}, {bairro}, Recife - PE'
+                })
+                consumo = {next(sorteados): None for _ in range(rng.randint(1, 3))}
+                if material_id:
+                    consumo[material_id] = None
+                heapq.heappush(conclusoes, (data_conclusao, atividade_id, tecnico_id, titulo, [
+                    (usado_id, quantidade_necessaria if usado_id == material_id else quantidade_tipica(usado_id))
+                    for usado_id in consumo
+                ]))
+            elif status == 'cancelada':
+                linha['observacoes'] = 'Cancelada: cliente desistiu'
+            gravador.adicionar(Atividade.__table__, linha)
+
+            # Reserva das atividades em aberto, enquanto houver saldo disponível
+            if status in ('pendente', 'em_andamento') and material_id and \
+                    estoque[material_id] - reservado[material_id] >= quantidade_necessaria:
+                reservado[material_id] += quantidade_necessaria
+                reserva_id += 1
+                gravador.adicionar(ReservaEstoque.__table__, {
+                    'id': reserva_id, 'atividade_id': atividade_id, 'material_id': material_id,
+                    'quantidade': quantidade_necessaria, 'status': 'ativa', 'data_criacao': quando
+                })
+
+            notificar(tecnico_id, 'Nova Atividade Atribuída',
+                      f'Uma nova atividade foi atribuída para você: {titulo}', 'atividade_atribuida',
+                      quando, status != 'pendente' or rng.random() < 0.3, atividade_id)
+            if data_conclusao:
+                for destinatario in admins_ids + [supervisor_id]:
+                    notificar(destinatario, 'Atividade Concluída',
+                              f"A atividade '{titulo}' foi concluída por {nomes[tecnico_id]}",
+                              'atividade_concluida', data_conclusao, rng.random() < 0.7, atividade_id)
+
+        if dia % 30 == 29:
+            _log(f'{dia + 1}/{dias} dias: {movimentacao_id} movimentações, {atividade_id} atividades')
+
+    aplicar_conclusoes(agora)
+    gravador.gravar_tudo()
+
+    # Saldo final de cada material (a movimentação inicial gravou o material com zero)
+    db.session.connection().execute(
+        update(Material.__table__).where(Material.__table__.c.id == bindparam('b_id')).values(
+            quantidade=bindparam('b_quantidade'), quantidade_reservada=bindparam('b_reservado')
+        ),
+        [{'b_id': material_id, 'b_quantidade': estoque[material_id], 'b_reservado': reservado[material_id]}
+         for material_id in ids_materiais]
+    )
+    db.session.commit()
+
+    # Agregados derivados que a aplicação mantém pelos listeners do ORM
+    from src.utils.alertas import reconciliar
+    from src.utils.previsao import recalcular_consumo
+    recalcular_consumo()
+    reconciliar()
+    db.session.commit()
+    return gravador.totais
@@ -0,0 +1,214 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, g, jsonify, make_response, request
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import HTTPException
+
+from src.models.auth import db
+from src.models.idempotency import IdempotencyKey
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_EVICT_INTERVAL = 300
+CACHE_MAX_ITEMS = 10000
+
+# Cache local das respostas concluídas: (user_id, chave) -> (expira_em, endpoint, dados, status, corpo_hash)
+_cache = {}
+_lock = threading.Lock()
+_proxima_limpeza = 0.0
+
+
+def _ttl():
+    return current_app.config.get('IDEMPOTENCY_TTL', DEFAULT_TTL)
+
+
+def _cache_get(user_id, chave):
+    item = _cache.get((user_id, chave))
+    if item is None:
+        return None
+    if item[0] < time.time():
+        _cache.pop((user_id, chave), None)
+        return None
+    return item
+
+
+def _cache_set(user_id, chave, endpoint, dados, status, corpo_hash=None):
+    with _lock:
+        if len(_cache) >= CACHE_MAX_ITEMS:
+            _cache.clear()
+        _cache[(user_id, chave)] = (time.time() + _ttl(), endpoint, dados, status, corpo_hash)
+
+
+def expurgar_expirados():
+    """Remove as chaves mais antigas que o TTL (banco e cache local)"""
+    limite = datetime.utcnow() - timedelta(seconds=_ttl())
+    removidas = IdempotencyKey.query.filter(IdempotencyKey.created_at < limite).delete(synchronize_session=False)
+    db.session.commit()
+    agora = time.time()
+    with _lock:
+        for chave in [k for k, item in _cache.items() if item[0] < agora]:
+            _cache.pop(chave, None)
+    return removidas
+
+
+def _talvez_expurgar():
+    global _proxima_limpeza
+    agora = time.time()
+    if agora < _proxima_limpeza:
+        return
+    with _lock:
+        if agora < _proxima_limpeza:
+            return
+        _proxima_limpeza = agora + current_app.config.get('IDEMPOTENCY_EVICT_INTERVAL', DEFAULT_EVICT_INTERVAL)
+    try:
+        expurgar_expirados()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao expurgar chaves de idempotência: {e}")
+
+
+def _buscar_registro(user_id, chave):
+    registro = IdempotencyKey.query.filter_by(user_id=user_id, chave=chave).first()
+    if registro is not None and registro.created_at < datetime.utcnow() - timedelta(seconds=_ttl()):
+        # Expirada, mas ainda não expurgada: trata como inexistente
+        db.session.delete(registro)
+        db.session.flush()
+        return None
+    return registro
+
+
+def buscar_resposta(user_id, chave):
+    """Retorna (dados, status) já registrados para a chave, ou None"""
+    item = _cache_get(user_id, chave)
+    if item is not None:
+        return item[2], item[3]
+    registro = _buscar_registro(user_id, chave)
+    if registro is None or registro.status_code is None:
+        return None
+    dados = json.loads(registro.resposta) if registro.resposta else None
+    _cache_set(user_id, chave, registro.endpoint, dados, registro.status_code)
+    return dados, registro.status_code
+
+
+def registrar_resposta(user_id, chave, endpoint, dados, status):
+    """Guarda a resposta de uma operação (sem commit; vale junto com a transação)"""
+    registro = IdempotencyKey(
+        user_id=user_id,
+        chave=chave,
+        endpoint=endpoint,
+        status_code=status,
+        resposta=json.dumps(dados)
+    )
+    db.session.add(registro)
+    return registro
+
+
+def _outra_operacao(endpoint_registrado, hash_registrado, endpoint, corpo_hash):
+    """Mensagem de erro se a chave foi usada com outra rota ou outro corpo; senão None"""
+    if endpoint_registrado != endpoint:
+        return 'Idempotency-Key já utilizada em outra operação'
+    if hash_registrado is not None and hash_registrado != corpo_hash:
+        return 'Idempotency-Key já utilizada com outro corpo de requisição'
+    return None
+
+
+def _liberar(user_id, chave):
+    """Remove a reserva da chave para que o cliente possa tentar de novo"""
+    try:
+        IdempotencyKey.query.filter_by(user_id=user_id, chave=chave).delete()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao liberar chave de idempotência: {e}")
+
+
+def _replay(dados, status):
+    response = make_response(jsonify(dados), status)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(f):
+    """Decorator para rotas POST que aceitam o header ``Idempotency-Key``
+
+    A primeira requisição reserva a chave, executa a rota e guarda a resposta
+    por ``IDEMPOTENCY_TTL`` segundos; repetições devolvem a resposta guardada
+    sem executar a transação de novo. A mesma chave com outra rota ou outro
+    corpo é recusada com 422. Deve ser aplicado depois de ``login_required``.
+    """
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
+        chave = request.headers.get('Idempotency-Key')
+        if not chave:
+            return f(*args, **kwargs)
+        if len(chave) > 255:
+            return jsonify({'error': 'Idempotency-Key deve ter no máximo 255 caracteres'}), 400
+        
+        _talvez_expurgar()
+        user_id = g.user_id
+        endpoint = f'{request.method} {request.path}'[:100]
+        corpo_hash = hashlib.sha256(request.get_data()).hexdigest()
+        
+        item = _cache_get(user_id, chave)
+        if item is not None:
+            erro = _outra_operacao(item[1], item[4], endpoint, corpo_hash)
+            if erro:
+                return jsonify({'error': erro}), 422
+            return _replay(item[2], item[3])
+        
+        registro = _buscar_registro(user_id, chave)
+        if registro is not None:
+            erro = _outra_operacao(registro.endpoint, registro.corpo_hash, endpoint, corpo_hash)
+            if erro:
+                return jsonify({'error': erro}), 422
+            if registro.status_code is None:
+                response = jsonify({'error': 'Requisição com esta Idempotency-Key ainda em processamento'})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+            dados = json.loads(registro.resposta) if registro.resposta else None
+            _cache_set(user_id, chave, endpoint, dados, registro.status_code, registro.corpo_hash)
+            return _replay(dados, registro.status_code)
+        
+        # Reservar a chave antes de executar; a restrição única barra requisições simultâneas
+        try:
+            db.session.add(IdempotencyKey(user_id=user_id, chave=chave, endpoint=endpoint, corpo_hash=corpo_hash))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            response = jsonify({'error': 'Requisição com esta Idempotency-Key ainda em processamento'})
+            response.headers['Retry-After'] = '1'
+            return response, 409
+        
+        try:
+            response = make_response(f(*args, **kwargs))
+        except HTTPException as e:
+            # Erro HTTP da própria rota (ex.: 404 do get_or_404): é o resultado final da chave
+            db.session.rollback()
+            response = make_response(jsonify({'error': e.description}), e.code)
+        except Exception:
+            db.session.rollback()
+            _liberar(user_id, chave)
+            raise
+        
+        try:
+            registro = IdempotencyKey.query.filter_by(user_id=user_id, chave=chave).first()
+            if response.status_code >= 500 or not response.is_json:
+                # Falha interna: libera a chave para que o cliente tente novamente
+                if registro is not None:
+                    db.session.delete(registro)
+            elif registro is not None:
+                dados = response.get_json()
+                registro.status_code = response.status_code
+                registro.resposta = json.dumps(dados)
+                _cache_set(user_id, chave, endpoint, dados, response.status_code, corpo_hash)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao registrar resposta idempotente: {e}")
+        
+        return response
+    return decorated_function
@@ -0,0 +1,205 @@
+import csv
+import io
+import math
+
+from src.models.auth import db
+from src.models.material import Material, MovimentacaoEstoque
+
+CAMPOS_TEXTO = ('nome', 'categoria', 'subcategoria', 'unidade', 'localizacao', 'fornecedor',
+                'codigo_fornecedor', 'descricao')
+CAMPOS_INTEIROS = ('quantidade', 'quantidade_minima')
+COLUNAS = ('codigo_interno',) + CAMPOS_TEXTO + CAMPOS_INTEIROS + ('preco_unitario',)
+
+# Maior valor das colunas inteiras (INTEGER de 32 bits, aceito por qualquer banco)
+VALOR_MAXIMO = 2 ** 31 - 1
+
+LOTE_PADRAO = 500
+MAX_ERROS_RELATORIO = 1000
+
+
+def abrir_csv(arquivo_binario, separador=None):
+    """DictReader sobre um arquivo binário (upload ou disco), lido em streaming
+
+    Remove o BOM do Excel e detecta ',' ou ';' pelo cabeçalho quando o
+    separador não é informado.
+    """
+    texto = io.TextIOWrapper(arquivo_binario, encoding='utf-8-sig', newline='')
+    cabecalho = texto.readline()
+    if separador is None:
+        separador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+    campos = [c.strip().lower() for c in next(csv.reader([cabecalho], delimiter=separador), [])]
+    return csv.DictReader(texto, fieldnames=campos, delimiter=separador)
+
+
+def validar_linha(linha):
+    """Converte uma linha do CSV em {campo: valor}; retorna (dados, erros)
+
+    Células vazias são omitidas (na atualização mantêm o valor atual).
+    """
+    dados = {}
+    erros = []
+    for campo in COLUNAS:
+        valor = (linha.get(campo) or '').strip()
+        if not valor:
+            continue
+        if campo in CAMPOS_INTEIROS:
+            try:
+                numero = float(valor.replace(',', '.'))
+            except ValueError:
+                numero = math.nan
+            if not math.isfinite(numero):
+                erros.append(f'{campo} deve ser um número')
+                continue
+            if numero < 0:
+                erros.append(f'{campo} não pode ser negativo')
+                continue
+            if numero > VALOR_MAXIMO:
+                erros.append(f'{campo} não pode passar de {VALOR_MAXIMO}')
+                continue
+            dados[campo] = int(numero)
+        elif campo == 'preco_unitario':
+            try:
+                # Aceita "1.234,56" e "1234.56"
+                preco = float(valor.replace('.', '').replace(',', '.') if ',' in valor else valor)
+            except ValueError:
+                preco = math.nan
+            if not math.isfinite(preco):
+                erros.append('preco_unitario deve ser um número')
+            elif preco < 0:
+                erros.append('preco_unitario não pode ser negativo')
+            else:
+                dados[campo] = preco
+        else:
+            dados[campo] = valor
+    if not dados.get('codigo_interno'):
+        erros.append('codigo_interno é obrigatório')
+    return dados, erros
+
+
+def aplicar_lote(lote, usuario_id=None, responsavel='Sistema', motivo='Cadastro inicial', dry_run=False):
+    """Upsert de um lote de linhas validadas pelo codigo_interno (sem commit)
+
+    Materiais existentes são buscados com uma única consulta; os novos e suas
+    movimentações de entrada inicial são adicionados de uma vez. Mudanças de
+    quantidade em materiais existentes geram movimentação de ajuste.
+    Retorna (criados, atualizados, erros) com erros no formato do relatório.
+    """
+    codigos = {dados['codigo_interno'] for _, dados in lote}
+    existentes = {m.codigo_interno: m for m in Material.query.filter(Material.codigo_interno.in_(codigos)).all()}
+
+    novos = []
+    movimentacoes = []
+    atualizados = 0
+    erros = []
+    for numero, dados in lote:
+        material = existentes.get(dados['codigo_interno'])
+        if material is None:
+            faltando = [campo for campo in ('nome', 'categoria') if not dados.get(campo)]
+            if faltando:
+                erros.append({'linha': numero, 'codigo_interno': dados['codigo_interno'],
+                              'erros': [f'{campo} é obrigatório para material novo' for campo in faltando]})
+                continue
+            if dry_run:
+                novos.append(None)
+                continue
+            material = Material(usuario_id=usuario_id, **dados)
+            material.quantidade = dados.get('quantidade', 0)
+            material.quantidade_minima = dados.get('quantidade_minima', 10)
+            material.unidade = dados.get('unidade', 'unidade')
+            novos.append(material)
+            continue
+
+        reservado = material.quantidade_reservada or 0
+        if dados.get('quantidade') is not None and dados['quantidade'] < reservado:
+            erros.append({'linha': numero, 'codigo_interno': dados['codigo_interno'],
+                          'erros': [f'quantidade menor que o reservado para atividades ({reservado})']})
+            continue
+
+        atualizados += 1
+        if dry_run:
+            continue
+        quantidade_anterior = material.quantidade
+        for campo, valor in dados.items():
+            if campo != 'quantidade':
+                setattr(material, campo, valor)
+        nova_quantidade = dados.get('quantidade')
+        if nova_quantidade is not None and nova_quantidade != quantidade_anterior:
+            material.quantidade = nova_quantidade
+            movimentacoes.append(MovimentacaoEstoque(
+                material_id=material.id,
+                tipo_movimentacao='entrada' if nova_quantidade > quantidade_anterior else 'saida',
+                quantidade=abs(nova_quantidade - quantidade_anterior),
+                quantidade_anterior=quantidade_anterior,
+                quantidade_atual=nova_quantidade,
+                motivo='Ajuste por importação',
+                responsavel=responsavel,
+                responsavel_id=usuario_id
+            ))
+
+    if not dry_run and novos:
+        # Grava os materiais novos para obter os ids das movimentações de entrada inicial
+        db.session.add_all(novos)
+        db.session.flush()
+        movimentacoes.extend(MovimentacaoEstoque(
+            material_id=material.id,
+            tipo_movimentacao='entrada',
+            quantidade=material.quantidade,
+            quantidade_anterior=0,
+            quantidade_atual=material.quantidade,
+            motivo=motivo,
+            responsavel=responsavel,
+            responsavel_id=usuario_id
+        ) for material in novos if material.quantidade > 0)
+    if movimentacoes:
+        db.session.add_all(movimentacoes)
+        db.session.flush()
+    return len(novos), atualizados, erros
+
+
+def importar_materiais(leitor, usuario_id=None, responsavel='Sistema', dry_run=False, lote=LOTE_PADRAO):
+    """Importa as linhas de um DictReader em lotes, com commit por lote
+
+    No modo dry_run nada é gravado: as linhas são validadas e classificadas
+    em criação/atualização. Retorna o relatório da importação.
+    """
+    relatorio = {'dry_run': dry_run, 'linhas': 0, 'criados': 0, 'atualizados': 0, 'erros': [], 'total_erros': 0}
+    colunas_desconhecidas = [c for c in (leitor.fieldnames or []) if c not in COLUNAS]
+    if colunas_desconhecidas:
+        relatorio['colunas_ignoradas'] = colunas_desconhecidas
+
+    def registrar_erro(erro):
+        relatorio['total_erros'] += 1
+        if len(relatorio['erros']) < MAX_ERROS_RELATORIO:
+            relatorio['erros'].append(erro)
+
+    def processar(pendentes):
+        criados, atualizados, erros = aplicar_lote(pendentes, usuario_id, responsavel, dry_run=dry_run)
+        if not dry_run:
+            db.session.commit()
+        relatorio['criados'] += criados
+        relatorio['atualizados'] += atualizados
+        for erro in erros:
+            registrar_erro(erro)
+
+    vistos = {}
+    pendentes = []
+    # Linha 1 é o cabeçalho
+    for numero, linha in enumerate(leitor, start=2):
+        relatorio['linhas'] += 1
+        dados, erros = validar_linha(linha)
+        codigo = dados.get('codigo_interno')
+        if codigo and codigo in vistos:
+            erros.append(f'codigo_interno repetido no arquivo (linha {vistos[codigo]})')
+        if erros:
+            registrar_erro({'linha': numero, 'codigo_interno': codigo, 'erros': erros})
+            continue
+        vistos[codigo] = numero
+        pendentes.append((numero, dados))
+        if len(pendentes) >= lote:
+            processar(pendentes)
+            pendentes = []
+    if pendentes:
+        processar(pendentes)
+
+    relatorio['erros'].sort(key=lambda erro: erro['linha'])
+    return relatorio
@@ -0,0 +1,122 @@
+import json
+import logging
+import time
+from logging.handlers import RotatingFileHandler
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('fibreco.slow_requests')
+
+DEFAULT_SLOW_REQUEST_MS = 500
+DEFAULT_SLOW_REQUEST_TOP_N = 5
+MAX_STATEMENT_CHARS = 500
+
+_listeners_registered = False
+
+
+def _metricas():
+    if has_request_context():
+        return g.get('_instrumentacao')
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_inicio_consulta', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info['_inicio_consulta'].pop()
+    metricas = _metricas()
+    if metricas is None:
+        return
+    duracao = (time.perf_counter() - inicio) * 1000
+    metricas['sql_count'] += 1
+    metricas['sql_ms'] += duracao
+    # Agrupa por texto do comando (o mesmo SELECT repetido num laço aparece somado)
+    total = metricas['statements'].setdefault(statement, [0, 0.0])
+    total[0] += 1
+    total[1] += duracao
+
+
+def _handle_error(exception_context):
+    # Comando que falhou não chega ao after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('_inicio_consulta'):
+        conn.info['_inicio_consulta'].pop()
+
+
+def _configurar_log(app):
+    if logger.handlers:
+        return
+    caminho = app.config.get('SLOW_REQUEST_LOG')
+    if caminho:
+        handler = RotatingFileHandler(caminho, maxBytes=10 * 1024 * 1024, backupCount=5)
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def init_instrumentation(app):
+    """Mede tempo, consultas SQL e tamanho de cada requisição
+
+    Adiciona o header ``Server-Timing`` e registra em JSON (uma linha por
+    requisição) as que passarem de ``SLOW_REQUEST_MS``, com os
+    ``SLOW_REQUEST_TOP_N`` comandos SQL mais demorados. Deve ser chamado
+    antes de ``init_compression`` para medir o tamanho final da resposta.
+    """
+    global _listeners_registered
+    app.config.setdefault('SLOW_REQUEST_MS', DEFAULT_SLOW_REQUEST_MS)
+    app.config.setdefault('SLOW_REQUEST_TOP_N', DEFAULT_SLOW_REQUEST_TOP_N)
+    app.config.setdefault('SLOW_REQUEST_LOG', None)
+    app.config.setdefault('SERVER_TIMING', True)
+    _configurar_log(app)
+
+    if not _listeners_registered:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _listeners_registered = True
+
+    @app.before_request
+    def iniciar_medicao():
+        g._instrumentacao = {'inicio': time.perf_counter(), 'sql_count': 0, 'sql_ms': 0.0, 'statements': {}}
+
+    @app.after_request
+    def registrar_medicao(response):
+        metricas = g.pop('_instrumentacao', None)
+        if metricas is None:
+            return response
+        duracao = (time.perf_counter() - metricas['inicio']) * 1000
+        tamanho = None if response.is_streamed else response.calculate_content_length()
+
+        if app.config['SERVER_TIMING']:
+            response.headers.add('Server-Timing', f"app;dur={duracao:.1f}")
+            response.headers.add('Server-Timing', f"db;dur={metricas['sql_ms']:.1f};desc=\"{metricas['sql_count']} queries\"")
+
+        if duracao >= app.config['SLOW_REQUEST_MS']:
+            mais_lentos = sorted(metricas['statements'].items(), key=lambda item: item[1][1], reverse=True)
+            logger.warning(json.dumps({
+                'evento': 'slow_request',
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'user_id': g.get('user_id'),
+                'dur_ms': round(duracao, 1),
+                'sql_count': metricas['sql_count'],
+                'sql_ms': round(metricas['sql_ms'], 1),
+                'bytes': tamanho,
+                'top_sql': [
+                    {'sql': sql[:MAX_STATEMENT_CHARS], 'count': contagem, 'ms': round(total, 1)}
+                    for sql, (contagem, total) in mais_lentos[:app.config['SLOW_REQUEST_TOP_N']]
+                ]
+            }, ensure_ascii=False))
+        return response
+
+    return registrar_medicao
@@ -0,0 +1,65 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da stdlib
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Provider de JSON que usa orjson quando disponível
+
+    Mantém o comportamento do provider padrão do Flask (tipos extras via
+    ``default``, ``sort_keys``) e cai para o json da stdlib quando o orjson
+    não está instalado, quando são pedidas opções que ele não suporta
+    (ex.: ``indent`` no modo debug) ou quando o objeto não é serializável.
+    """
+
+    def __init__(self, app, backend='auto'):
+        super().__init__(app)
+        if backend == 'auto':
+            backend = 'orjson' if orjson is not None else 'json'
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_BACKEND=orjson, mas o pacote orjson não está instalado')
+        self.backend = backend
+
+    def _orjson_options(self):
+        # Datas e dataclasses passam pelo ``default`` para manter o formato do Flask
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def _dumps_bytes(self, obj):
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options())
+
+    def dumps(self, obj, **kwargs):
+        if self.backend != 'orjson' or kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._dumps_bytes(obj).decode('utf-8')
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if self.backend != 'orjson' or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if self.backend != 'orjson' or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            data = self._dumps_bytes(obj)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(data + b'\n', mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Instala o provider de JSON configurado em ``JSON_BACKEND``"""
+    app.config.setdefault('JSON_BACKEND', 'auto')
+    app.json = FastJSONProvider(app, backend=app.config['JSON_BACKEND'])
+    return app.json
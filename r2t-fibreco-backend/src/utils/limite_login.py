@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+# Tentativas de login: rajada inicial e reposição por minuto (0 desativa o limite)
+DEFAULT_LOGIN_RATE_USERNAME_BURST = 5
+DEFAULT_LOGIN_RATE_USERNAME_PER_MIN = 5
+DEFAULT_LOGIN_RATE_IP_BURST = 20
+DEFAULT_LOGIN_RATE_IP_PER_MIN = 30
+MAX_CHAVES = 10000
+
+
+class LimitadorTaxa:
+    """Token bucket em memória por chave (username ou IP)
+
+    Cada chave começa com ``capacidade`` fichas e ganha ``por_minuto`` fichas por
+    minuto; cada tentativa consome uma. As chaves menos usadas são descartadas
+    acima de ``MAX_CHAVES`` (um balde descartado volta cheio).
+    """
+
+    def __init__(self, max_chaves=MAX_CHAVES):
+        self.max_chaves = max_chaves
+        self._baldes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, chave, capacidade, por_minuto):
+        """Retorna 0 se a tentativa é permitida ou os segundos até haver uma ficha"""
+        if capacidade <= 0 or por_minuto <= 0:
+            return 0
+        agora = time.monotonic()
+        taxa = por_minuto / 60.0
+        with self._lock:
+            fichas, ultimo = self._baldes.pop(chave, (capacidade, agora))
+            fichas = min(capacidade, fichas + (agora - ultimo) * taxa)
+            espera = 0
+            if fichas >= 1:
+                fichas -= 1
+            else:
+                espera = (1 - fichas) / taxa
+            self._baldes[chave] = (fichas, agora)
+            while len(self._baldes) > self.max_chaves:
+                self._baldes.popitem(last=False)
+        return espera
+
+    def limpar(self):
+        with self._lock:
+            self._baldes.clear()
+
+
+por_usuario = LimitadorTaxa()
+por_ip = LimitadorTaxa()
+
+
+def init_limite_login(app):
+    """Configura os limites e, atrás de proxy reverso, o IP real do cliente
+
+    Com ``TRUSTED_PROXIES = n`` o último IP acrescentado por cada um dos ``n``
+    proxies em X-Forwarded-For vira o ``request.remote_addr``; sem isso todos
+    os logins atrás do nginx dividiriam o balde de 127.0.0.1. Só ative se a
+    aplicação não puder ser acessada sem passar pelos proxies (o cabeçalho
+    enviado pelo cliente seria aceito).
+    """
+    app.config.setdefault('LOGIN_RATE_USERNAME_BURST', DEFAULT_LOGIN_RATE_USERNAME_BURST)
+    app.config.setdefault('LOGIN_RATE_USERNAME_PER_MIN', DEFAULT_LOGIN_RATE_USERNAME_PER_MIN)
+    app.config.setdefault('LOGIN_RATE_IP_BURST', DEFAULT_LOGIN_RATE_IP_BURST)
+    app.config.setdefault('LOGIN_RATE_IP_PER_MIN', DEFAULT_LOGIN_RATE_IP_PER_MIN)
+    app.config.setdefault('TRUSTED_PROXIES', 0)
+    if app.config['TRUSTED_PROXIES']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'],
+                                x_proto=app.config['TRUSTED_PROXIES'])
+
+
+def verificar_tentativa(username, ip):
+    """Consome uma ficha do IP e do username; retorna (limite, segundos) se bloqueado, senão None"""
+    config = current_app.config
+    espera = por_ip.consumir(ip, config.get('LOGIN_RATE_IP_BURST', DEFAULT_LOGIN_RATE_IP_BURST),
+                             config.get('LOGIN_RATE_IP_PER_MIN', DEFAULT_LOGIN_RATE_IP_PER_MIN))
+    if espera:
+        return 'ip', espera
+    # Username normalizado: variações de maiúsculas não ganham baldes próprios
+    espera = por_usuario.consumir(username.strip().lower(),
+                                  config.get('LOGIN_RATE_USERNAME_BURST', DEFAULT_LOGIN_RATE_USERNAME_BURST),
+                                  config.get('LOGIN_RATE_USERNAME_PER_MIN', DEFAULT_LOGIN_RATE_USERNAME_PER_MIN))
+    if espera:
+        return 'usuario', espera
+    return None
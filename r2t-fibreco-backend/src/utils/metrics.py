@@ -0,0 +1,208 @@
+import functools
+import os
+import time
+
+from flask import Response, g, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                                   generate_latest, multiprocess)
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # prometheus_client é opcional; sem ele as métricas viram no-op
+    Counter = None
+
+# Com PROMETHEUS_MULTIPROC_DIR definido (gunicorn com vários workers) cada
+# processo grava seus valores em arquivos mmap nesse diretório e o /metrics
+# agrega todos; sem ele as métricas ficam no registro do próprio processo
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_listeners_registered = False
+
+if Counter is not None:
+    REQUEST_LATENCY = Histogram(
+        'fibreco_http_request_duration_seconds', 'Duração das requisições HTTP',
+        ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS
+    )
+    REQUESTS = Counter(
+        'fibreco_http_requests_total', 'Requisições HTTP por status',
+        ['blueprint', 'endpoint', 'method', 'status']
+    )
+    PDF_RENDERS = Counter('fibreco_pdf_renders_total', 'PDFs gerados por tipo', ['tipo'])
+    PDF_DURATION = Histogram(
+        'fibreco_pdf_render_duration_seconds', 'Tempo de geração dos PDFs', ['tipo'],
+        buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 60)
+    )
+    UPLOAD_BYTES = Counter('fibreco_upload_bytes_total', 'Bytes recebidos em uploads de imagens')
+    MOVIMENTACOES = Counter(
+        'fibreco_stock_movements_total', 'Movimentações de estoque gravadas', ['tipo_movimentacao']
+    )
+    AUTH_LOOKUPS = Counter(
+        'fibreco_auth_token_lookups_total', 'Validações de token (hit = sem consulta ao banco)', ['resultado']
+    )
+    LOGIN_BLOQUEADOS = Counter(
+        'fibreco_login_throttled_total', 'Logins recusados antes do hash da senha', ['motivo']
+    )
+    SESSOES_REMOVIDAS = Counter(
+        'fibreco_sessions_cleaned_total', 'Sessões expiradas ou encerradas removidas pela limpeza'
+    )
+    SESSOES_EXCEDENTES = Counter(
+        'fibreco_sessions_evicted_total', 'Sessões encerradas pelo limite de sessões por usuário'
+    )
+    LIMPEZA_SESSOES = Histogram(
+        'fibreco_session_cleanup_duration_seconds', 'Duração de cada execução da limpeza de sessões',
+        buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 30, 120)
+    )
+    ULTIMA_LIMPEZA_SESSOES = Gauge(
+        'fibreco_session_cleanup_last_run_timestamp_seconds', 'Fim da última limpeza de sessões (unix)',
+        multiprocess_mode='max'
+    )
+
+
+def registrar_upload(tamanho):
+    if Counter is not None and tamanho:
+        UPLOAD_BYTES.inc(tamanho)
+
+
+def registrar_auth(resultado):
+    """resultado: 'hit' (resolvido sem o banco), 'miss' (consulta à tabela sessions) ou 'invalido'"""
+    if Counter is not None:
+        AUTH_LOOKUPS.labels(resultado=resultado).inc()
+
+
+def registrar_login_bloqueado(motivo):
+    """motivo: 'ip' ou 'usuario' (limite de tentativas) ou 'ocupado' (fila de hashing cheia)"""
+    if Counter is not None:
+        LOGIN_BLOQUEADOS.labels(motivo=motivo).inc()
+
+
+def registrar_sessoes_removidas(quantidade):
+    """Chamado a cada lote apagado, para acompanhar o andamento de uma limpeza longa"""
+    if Counter is not None and quantidade:
+        SESSOES_REMOVIDAS.inc(quantidade)
+
+
+def registrar_sessoes_excedentes(quantidade):
+    if Counter is not None and quantidade:
+        SESSOES_EXCEDENTES.inc(quantidade)
+
+
+def registrar_limpeza_sessoes(duracao):
+    if Counter is not None:
+        LIMPEZA_SESSOES.observe(duracao)
+        ULTIMA_LIMPEZA_SESSOES.set_to_current_time()
+
+
+def medir_pdf(tipo):
+    """Decorator que conta e mede a geração de um PDF"""
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated_function(*args, **kwargs):
+            if Counter is None:
+                return f(*args, **kwargs)
+            inicio = time.perf_counter()
+            response = f(*args, **kwargs)
+            if getattr(response, 'mimetype', None) == 'application/pdf':
+                PDF_RENDERS.labels(tipo=tipo).inc()
+                PDF_DURATION.labels(tipo=tipo).observe(time.perf_counter() - inicio)
+            return response
+        return decorated_function
+    return decorator
+
+
+def _after_flush(session, flush_context):
+    from src.models.material import MovimentacaoEstoque
+    for obj in session.new:
+        if isinstance(obj, MovimentacaoEstoque):
+            pendentes = session.info.setdefault('metricas_movimentacoes', {})
+            pendentes[obj.tipo_movimentacao] = pendentes.get(obj.tipo_movimentacao, 0) + 1
+
+
+def _after_commit(session):
+    # Só conta o que de fato foi gravado
+    for tipo, quantidade in session.info.pop('metricas_movimentacoes', {}).items():
+        MOVIMENTACOES.labels(tipo_movimentacao=tipo).inc(quantidade)
+
+
+def _after_rollback(session):
+    session.info.pop('metricas_movimentacoes', None)
+
+
+class PoolCollector:
+    """Uso do pool de conexões do processo que atende o /metrics"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def collect(self):
+        pool = self.engine.pool
+        gauge = GaugeMetricFamily('fibreco_db_pool_connections', 'Conexões do pool do SQLAlchemy',
+                                  labels=['estado', 'pid'])
+        pid = str(os.getpid())
+        for estado, metodo in (('em_uso', 'checkedout'), ('tamanho', 'size'), ('overflow', 'overflow')):
+            if hasattr(pool, metodo):
+                gauge.add_metric([estado, pid], getattr(pool, metodo)())
+        yield gauge
+
+
+def marcar_processo_encerrado(pid):
+    """Para o hook child_exit do gunicorn no modo multiprocesso"""
+    if Counter is not None and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+def init_metrics(app, db):
+    """Registra a coleta de métricas e o endpoint /metrics
+
+    Com ``METRICS_TOKEN`` definido o endpoint exige ``Authorization: Bearer <token>``.
+    """
+    global _listeners_registered
+    app.config.setdefault('METRICS_TOKEN', None)
+
+    @app.route('/metrics')
+    def metrics():
+        token = app.config['METRICS_TOKEN']
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return jsonify({'error': 'Token de acesso requerido'}), 401
+        if Counter is None:
+            return jsonify({'error': 'Métricas indisponíveis: instale o pacote prometheus_client'}), 501
+
+        if MULTIPROC_DIR:
+            # Agrega os arquivos de todos os workers; o pool é o deste processo
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            registry.register(PoolCollector(db.engine))
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+    if Counter is None:
+        return
+
+    if not _listeners_registered:
+        if not MULTIPROC_DIR:
+            with app.app_context():
+                REGISTRY.register(PoolCollector(db.engine))
+        event.listen(OrmSession, 'after_flush', _after_flush)
+        event.listen(OrmSession, 'after_commit', _after_commit)
+        event.listen(OrmSession, 'after_rollback', _after_rollback)
+        _listeners_registered = True
+
+    @app.before_request
+    def iniciar_metricas():
+        g._metricas_inicio = time.perf_counter()
+
+    @app.after_request
+    def registrar_metricas(response):
+        inicio = g.pop('_metricas_inicio', None)
+        if inicio is None or request.endpoint in ('metrics', 'static', 'serve'):
+            return response
+        blueprint = request.blueprint or 'app'
+        endpoint = request.endpoint or 'nao_encontrado'
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - inicio)
+        REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+        return response
+
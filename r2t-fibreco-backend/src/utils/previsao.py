@@ -0,0 +1,199 @@
+import math
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session as OrmSession
+
+from src.models.auth import db
+from src.models.consumo import ConsumoDiario
+from src.models.material import MovimentacaoEstoque
+
+DEFAULTS = {
+    'FORECAST_WINDOW_DAYS': 90,    # histórico considerado
+    'FORECAST_ALPHA': 0.2,         # suavização exponencial (peso do dia mais recente)
+    'FORECAST_LEAD_TIME_DAYS': 7,  # prazo de entrega do fornecedor
+    'FORECAST_COVERAGE_DAYS': 30,  # dias de consumo que cada compra deve cobrir
+}
+
+_config = dict(DEFAULTS)
+_listeners_registered = False
+
+# INSERT ... ON CONFLICT DO UPDATE por dialeto; nos demais bancos, UPDATE e INSERT linha a linha
+UPSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+
+def _after_flush(session, flush_context):
+    # Acumula as saídas novas no agregado diário (upsert por material/dia)
+    totais = {}
+    for obj in session.new:
+        if isinstance(obj, MovimentacaoEstoque) and obj.tipo_movimentacao == 'saida':
+            chave = (obj.material_id, (obj.data_movimentacao or datetime.utcnow()).date())
+            quantidade, movimentos = totais.get(chave, (0, 0))
+            totais[chave] = (quantidade + obj.quantidade, movimentos + 1)
+    if not totais:
+        return
+
+    somar_consumo(session.connection(), [
+        {'material_id': material_id, 'dia': dia, 'quantidade': quantidade, 'movimentos': movimentos}
+        for (material_id, dia), (quantidade, movimentos) in totais.items()
+    ])
+
+
+def somar_consumo(connection, linhas):
+    """Soma as linhas (material_id, dia, quantidade, movimentos) ao agregado diário"""
+    tabela = ConsumoDiario.__table__
+    upsert = UPSERTS.get(connection.dialect.name)
+    if upsert is not None:
+        stmt = upsert(tabela)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['material_id', 'dia'],
+            set_={
+                'quantidade': tabela.c.quantidade + stmt.excluded.quantidade,
+                'movimentos': tabela.c.movimentos + stmt.excluded.movimentos,
+            }
+        )
+        connection.execute(stmt, linhas)
+        return
+
+    for linha in linhas:
+        atualizadas = connection.execute(
+            update(tabela)
+            .where(tabela.c.material_id == linha['material_id'], tabela.c.dia == linha['dia'])
+            .values(quantidade=tabela.c.quantidade + linha['quantidade'],
+                    movimentos=tabela.c.movimentos + linha['movimentos'])
+        ).rowcount
+        if not atualizadas:
+            connection.execute(insert(tabela), linha)
+
+
+def recalcular_consumo():
+    """Reconstrói o agregado diário a partir de todas as movimentações de saída"""
+    tabela = ConsumoDiario.__table__
+    dia = func.date(MovimentacaoEstoque.data_movimentacao)
+    connection = db.session.connection()
+    connection.execute(delete(tabela))
+    connection.execute(insert(tabela).from_select(
+        ['material_id', 'dia', 'quantidade', 'movimentos'],
+        select(MovimentacaoEstoque.material_id, dia, func.sum(MovimentacaoEstoque.quantidade), func.count())
+        .where(MovimentacaoEstoque.tipo_movimentacao == 'saida')
+        .group_by(MovimentacaoEstoque.material_id, dia)
+    ))
+    db.session.commit()
+
+
+def init_previsao(app):
+    """Registra a manutenção do agregado diário e o preenche na primeira execução"""
+    global _listeners_registered
+    for chave, valor in DEFAULTS.items():
+        app.config.setdefault(chave, valor)
+        _config[chave] = app.config[chave]
+    if not _listeners_registered:
+        event.listen(OrmSession, 'after_flush', _after_flush)
+        _listeners_registered = True
+
+    with app.app_context():
+        vazio = db.session.query(ConsumoDiario.material_id).first() is None
+        if vazio and db.session.query(MovimentacaoEstoque.id).filter_by(tipo_movimentacao='saida').first():
+            recalcular_consumo()
+
+
+def _taxas(dias, inicio, hoje):
+    """Média móvel de 7/30 dias e média exponencial a partir de {dia: quantidade}"""
+    janela = (hoje - inicio).days + 1
+    alpha = _config['FORECAST_ALPHA']
+    total = sum(dias.values())
+
+    # Começa pela média simples da janela e aplica a suavização dia a dia;
+    # sequências de dias sem consumo são aplicadas de uma vez ((1 - alpha) ** n)
+    ewma = total / janela
+    anterior = inicio - timedelta(days=1)
+    for dia in sorted(dias):
+        ewma *= (1 - alpha) ** ((dia - anterior).days - 1)
+        ewma = alpha * dias[dia] + (1 - alpha) * ewma
+        anterior = dia
+    ewma *= (1 - alpha) ** (hoje - anterior).days
+
+    def media(n):
+        corte = hoje - timedelta(days=n - 1)
+        return sum(q for dia, q in dias.items() if dia >= corte) / n
+
+    return {
+        'media_7d': round(media(7), 3),
+        'media_30d': round(media(30), 3),
+        'media_janela': round(total / janela, 3),
+        'taxa_diaria': round(ewma, 3)
+    }
+
+
+def _previsao(material, dias, inicio, hoje):
+    taxas = _taxas(dias, inicio, hoje)
+    taxa = taxas['taxa_diaria']
+    disponivel = material.disponivel
+    lead_time = _config['FORECAST_LEAD_TIME_DAYS']
+    cobertura = _config['FORECAST_COVERAGE_DAYS']
+
+    # Ponto de reposição: consumo esperado no prazo de entrega mais o mínimo como estoque de segurança
+    ponto_reposicao = math.ceil(taxa * lead_time) + (material.quantidade_minima or 0)
+    sugerido = 0
+    if disponivel <= ponto_reposicao:
+        sugerido = max(math.ceil(taxa * (lead_time + cobertura)) + (material.quantidade_minima or 0) - disponivel, 0)
+
+    dias_ate_ruptura = None
+    data_ruptura = None
+    if taxa > 0:
+        dias_ate_ruptura = round(max(disponivel, 0) / taxa, 1)
+        try:
+            data_ruptura = (hoje + timedelta(days=math.floor(dias_ate_ruptura))).isoformat()
+        except OverflowError:
+            # Consumo residual (taxa perto de zero): ruptura além do calendário
+            data_ruptura = None
+
+    return {
+        'material_id': material.id,
+        'material_nome': material.nome,
+        'unidade': material.unidade,
+        'quantidade': material.quantidade,
+        'disponivel': disponivel,
+        'quantidade_minima': material.quantidade_minima,
+        **taxas,
+        'dias_ate_ruptura': dias_ate_ruptura,
+        'data_ruptura': data_ruptura,
+        'ponto_reposicao': ponto_reposicao,
+        'quantidade_sugerida': sugerido,
+        'repor': sugerido > 0
+    }
+
+
+def previsoes(materiais, hoje=None):
+    """Previsão de consumo de vários materiais com uma consulta ao agregado diário"""
+    hoje = hoje or datetime.utcnow().date()
+    inicio = hoje - timedelta(days=_config['FORECAST_WINDOW_DAYS'] - 1)
+    ids = [m.id for m in materiais]
+    historico = {material_id: {} for material_id in ids}
+    if ids:
+        consulta = db.session.query(ConsumoDiario.material_id, ConsumoDiario.dia, ConsumoDiario.quantidade)\
+            .filter(ConsumoDiario.dia >= inicio, ConsumoDiario.dia <= hoje)
+        # Para poucos materiais filtra pelo id; para o relatório completo lê a janela inteira
+        if len(ids) <= 500:
+            consulta = consulta.filter(ConsumoDiario.material_id.in_(ids))
+        for material_id, dia, quantidade in consulta:
+            if material_id in historico:
+                historico[material_id][dia] = quantidade
+    return [_previsao(material, historico[material.id], inicio, hoje) for material in materiais]
+
+
+def previsao_material(material, hoje=None):
+    """Previsão de um material com a série diária da janela"""
+    hoje = hoje or datetime.utcnow().date()
+    inicio = hoje - timedelta(days=_config['FORECAST_WINDOW_DAYS'] - 1)
+    serie = db.session.query(ConsumoDiario.dia, ConsumoDiario.quantidade)\
+        .filter(ConsumoDiario.material_id == material.id, ConsumoDiario.dia >= inicio, ConsumoDiario.dia <= hoje)\
+        .order_by(ConsumoDiario.dia).all()
+    resultado = _previsao(material, {dia: quantidade for dia, quantidade in serie}, inicio, hoje)
+    resultado['janela_dias'] = _config['FORECAST_WINDOW_DAYS']
+    resultado['historico'] = [{'dia': dia.isoformat(), 'quantidade': quantidade} for dia, quantidade in serie]
+    return resultado
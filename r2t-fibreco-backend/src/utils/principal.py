@@ -0,0 +1,86 @@
+from flask import g
+from sqlalchemy import select
+
+from src.models.auth import db, User, UserRole, role_has_permission
+from src.models.material import Material, MovimentacaoEstoque, Atividade
+
+
+class Principal:
+    """Usuário da requisição, montado uma vez no login_required
+
+    ``id`` e ``role`` vêm da sessão ou do token assinado, então decidir o
+    escopo de uma consulta não custa acesso ao banco. Os demais atributos
+    (nome_completo, email...) são lidos do registro do usuário, carregado na
+    primeira vez que forem usados.
+    """
+
+    def __init__(self, user_id, role, user=None):
+        self.id = user_id
+        self.role = role
+        self._user = user
+
+    @property
+    def user(self):
+        # Referência forte: o identity map da sessão guarda só referências fracas
+        if self._user is None:
+            self._user = db.session.get(User, self.id)
+        return self._user
+
+    def __getattr__(self, nome):
+        if nome.startswith('_'):
+            raise AttributeError(nome)
+        return getattr(self.user, nome)
+
+    def is_admin(self):
+        return self.role == UserRole.ADMIN
+
+    def is_supervisor(self):
+        return self.role == UserRole.SUPERVISOR
+
+    def is_user(self):
+        return self.role == UserRole.USER
+
+    def has_permission(self, required_role):
+        return role_has_permission(self.role, required_role)
+
+
+def principal_atual():
+    return g.principal
+
+
+def escopo_materiais(query, principal):
+    """Usuários comuns veem apenas seus materiais; supervisores e admins veem todos"""
+    if principal.is_user():
+        query = query.filter(Material.usuario_id == principal.id)
+    return query
+
+
+def escopo_movimentacoes(query, principal):
+    """Movimentações dos materiais visíveis ao usuário
+
+    Subconsulta em vez de join: funciona também em consultas que já fazem
+    join com Material e usa o índice de material.usuario_id.
+    """
+    if principal.is_user():
+        query = query.filter(MovimentacaoEstoque.material_id.in_(
+            select(Material.id).where(Material.usuario_id == principal.id)
+        ))
+    return query
+
+
+def escopo_atividades(query, principal):
+    """Admins veem todas; supervisores, as que criaram; usuários, as atribuídas a eles"""
+    if principal.is_supervisor():
+        query = query.filter(Atividade.supervisor_id == principal.id)
+    elif principal.is_user():
+        query = query.filter(Atividade.usuario_id == principal.id)
+    return query
+
+
+def pode_acessar_atividade(principal, atividade):
+    """Mesma regra do escopo_atividades, para uma atividade já carregada"""
+    if principal.is_supervisor():
+        return atividade.supervisor_id == principal.id
+    if principal.is_user():
+        return atividade.usuario_id == principal.id
+    return True
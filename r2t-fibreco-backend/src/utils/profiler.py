@@ -0,0 +1,147 @@
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+
+from flask import g, request
+
+# Endpoints amostrados por PROFILE_SAMPLE_RATE quando PROFILE_ENDPOINTS não é definido
+DEFAULT_PROFILE_ENDPOINTS = (
+    'material.relatorio_mensal',
+    'material.gerar_pdf_atividade',
+    'material.gerar_pdf_movimentacao',
+)
+
+NOME_PERFIL_RE = re.compile(r'^[\w.-]+\.prof$')
+
+# O cProfile mede só a thread em que foi ativado e não admite dois perfis
+# simultâneos de forma confiável; uma requisição perfilada por vez
+_lock = threading.Lock()
+
+
+def _admin_solicitante():
+    """Confere se o token da requisição pertence a um administrador ativo"""
+    from src.models.auth import Session
+    from src.utils.tokens import modo_assinado, revogado, verificar_token
+
+    token = request.headers.get('Authorization', '')
+    if token.startswith('Bearer '):
+        token = token[7:]
+    if not token:
+        return False
+    if modo_assinado():
+        dados = verificar_token(token)
+        return bool(dados and dados['role'] == 'admin' and not revogado(dados))
+    user_session = Session.query.filter_by(token=token, ativo=True).first()
+    return bool(user_session and user_session.is_valid() and user_session.user.is_admin() and user_session.user.ativo)
+
+
+def _deve_perfilar(app):
+    if request.args.get('__profile') == '1':
+        return _admin_solicitante()
+    taxa = app.config['PROFILE_SAMPLE_RATE']
+    if not taxa or request.endpoint not in app.config['PROFILE_ENDPOINTS']:
+        return False
+    return random.random() < taxa
+
+
+def _rotacionar(diretorio, maximo):
+    arquivos = sorted(
+        (os.path.join(diretorio, nome) for nome in os.listdir(diretorio) if nome.endswith('.prof')),
+        key=os.path.getmtime
+    )
+    for caminho in arquivos[:max(len(arquivos) - maximo, 0)]:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+def listar_perfis(diretorio):
+    """Perfis gravados, do mais recente para o mais antigo"""
+    if not os.path.isdir(diretorio):
+        return []
+    perfis = []
+    for nome in os.listdir(diretorio):
+        if not NOME_PERFIL_RE.match(nome):
+            continue
+        caminho = os.path.join(diretorio, nome)
+        stat = os.stat(caminho)
+        # Nome: <timestamp>_<endpoint>_<duração>ms.prof
+        _, _, resto = nome[:-len('.prof')].partition('_')
+        endpoint, duracao = None, None
+        if resto.endswith('ms'):
+            endpoint, _, duracao = resto[:-2].rpartition('_')
+        perfis.append({
+            'nome': nome,
+            'endpoint': endpoint or None,
+            'duracao_ms': int(duracao) if duracao and duracao.isdigit() else None,
+            'tamanho': stat.st_size,
+            'data_criacao': datetime.fromtimestamp(stat.st_mtime).isoformat()
+        })
+    perfis.sort(key=lambda p: p['data_criacao'], reverse=True)
+    return perfis
+
+
+def caminho_perfil(diretorio, nome):
+    """Caminho de um perfil pelo nome, ou None se inválido/inexistente"""
+    if not NOME_PERFIL_RE.match(nome):
+        return None
+    caminho = os.path.join(diretorio, nome)
+    return caminho if os.path.isfile(caminho) else None
+
+
+def init_profiler(app):
+    """Perfila requisições com cProfile sob demanda (``?__profile=1``, só admin) ou por amostragem
+
+    Cada perfil é gravado em ``PROFILE_DIR`` no formato do pstats (abre com
+    ``python -m pstats``, snakeviz ou flameprof); só os ``PROFILE_MAX_FILES``
+    mais recentes são mantidos.
+    """
+    app.config.setdefault('PROFILE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'profiles'))
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+    app.config.setdefault('PROFILE_ENDPOINTS', DEFAULT_PROFILE_ENDPOINTS)
+    app.config.setdefault('PROFILE_MAX_FILES', 50)
+
+    @app.before_request
+    def iniciar_perfil():
+        if not _deve_perfilar(app) or not _lock.acquire(blocking=False):
+            return
+        profiler = cProfile.Profile()
+        g._perfil = (profiler, time.perf_counter())
+        profiler.enable()
+
+    @app.after_request
+    def gravar_perfil(response):
+        perfil = g.pop('_perfil', None)
+        if perfil is None:
+            return response
+        profiler, inicio = perfil
+        try:
+            profiler.disable()
+        finally:
+            _lock.release()
+
+        duracao_ms = int((time.perf_counter() - inicio) * 1000)
+        diretorio = app.config['PROFILE_DIR']
+        endpoint = re.sub(r'[^\w.-]', '-', request.endpoint or 'nao_encontrado')
+        nome = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}_{endpoint}_{duracao_ms}ms.prof"
+        try:
+            os.makedirs(diretorio, exist_ok=True)
+            profiler.dump_stats(os.path.join(diretorio, nome))
+            _rotacionar(diretorio, app.config['PROFILE_MAX_FILES'])
+            response.headers['X-Profile'] = nome
+        except OSError as e:
+            print(f"Erro ao gravar perfil: {e}")
+        return response
+
+    @app.teardown_request
+    def liberar_perfil(exc):
+        # Requisição que terminou em exceção não passa pelo after_request
+        perfil = g.pop('_perfil', None)
+        if perfil is not None:
+            perfil[0].disable()
+            _lock.release()
@@ -0,0 +1,117 @@
+from sqlalchemy import case, func, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from src.models.auth import db
+from src.models.material import Material, ReservaEstoque
+from src.utils.timezone import get_recife_time_utc
+
+_material = Material.__table__
+
+
+class EstoqueInsuficiente(Exception):
+    """O disponível do material não cobre a reserva (outra requisição reservou antes)"""
+
+    def __init__(self, material):
+        super().__init__(f'Estoque insuficiente para o material {material.id}')
+        self.material = material
+
+
+def _atualizar_reservado(material, stmt):
+    """Executa o UPDATE de quantidade_reservada e sincroniza o objeto sem marcá-lo como alterado
+
+    Retorna False se nenhuma linha foi atualizada.
+    """
+    if db.session.get_bind(mapper=Material).dialect.update_returning:
+        valor = db.session.execute(stmt.returning(_material.c.quantidade_reservada)).scalar()
+        if valor is None:
+            return False
+        set_committed_value(material, 'quantidade_reservada', valor)
+        return True
+    if not db.session.execute(stmt).rowcount:
+        return False
+    db.session.expire(material, ['quantidade_reservada'])
+    return True
+
+
+def _reservar_saldo(material, quantidade):
+    """Soma ``quantidade`` ao reservado no próprio UPDATE, só se houver disponível
+
+    Reservas concorrentes não se sobrescrevem e não passam do estoque.
+    """
+    reservado = func.coalesce(_material.c.quantidade_reservada, 0)
+    stmt = update(_material)\
+        .where(_material.c.id == material.id, _material.c.quantidade - reservado >= quantidade)\
+        .values(quantidade_reservada=reservado + quantidade)
+    if not _atualizar_reservado(material, stmt):
+        raise EstoqueInsuficiente(material)
+
+
+def _devolver_saldo(material, quantidade):
+    reservado = func.coalesce(_material.c.quantidade_reservada, 0)
+    stmt = update(_material)\
+        .where(_material.c.id == material.id)\
+        .values(quantidade_reservada=case((reservado > quantidade, reservado - quantidade), else_=0))
+    _atualizar_reservado(material, stmt)
+
+
+def _registrar(atividade, material, quantidade):
+    reserva = ReservaEstoque(material=material, quantidade=quantidade, status='ativa')
+    atividade.reservas.append(reserva)
+    return reserva
+
+
+def reservar(atividade, material, quantidade):
+    """Reserva ``quantidade`` do material para a atividade (sem commit)
+
+    A disponibilidade deve ser validada pelo chamador; se ela mudou nesse meio
+    tempo, levanta EstoqueInsuficiente e a transação deve ser desfeita.
+    """
+    if not material or not quantidade or quantidade <= 0:
+        return None
+    _reservar_saldo(material, quantidade)
+    return _registrar(atividade, material, quantidade)
+
+
+def reservar_lote(itens):
+    """Como ``reservar`` para vários (atividade, material, quantidade), com um UPDATE por material"""
+    itens = [(atividade, material, quantidade) for atividade, material, quantidade in itens
+             if material and quantidade and quantidade > 0]
+    totais = {}
+    for _, material, quantidade in itens:
+        totais[material] = totais.get(material, 0) + quantidade
+    for material, quantidade in totais.items():
+        _reservar_saldo(material, quantidade)
+    return [_registrar(atividade, material, quantidade) for atividade, material, quantidade in itens]
+
+
+def reservas_ativas(atividade):
+    return [reserva for reserva in atividade.reservas if reserva.status == 'ativa']
+
+
+def reservado_por_material(atividade):
+    """{material_id: quantidade} das reservas ativas da atividade"""
+    total = {}
+    for reserva in reservas_ativas(atividade):
+        total[reserva.material_id] = total.get(reserva.material_id, 0) + reserva.quantidade
+    return total
+
+
+def _encerrar(atividade, status):
+    agora = get_recife_time_utc()
+    devolver = {}
+    for reserva in reservas_ativas(atividade):
+        devolver[reserva.material] = devolver.get(reserva.material, 0) + reserva.quantidade
+        reserva.status = status
+        reserva.data_encerramento = agora
+    for material, quantidade in devolver.items():
+        _devolver_saldo(material, quantidade)
+
+
+def liberar(atividade):
+    """Devolve ao disponível as reservas ativas (cancelamento, exclusão ou edição)"""
+    _encerrar(atividade, 'liberada')
+
+
+def consumir(atividade):
+    """Encerra as reservas na conclusão; a baixa real vem dos materiais usados"""
+    _encerrar(atividade, 'consumida')
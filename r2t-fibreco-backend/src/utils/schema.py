@@ -0,0 +1,27 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
+from src.models.auth import db
+
+
+def upgrade_schema(app):
+    """Aplica em bancos existentes o que o create_all não faz
+
+    O create_all só cria tabelas novas; colunas e índices declarados depois
+    nos modelos são adicionados aqui (ALTER TABLE ADD COLUMN / CREATE INDEX
+    IF NOT EXISTS). Colunas novas NOT NULL precisam de server_default.
+    """
+    with app.app_context():
+        engine = db.engine
+        inspector = inspect(engine)
+        with engine.begin() as connection:
+            for table in db.metadata.sorted_tables:
+                existentes = {col['name'] for col in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existentes:
+                        ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                        connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+                        print(f"Coluna adicionada: {table.name}.{column.name}")
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
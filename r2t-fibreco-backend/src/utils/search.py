@@ -0,0 +1,105 @@
+import re
+
+from sqlalchemy import and_, or_, text
+
+from src.models.auth import db
+from src.models.material import Material
+
+FTS_COLUMNS = ['nome', 'descricao', 'codigo_interno', 'codigo_fornecedor', 'fornecedor']
+
+# Pesos do bm25 na mesma ordem das colunas: nome e códigos valem mais
+FTS_WEIGHTS = '10.0, 1.0, 8.0, 8.0, 3.0'
+
+_colunas = ', '.join(FTS_COLUMNS)
+_novos = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+_antigos = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+
+FTS_DDL = [
+    # remove_diacritics 2: "conexao" encontra "conexão"; prefix acelera buscas parciais
+    f"""CREATE VIRTUAL TABLE material_fts USING fts5(
+        {_colunas}, content='material', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS material_fts_ai AFTER INSERT ON material BEGIN
+        INSERT INTO material_fts(rowid, {_colunas}) VALUES (new.id, {_novos});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS material_fts_ad AFTER DELETE ON material BEGIN
+        INSERT INTO material_fts(material_fts, rowid, {_colunas}) VALUES ('delete', old.id, {_antigos});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS material_fts_au AFTER UPDATE OF {_colunas} ON material BEGIN
+        INSERT INTO material_fts(material_fts, rowid, {_colunas}) VALUES ('delete', old.id, {_antigos});
+        INSERT INTO material_fts(rowid, {_colunas}) VALUES (new.id, {_novos});
+    END""",
+]
+
+_fts_disponivel = False
+
+
+def init_search(app):
+    """Cria o índice FTS5 de materiais (SQLite) e os triggers que o mantêm"""
+    global _fts_disponivel
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            return False
+        try:
+            existe = db.session.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'material_fts'"
+            )).first()
+            if not existe:
+                for ddl in FTS_DDL:
+                    db.session.execute(text(ddl))
+                # Indexar os materiais já cadastrados
+                db.session.execute(text("INSERT INTO material_fts(material_fts) VALUES ('rebuild')"))
+            else:
+                for ddl in FTS_DDL[1:]:
+                    db.session.execute(text(ddl))
+            db.session.commit()
+            _fts_disponivel = True
+        except Exception as e:
+            db.session.rollback()
+            print(f"Busca textual FTS5 indisponível, usando LIKE: {e}")
+            _fts_disponivel = False
+    return _fts_disponivel
+
+
+def tokenizar(consulta):
+    """Quebra a consulta em termos alfanuméricos (acentos são tratados pelo FTS)"""
+    return re.findall(r'\w+', consulta or '')
+
+
+def _match_expr(termos):
+    # Termos combinados com AND; só o último é prefixo (o usuário ainda está
+    # digitando), o que mantém pequeno o conjunto a ranquear em catálogos grandes
+    completos = [f'"{termo}"' for termo in termos[:-1]]
+    return ' '.join(completos + [f'"{termos[-1]}"*'])
+
+
+def buscar_materiais(consulta, usuario_id=None, limite=20):
+    """Retorna os ids dos materiais ativos que casam com a consulta, do mais relevante ao menos"""
+    termos = tokenizar(consulta)
+    if not termos:
+        return []
+
+    if _fts_disponivel:
+        sql = f"""
+            SELECT material.id FROM material_fts
+            JOIN material ON material.id = material_fts.rowid
+            WHERE material_fts MATCH :match AND material.ativo = 1
+            {'AND material.usuario_id = :usuario_id' if usuario_id else ''}
+            ORDER BY bm25(material_fts, {FTS_WEIGHTS})
+            LIMIT :limite
+        """
+        params = {'match': _match_expr(termos), 'limite': limite}
+        if usuario_id:
+            params['usuario_id'] = usuario_id
+        return [row[0] for row in db.session.execute(text(sql), params)]
+
+    # Alternativa sem FTS5: cada termo precisa aparecer em alguma das colunas
+    colunas = [getattr(Material, c) for c in FTS_COLUMNS]
+    query = db.session.query(Material.id).filter(Material.ativo == True)
+    if usuario_id:
+        query = query.filter(Material.usuario_id == usuario_id)
+    query = query.filter(and_(*[
+        or_(*[coluna.ilike(f'%{termo}%') for coluna in colunas]) for termo in termos
+    ]))
+    return [row[0] for row in query.order_by(Material.nome).limit(limite)]
@@ -0,0 +1,93 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturoExpirado
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Mesmo padrão do Werkzeug 2.3; ex.: 'pbkdf2:sha256:260000' ou 'scrypt:16384:8:1'
+DEFAULT_PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+DEFAULT_PASSWORD_HASH_WORKERS = 2
+DEFAULT_PASSWORD_HASH_QUEUE = 8
+DEFAULT_PASSWORD_HASH_TIMEOUT = 10
+
+
+class HashOcupado(Exception):
+    """Fila de hashing cheia (ou hash além de PASSWORD_HASH_TIMEOUT): a requisição deve ser recusada"""
+
+
+_executor = None
+_vagas = None
+_lock = threading.Lock()
+# Método configurado -> prefixo que ele gera no hash ('pbkdf2:sha256' vira 'pbkdf2:sha256:600000')
+_prefixos = {}
+
+
+def init_senhas(app):
+    """Configura o método de hash e o pool de threads que calcula os hashes"""
+    app.config.setdefault('PASSWORD_HASH_METHOD', DEFAULT_PASSWORD_HASH_METHOD)
+    app.config.setdefault('PASSWORD_HASH_WORKERS', DEFAULT_PASSWORD_HASH_WORKERS)
+    app.config.setdefault('PASSWORD_HASH_QUEUE', DEFAULT_PASSWORD_HASH_QUEUE)
+    app.config.setdefault('PASSWORD_HASH_TIMEOUT', DEFAULT_PASSWORD_HASH_TIMEOUT)
+
+
+def _config(chave, padrao):
+    if has_app_context():
+        return current_app.config.get(chave, padrao)
+    return padrao
+
+
+def metodo_hash():
+    return _config('PASSWORD_HASH_METHOD', DEFAULT_PASSWORD_HASH_METHOD)
+
+
+def _pool():
+    global _executor, _vagas
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = _config('PASSWORD_HASH_WORKERS', DEFAULT_PASSWORD_HASH_WORKERS)
+                fila = _config('PASSWORD_HASH_QUEUE', DEFAULT_PASSWORD_HASH_QUEUE)
+                _vagas = threading.BoundedSemaphore(workers + fila)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fibreco-hash')
+    return _executor
+
+
+def _executar(funcao, *args):
+    """Roda ``funcao`` no pool; com todas as vagas ocupadas falha na hora (HashOcupado)"""
+    executor = _pool()
+    if not _vagas.acquire(blocking=False):
+        raise HashOcupado()
+    try:
+        futuro = executor.submit(funcao, *args)
+    except Exception:
+        _vagas.release()
+        raise
+    futuro.add_done_callback(lambda _: _vagas.release())
+    try:
+        return futuro.result(timeout=_config('PASSWORD_HASH_TIMEOUT', DEFAULT_PASSWORD_HASH_TIMEOUT))
+    except FuturoExpirado:
+        # O cálculo segue no pool (e ocupando a vaga) até terminar
+        raise HashOcupado() from None
+
+
+def gerar_hash(senha):
+    return _executar(generate_password_hash, senha, metodo_hash())
+
+
+def verificar_senha(senha_hash, senha):
+    return _executar(check_password_hash, senha_hash, senha)
+
+
+def _prefixo(metodo):
+    prefixo = _prefixos.get(metodo)
+    if prefixo is None:
+        # O Werkzeug completa os parâmetros omitidos; o jeito confiável de saber o
+        # prefixo final é gerar um hash (só uma vez por método)
+        prefixo = generate_password_hash('', metodo).split('$', 1)[0]
+        _prefixos[metodo] = prefixo
+    return prefixo
+
+
+def precisa_rehash(senha_hash):
+    """True se o hash foi gerado com um método/parâmetros diferentes dos configurados"""
+    return senha_hash.split('$', 1)[0] != _prefixo(metodo_hash())
@@ -0,0 +1,129 @@
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+
+from src.models.auth import db, Session
+from src.utils.change_log import expurgar_alteracoes
+from src.utils.metrics import registrar_limpeza_sessoes, registrar_sessoes_excedentes, registrar_sessoes_removidas
+from src.utils.tokens import modo_assinado
+
+DEFAULT_SESSION_CLEANUP_INTERVAL = 900
+DEFAULT_SESSION_CLEANUP_BATCH = 1000
+DEFAULT_SESSION_MAX_PER_USER = 10
+
+_thread = None
+_lock = threading.Lock()
+
+
+def valores_encerramento(agora=None):
+    """Colunas de uma sessão encerrada (logout, limite por usuário, troca de perfil)
+
+    No modo de sessão ``data_expiracao`` vai para agora e a próxima limpeza
+    remove a linha. No modo assinado o token continua válido até a própria
+    expiração, então a linha (que alimenta a lista de revogação) é mantida até lá.
+    """
+    if modo_assinado():
+        return {'ativo': False}
+    return {'ativo': False, 'data_expiracao': agora or datetime.utcnow()}
+
+
+def encerrar_sessoes_do_usuario(user_id):
+    """Encerra todas as sessões ativas do usuário (sem commit)"""
+    return db.session.execute(
+        update(Session).where(Session.user_id == user_id, Session.ativo == True).values(**valores_encerramento())
+    ).rowcount
+
+
+def limpar_sessoes(lote=None, agora=None):
+    """Apaga as sessões expiradas em lotes (um commit por lote); retorna o total removido
+
+    Só ``data_expiracao`` (indexada) é consultada; veja ``valores_encerramento``.
+    """
+    lote = lote or current_app.config.get('SESSION_CLEANUP_BATCH', DEFAULT_SESSION_CLEANUP_BATCH)
+    agora = agora or datetime.utcnow()
+    inicio = time.perf_counter()
+    total = 0
+    while True:
+        ids = select(Session.id).where(Session.data_expiracao < agora).limit(lote).scalar_subquery()
+        removidas = db.session.execute(delete(Session).where(Session.id.in_(ids))).rowcount
+        db.session.commit()
+        total += removidas
+        registrar_sessoes_removidas(removidas)
+        if removidas < lote:
+            break
+    registrar_limpeza_sessoes(time.perf_counter() - inicio)
+    return total
+
+
+def aplicar_limite_por_usuario(user_id):
+    """Encerra as sessões ativas mais antigas além de SESSION_MAX_PER_USER (sem commit)"""
+    maximo = current_app.config.get('SESSION_MAX_PER_USER', DEFAULT_SESSION_MAX_PER_USER)
+    if not maximo:
+        return 0
+    agora = datetime.utcnow()
+    excedentes = db.session.execute(
+        select(Session.id)
+        .where(Session.user_id == user_id, Session.ativo == True, Session.data_expiracao > agora)
+        .order_by(Session.data_criacao.desc(), Session.id.desc())
+        .offset(maximo)
+    ).scalars().all()
+    if excedentes:
+        db.session.execute(
+            update(Session).where(Session.id.in_(excedentes)).values(**valores_encerramento(agora))
+        )
+        registrar_sessoes_excedentes(len(excedentes))
+    return len(excedentes)
+
+
+def _executar_periodicamente(app, intervalo):
+    while True:
+        time.sleep(intervalo)
+        with app.app_context():
+            try:
+                removidas = limpar_sessoes()
+                if removidas:
+                    print(f"Limpeza de sessões: {removidas} removidas")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Erro na limpeza de sessões: {e}")
+            # Histórico da sincronização offline, na mesma cadência
+            try:
+                removidas = expurgar_alteracoes()
+                if removidas:
+                    print(f"Limpeza do histórico de sincronização: {removidas} removidas")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Erro na limpeza do histórico de sincronização: {e}")
+            finally:
+                db.session.remove()
+
+
+def init_sessoes(app):
+    """Agenda a limpeza periódica das sessões expiradas e do histórico de sincronização
+
+    A thread (daemon, uma por processo) só é iniciada na primeira requisição,
+    para que scripts que importam a aplicação não a disparem. Com
+    ``SESSION_CLEANUP_INTERVAL = 0`` a limpeza fica a cargo de
+    ``limpar_sessoes.py`` (ex.: cron), que também expurga o histórico.
+    """
+    app.config.setdefault('SESSION_CLEANUP_INTERVAL', DEFAULT_SESSION_CLEANUP_INTERVAL)
+    app.config.setdefault('SESSION_CLEANUP_BATCH', DEFAULT_SESSION_CLEANUP_BATCH)
+    app.config.setdefault('SESSION_MAX_PER_USER', DEFAULT_SESSION_MAX_PER_USER)
+
+    @app.before_request
+    def iniciar_limpeza_sessoes():
+        global _thread
+        if _thread is not None:
+            return
+        with _lock:
+            if _thread is not None:
+                return
+            intervalo = app.config['SESSION_CLEANUP_INTERVAL']
+            # Criada mesmo com o intervalo zerado, para não repetir a verificação
+            _thread = threading.Thread(target=_executar_periodicamente, args=(app, intervalo),
+                                       name='fibreco-limpeza-sessoes', daemon=True)
+            if intervalo:
+                _thread.start()
@@ -0,0 +1,157 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from flask import Response, request, send_file
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele servimos apenas gzip
+    brotli = None
+
+# Arquivos gerados pelo Vite ficam em assets/ com um hash de 8 caracteres no nome
+# (ex.: assets/index-DMMZWwYZ.js); o hash pode conter '-' e '_'. Os arquivos de public/
+# (apple-touch-icon.png, logo-horizontal.svg...) vão para a raiz e não são imutáveis.
+HASHED_ASSET_RE = re.compile(r'^assets/(?:.+/)?[^/]+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$')
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+MIN_COMPRESS_SIZE = 1024
+
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_DEFAULT = 'public, max-age=3600'
+
+
+def _is_compressible(mimetype):
+    return mimetype is not None and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=11)
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def precompress(root):
+    """Gera arquivos .gz/.br ao lado dos assets com hash (uso em build)"""
+    index = StaticAssets(root, precompress_in_memory=False)
+    gerados = []
+    for rel_path, entry in index.files.items():
+        if not entry['immutable'] or not _is_compressible(entry['mimetype']):
+            continue
+        with open(entry['path'], 'rb') as f:
+            content = f.read()
+        for encoding, ext in (('br', '.br'), ('gzip', '.gz')):
+            if encoding == 'br' and brotli is None:
+                continue
+            compressed = _compress(content, encoding)
+            if len(compressed) < len(content):
+                with open(entry['path'] + ext, 'wb') as f:
+                    f.write(compressed)
+                gerados.append(rel_path + ext)
+    return gerados
+
+
+class StaticAssets:
+    """Índice em memória dos arquivos do frontend com variantes comprimidas"""
+
+    def __init__(self, root, index_max_age=60, precompress_in_memory=True):
+        self.root = root
+        self.index_max_age = index_max_age
+        self.precompress_in_memory = precompress_in_memory
+        self.files = {}
+        if root and os.path.isdir(root):
+            self.build()
+
+    def build(self):
+        """Percorre a pasta estática uma única vez e monta o índice"""
+        files = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(path, self.root).replace(os.sep, '/')
+                files[rel_path] = self._build_entry(rel_path, path)
+        self.files = files
+
+    def _build_entry(self, rel_path, path):
+        stat = os.stat(path)
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        immutable = bool(HASHED_ASSET_RE.search(rel_path))
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        etag = hashlib.sha1(content).hexdigest()[:20]
+
+        variants = {}
+        if immutable and _is_compressible(mimetype) and stat.st_size >= MIN_COMPRESS_SIZE:
+            for encoding, ext in (('br', '.br'), ('gzip', '.gz')):
+                if os.path.exists(path + ext):
+                    with open(path + ext, 'rb') as f:
+                        variants[encoding] = f.read()
+                elif self.precompress_in_memory and (encoding != 'br' or brotli is not None):
+                    compressed = _compress(content, encoding)
+                    if len(compressed) < len(content):
+                        variants[encoding] = compressed
+
+        if rel_path == 'index.html':
+            cache_control = f'public, max-age={self.index_max_age}, must-revalidate'
+        elif immutable:
+            cache_control = CACHE_IMMUTABLE
+        else:
+            cache_control = CACHE_DEFAULT
+
+        return {
+            'path': path,
+            'mimetype': mimetype,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'etag': etag,
+            'immutable': immutable,
+            'cache_control': cache_control,
+            'variants': variants
+        }
+
+    def _choose_encoding(self, entry):
+        if not entry['variants']:
+            return None
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in entry['variants'] and accepted[encoding] > 0:
+                return encoding
+        return None
+
+    def serve(self, path):
+        """Serve um arquivo do índice ou o index.html da SPA"""
+        entry = self.files.get(path) if path else None
+        if entry is None:
+            entry = self.files.get('index.html')
+            if entry is None:
+                return "index.html not found", 404
+
+        encoding = self._choose_encoding(entry)
+        etag = f"{entry['etag']}-{encoding}" if encoding else entry['etag']
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        elif encoding:
+            response = Response(entry['variants'][encoding], mimetype=entry['mimetype'])
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = send_file(entry['path'], mimetype=entry['mimetype'], etag=False,
+                                 last_modified=entry['mtime'], conditional=True)
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = entry['cache_control']
+        if entry['variants']:
+            response.vary.add('Accept-Encoding')
+        return response
+
+
+if __name__ == '__main__':
+    import sys
+    static_root = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+    for generated in precompress(static_root):
+        print(f"Gerado: {generated}")
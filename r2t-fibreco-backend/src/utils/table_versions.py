@@ -0,0 +1,114 @@
+import functools
+import hashlib
+
+from flask import g, make_response, request
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session as OrmSession
+
+from src.models.auth import db
+from src.models.table_version import TableVersion
+
+# Tabelas cujas alterações não invalidam respostas em cache
+UNTRACKED_TABLES = {'table_versions', 'sessions'}
+# Colunas de controle que nenhuma resposta em cache exibe: o login grava
+# users.ultimo_login (e rehash da senha) e não deve invalidar todos os ETags
+UNTRACKED_COLUMNS = {'users': {'ultimo_login', 'password_hash'}}
+
+_listeners_registered = False
+
+
+def _bump(session, tables):
+    tables = set(tables) - UNTRACKED_TABLES
+    if not tables:
+        return
+    session.connection().execute(
+        update(TableVersion.__table__)
+        .where(TableVersion.__table__.c.table_name.in_(tables))
+        .values(version=TableVersion.__table__.c.version + 1)
+    )
+
+
+def _changed_tables(session):
+    tables = set()
+    for obj in session.new | session.deleted:
+        tables.add(obj.__table__.name)
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        table = obj.__table__.name
+        ignored = UNTRACKED_COLUMNS.get(table)
+        if ignored and _changed_columns(obj) <= ignored:
+            continue
+        tables.add(table)
+    return tables
+
+
+def _changed_columns(obj):
+    return {attr.key for attr in inspect(obj).attrs if attr.history.has_changes()}
+
+
+def _after_flush(session, flush_context):
+    _bump(session, _changed_tables(session))
+
+
+def _do_orm_execute(orm_execute_state):
+    # INSERT/UPDATE/DELETE em massa (ex.: Query.update) não passam pelo flush;
+    # o incremento vai na mesma transação, então pode ocorrer antes do comando
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _bump(orm_execute_state.session, [orm_execute_state.statement.table.name])
+    return None
+
+
+def init_table_versions(app):
+    """Registra os listeners e garante uma linha de versão por tabela"""
+    global _listeners_registered
+    if not _listeners_registered:
+        event.listen(OrmSession, 'after_flush', _after_flush)
+        event.listen(OrmSession, 'do_orm_execute', _do_orm_execute)
+        _listeners_registered = True
+
+    with app.app_context():
+        existentes = {row[0] for row in db.session.execute(select(TableVersion.table_name))}
+        for table_name in db.metadata.tables:
+            if table_name not in existentes and table_name not in UNTRACKED_TABLES:
+                db.session.add(TableVersion(table_name=table_name, version=0))
+        db.session.commit()
+
+
+def get_versions(tables):
+    """Retorna {tabela: versão} com uma única consulta pela chave primária"""
+    rows = db.session.execute(
+        select(TableVersion.table_name, TableVersion.version)
+        .where(TableVersion.table_name.in_(tables))
+    )
+    return dict(rows.all())
+
+
+def conditional_get(*tables):
+    """Decorator que emite ETags fracos e responde 304 antes de consultar as linhas
+
+    Deve ser aplicado depois de ``login_required``: a resposta depende do
+    usuário (escopo por papel), por isso ``users`` entra sempre na chave.
+    """
+    tracked = sorted(set(tables) | {'users'})
+
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated_function(*args, **kwargs):
+            versions = get_versions(tracked)
+            key = '|'.join([request.full_path, str(g.get('user_id'))] +
+                           [f'{t}:{versions.get(t, 0)}' for t in tracked])
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+                response.headers.setdefault('Cache-Control', 'private, no-cache')
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,130 @@
+import base64
+import calendar
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select
+
+from src.models.auth import db, Session, User
+
+# 'session': token opaco conferido na tabela sessions a cada requisição
+# 'signed': token assinado (HMAC-SHA256) conferido em memória
+DEFAULT_AUTH_TOKEN_MODE = 'session'
+DEFAULT_AUTH_REVOCATION_REFRESH = 30
+VERSAO = 'v1'
+INTERVALO_MINIMO = 1
+
+# Revogações carregadas da tabela sessions: jti das sessões encerradas que ainda
+# não expiraram e ids dos usuários ativos (usuário desativado ou excluído perde o acesso)
+_revogados = set()
+_usuarios_ativos = set()
+_ultima_atualizacao = float('-inf')
+_lock = threading.Lock()
+
+
+def init_tokens(app):
+    app.config.setdefault('AUTH_TOKEN_MODE', DEFAULT_AUTH_TOKEN_MODE)
+    app.config.setdefault('AUTH_TOKEN_SECRET', None)  # padrão: SECRET_KEY
+    app.config.setdefault('AUTH_REVOCATION_REFRESH', DEFAULT_AUTH_REVOCATION_REFRESH)
+    if app.config['AUTH_TOKEN_MODE'] not in ('session', 'signed'):
+        raise ValueError(f"AUTH_TOKEN_MODE inválido: {app.config['AUTH_TOKEN_MODE']}")
+
+
+def modo_assinado():
+    return current_app.config.get('AUTH_TOKEN_MODE', DEFAULT_AUTH_TOKEN_MODE) == 'signed'
+
+
+def _b64(dados):
+    return base64.urlsafe_b64encode(dados).rstrip(b'=').decode('ascii')
+
+
+def _b64_decode(texto):
+    return base64.urlsafe_b64decode(texto + '=' * (-len(texto) % 4))
+
+
+def _assinatura(corpo):
+    chave = current_app.config.get('AUTH_TOKEN_SECRET') or current_app.config['SECRET_KEY']
+    return _b64(hmac.new(chave.encode(), corpo.encode(), hashlib.sha256).digest())
+
+
+def assinar_token(jti, user_id, role, expiracao):
+    """Token ``v1.<payload>.<assinatura>``; expiracao é um datetime UTC (naive)"""
+    payload = json.dumps({
+        'jti': jti,
+        'uid': user_id,
+        'role': role.value,
+        'exp': calendar.timegm(expiracao.utctimetuple()),
+    }, separators=(',', ':'))
+    corpo = f'{VERSAO}.{_b64(payload.encode())}'
+    return f'{corpo}.{_assinatura(corpo)}'
+
+
+def verificar_token(token):
+    """Payload do token se a assinatura confere e ele não expirou; senão None
+
+    Não consulta revogações; veja ``revogado``.
+    """
+    partes = token.split('.')
+    if len(partes) != 3 or partes[0] != VERSAO:
+        return None
+    corpo = f'{partes[0]}.{partes[1]}'
+    if not hmac.compare_digest(_assinatura(corpo), partes[2]):
+        return None
+    try:
+        dados = json.loads(_b64_decode(partes[1]))
+    except ValueError:
+        return None
+    if not isinstance(dados, dict) or not {'jti', 'uid', 'role', 'exp'} <= dados.keys():
+        return None
+    if dados['exp'] <= time.time():
+        return None
+    return dados
+
+
+def atualizar_revogacoes():
+    """Recarrega as revogações da tabela sessions e os usuários ativos"""
+    global _revogados, _usuarios_ativos, _ultima_atualizacao
+    revogados = set(db.session.execute(
+        select(Session.token).where(Session.ativo == False, Session.data_expiracao > datetime.utcnow())
+    ).scalars())
+    usuarios_ativos = set(db.session.execute(select(User.id).where(User.ativo == True)).scalars())
+    with _lock:
+        _revogados, _usuarios_ativos = revogados, usuarios_ativos
+        _ultima_atualizacao = time.monotonic()
+
+
+def _atualizar(intervalo):
+    """Atualiza se a última carga tem mais de ``intervalo`` segundos (uma thread por vez)"""
+    global _ultima_atualizacao
+    with _lock:
+        if time.monotonic() - _ultima_atualizacao < intervalo:
+            return
+        # Marca antes de consultar: as outras threads seguem com os dados atuais
+        _ultima_atualizacao = time.monotonic()
+    try:
+        atualizar_revogacoes()
+    except Exception as e:
+        db.session.rollback()
+        with _lock:
+            _ultima_atualizacao = float('-inf')
+        print(f"Erro ao atualizar revogações de tokens: {e}")
+
+
+def revogado(dados):
+    """True se a sessão do token foi encerrada ou o usuário não está mais ativo"""
+    _atualizar(current_app.config.get('AUTH_REVOCATION_REFRESH', DEFAULT_AUTH_REVOCATION_REFRESH))
+    if dados['uid'] not in _usuarios_ativos:
+        # Usuário criado depois da última carga (ou excluído): confere de novo, no máximo 1x/s
+        _atualizar(INTERVALO_MINIMO)
+    return dados['jti'] in _revogados or dados['uid'] not in _usuarios_ativos
+
+
+def revogar(jti):
+    """Revoga no processo atual; os demais processos veem na próxima atualização"""
+    with _lock:
+        _revogados.add(jti)
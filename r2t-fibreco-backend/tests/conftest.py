@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+from collections import Counter
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Banco temporário: os testes nunca tocam o banco de desenvolvimento
+_tmpdir = tempfile.mkdtemp(prefix='fibreco-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmpdir, 'tests.db')}"
+
+from src.main import app as flask_app
+from src.models.auth import db
+from src.utils.gerador import SENHA_PADRAO, gerar_dados, limpar
+
+# Volumes das duas escalas: a grande tem ~10x mais linhas em todas as tabelas,
+# então uma consulta por linha (N+1) estoura o orçamento que vale para as duas
+ESCALAS = {
+    'pequena': {'materiais': 10, 'movimentacoes': 100, 'atividades': 20, 'meses': 1, 'tecnicos': 3},
+    'grande': {'materiais': 100, 'movimentacoes': 1000, 'atividades': 200, 'meses': 3, 'tecnicos': 3},
+}
+
+
+class ContadorConsultas:
+    """Conta os comandos SQL enviados ao banco dentro de um bloco ``with``"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.comandos = []
+
+    def _registrar(self, conn, cursor, statement, parameters, context, executemany):
+        self.comandos.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._registrar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._registrar)
+        return False
+
+    @property
+    def total(self):
+        return len(self.comandos)
+
+    def resumo(self):
+        """Comandos agrupados por texto, dos mais repetidos para os menos"""
+        linhas = [f'{vezes}x {" ".join(comando.split())[:200]}'
+                  for comando, vezes in Counter(self.comandos).most_common()]
+        return '\n'.join(linhas)
+
+
+@pytest.fixture(scope='session')
+def app():
+    # Sem limite de tentativas de login (as fixtures fazem vários logins do mesmo IP)
+    # e sem a thread de limpeza de sessões, que mexeria na contagem de consultas
+    flask_app.config.update(TESTING=True, SLOW_REQUEST_MS=float('inf'),
+                            LOGIN_RATE_USERNAME_BURST=0, LOGIN_RATE_IP_BURST=0,
+                            SESSION_CLEANUP_INTERVAL=0)
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def contar_consultas(app):
+    """Uso: ``with contar_consultas() as consultas: ...``; depois ``consultas.total``"""
+    with app.app_context():
+        engine = db.engine
+    return lambda: ContadorConsultas(engine)
+
+
+@pytest.fixture(scope='session', params=list(ESCALAS))
+def escala(request, app):
+    """Banco populado pelo gerador de dados em cada escala"""
+    with app.app_context():
+        limpar()
+        gerar_dados(**ESCALAS[request.param])
+        db.session.remove()
+    return request.param
+
+
+@pytest.fixture(scope='session')
+def tokens(app, escala):
+    """Headers de autenticação por perfil (recriados a cada escala)"""
+    client = app.test_client()
+    headers = {}
+    for perfil, username in (('admin', 'admin'), ('supervisor', 'supervisor1'), ('tecnico', 'tecnico1')):
+        response = client.post('/api/login', json={'username': username, 'password': SENHA_PADRAO})
+        headers[perfil] = {'Authorization': f"Bearer {response.get_json()['token']}"}
+    return headers
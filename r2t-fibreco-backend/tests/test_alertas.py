@@ -0,0 +1,30 @@
+from src.models.auth import db
+from src.models.material import Material
+from src.models.notification import Notification
+from src.utils.alertas import reconciliar
+
+
+def test_reconciliar_acerta_flags_nos_dois_sentidos(app, escala):
+    # Com histerese 0.1 e mínimo 10 o alerta só encerra a partir de 11
+    casos = {'ALR-SAIU': (11, True, False), 'ALR-FAIXA': (10, True, True), 'ALR-ENTROU': (5, False, True)}
+    with app.app_context():
+        materiais = {codigo: Material(nome=codigo, categoria='cabos', codigo_interno=codigo,
+                                      quantidade=quantidade, quantidade_minima=10, unidade='metro')
+                     for codigo, (quantidade, _, _) in casos.items()}
+        db.session.add_all(materiais.values())
+        db.session.commit()
+        try:
+            # Flags gravados sem passar pela detecção (ex.: carga direta no banco)
+            for codigo, (_, antes, _) in casos.items():
+                Material.query.filter_by(codigo_interno=codigo).update({'alerta_estoque': antes})
+            db.session.commit()
+
+            reconciliar()
+            for codigo, (_, _, depois) in casos.items():
+                assert db.session.get(Material, materiais[codigo].id).alerta_estoque is depois, codigo
+        finally:
+            ids = [material.id for material in materiais.values()]
+            Notification.query.filter(Notification.material_id.in_(ids)).delete(synchronize_session=False)
+            for material in materiais.values():
+                db.session.delete(material)
+            db.session.commit()
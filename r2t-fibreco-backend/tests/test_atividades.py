@@ -0,0 +1,109 @@
+import pytest
+
+from src.models.auth import db, User, UserRole
+from src.models.consumo import ConsumoDiario
+from src.models.material import Material, MovimentacaoEstoque, Atividade
+from src.utils import reservas
+
+
+@pytest.fixture
+def ids(app):
+    with app.app_context():
+        tecnico_id = db.session.execute(db.select(User.id).where(User.role == UserRole.USER)).scalars().first()
+        material_id = db.session.execute(
+            db.select(Material.id).where(Material.ativo == True, Material.quantidade > Material.quantidade_reservada)
+        ).scalars().first()
+    return tecnico_id, material_id
+
+
+@pytest.mark.parametrize('quantidade', ['abc', -3, 0, [1]])
+def test_bulk_rejeita_quantidade_invalida(client, tokens, ids, quantidade):
+    tecnico_id, material_id = ids
+    response = client.post('/api/atividades/bulk', headers=tokens['supervisor'], json={
+        'padrao': {'usuario_id': tecnico_id, 'material_id': material_id},
+        'atividades': [{'titulo': 'Válida', 'quantidade_necessaria': 1},
+                       {'titulo': 'Inválida', 'quantidade_necessaria': quantidade}],
+    })
+    assert response.status_code == 400
+    assert [erro['indice'] for erro in response.get_json()['erros']] == [1]
+
+
+def _reservado(app, material_id):
+    with app.app_context():
+        return db.session.get(Material, material_id).quantidade_reservada
+
+
+@pytest.mark.parametrize('quantidade', ['abc', -3])
+def test_create_e_update_rejeitam_quantidade_invalida(app, client, tokens, ids, quantidade):
+    tecnico_id, material_id = ids
+    dados = {'titulo': 'Reserva', 'usuario_id': tecnico_id, 'material_id': material_id}
+    response = client.post('/api/atividades', headers=tokens['supervisor'],
+                           json={**dados, 'quantidade_necessaria': quantidade})
+    assert response.status_code == 400
+
+    response = client.post('/api/atividades', headers=tokens['supervisor'], json={**dados, 'quantidade_necessaria': 1})
+    assert response.status_code == 201
+    atividade_id = response.get_json()['id']
+    reservado = _reservado(app, material_id)
+
+    response = client.put(f'/api/atividades/{atividade_id}', headers=tokens['supervisor'],
+                          json={'quantidade_necessaria': quantidade})
+    assert response.status_code == 400
+    assert _reservado(app, material_id) == reservado
+
+    assert client.delete(f'/api/atividades/{atividade_id}', headers=tokens['supervisor']).status_code == 200
+
+
+def test_reserva_concorrente_nao_perde_atualizacao(app, escala):
+    with app.app_context():
+        admin_id = db.session.execute(db.select(User.id).where(User.username == 'admin')).scalar_one()
+        material = Material(nome='Reserva concorrente', categoria='cabos', quantidade=5, quantidade_minima=0,
+                            unidade='metro', usuario_id=admin_id)
+        db.session.add(material)
+        db.session.commit()
+        material_id = material.id
+
+    try:
+        with app.app_context():
+            material = db.session.get(Material, material_id)
+            assert material.disponivel == 5
+            # Outra requisição reserva 4 depois que este objeto foi carregado
+            with db.engine.begin() as conexao:
+                conexao.execute(db.update(Material).where(Material.id == material_id).values(quantidade_reservada=4))
+
+            with pytest.raises(reservas.EstoqueInsuficiente):
+                reservas.reservar(Atividade(titulo='A'), material, 3)
+            reservas.reservar(Atividade(titulo='B'), material, 1)
+            assert material.quantidade_reservada == 5
+            assert not db.session.is_modified(material, include_collections=False)
+            db.session.rollback()
+    finally:
+        with app.app_context():
+            db.session.execute(db.delete(Material).where(Material.id == material_id))
+            db.session.commit()
+
+
+def test_saida_manual_nao_retira_o_reservado(app, client, tokens, escala):
+    with app.app_context():
+        admin_id = db.session.execute(db.select(User.id).where(User.username == 'admin')).scalar_one()
+        material = Material(nome='Saída reservada', categoria='cabos', quantidade=10, quantidade_reservada=6,
+                            quantidade_minima=0, unidade='metro', usuario_id=admin_id)
+        db.session.add(material)
+        db.session.commit()
+        material_id = material.id
+
+    try:
+        url = f'/api/materiais/{material_id}/movimentacao'
+        saida = {'tipo_movimentacao': 'saida', 'motivo': 'Teste reserva'}
+        assert client.post(url, headers=tokens['supervisor'], json={**saida, 'quantidade': 5}).status_code == 400
+        assert client.post(url, headers=tokens['supervisor'], json={**saida, 'quantidade': 4}).status_code == 201
+        response = client.put(f'/api/materiais/{material_id}', headers=tokens['admin'], json={'quantidade': 5})
+        assert response.status_code == 400
+        with app.app_context():
+            assert db.session.get(Material, material_id).quantidade == 6
+    finally:
+        with app.app_context():
+            db.session.execute(db.delete(ConsumoDiario).where(ConsumoDiario.material_id == material_id))
+            db.session.execute(db.delete(MovimentacaoEstoque).where(MovimentacaoEstoque.material_id == material_id))
+            db.session.execute(db.delete(Material).where(Material.id == material_id))
+            db.session.commit()
@@ -0,0 +1,25 @@
+import csv
+import io
+
+from src.models.auth import db, User
+from src.models.material import Atividade
+
+
+def _ids_exportados(client, headers):
+    response = client.get('/api/export/atividades.csv', headers=headers)
+    assert response.status_code == 200
+    linhas = csv.DictReader(io.StringIO(response.get_data(as_text=True).lstrip('﻿')))
+    return {int(linha['id']) for linha in linhas}
+
+
+def test_supervisor_exporta_apenas_as_proprias_atividades(app, client, tokens):
+    with app.app_context():
+        supervisor_id = db.session.execute(db.select(User.id).where(User.username == 'supervisor1')).scalar_one()
+        proprias = set(db.session.execute(
+            db.select(Atividade.id).where(Atividade.supervisor_id == supervisor_id)
+        ).scalars())
+        total = db.session.execute(db.select(db.func.count(Atividade.id))).scalar_one()
+
+    assert proprias and len(proprias) < total
+    assert _ids_exportados(client, tokens['supervisor']) == proprias
+    assert len(_ids_exportados(client, tokens['admin'])) == total
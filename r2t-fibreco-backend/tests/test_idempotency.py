@@ -0,0 +1,76 @@
+import uuid
+
+import pytest
+
+from src.models.auth import db
+from src.models.idempotency import IdempotencyKey
+from src.models.material import Material, MovimentacaoEstoque
+from src.routes import material as material_routes
+
+
+def _material_id(app):
+    with app.app_context():
+        return db.session.execute(db.select(Material.id).where(Material.ativo == True)).scalars().first()
+
+
+def _movimentacoes(app, material_id):
+    with app.app_context():
+        return MovimentacaoEstoque.query.filter_by(material_id=material_id).count()
+
+
+def _post(client, tokens, material_id, chave, quantidade=1):
+    return client.post(f'/api/materiais/{material_id}/movimentacao',
+                       headers={**tokens['supervisor'], 'Idempotency-Key': chave},
+                       json={'tipo_movimentacao': 'entrada', 'quantidade': quantidade, 'motivo': 'Teste idempotência'})
+
+
+def test_repeticao_devolve_a_resposta_guardada(app, client, tokens):
+    material_id = _material_id(app)
+    chave = str(uuid.uuid4())
+    antes = _movimentacoes(app, material_id)
+
+    primeira = _post(client, tokens, material_id, chave)
+    segunda = _post(client, tokens, material_id, chave)
+    assert primeira.status_code == segunda.status_code == 201
+    assert segunda.headers['Idempotent-Replayed'] == 'true'
+    assert segunda.get_json() == primeira.get_json()
+    assert _movimentacoes(app, material_id) == antes + 1
+
+
+def test_mesma_chave_com_outro_corpo_ou_rota(app, client, tokens):
+    material_id = _material_id(app)
+    chave = str(uuid.uuid4())
+    assert _post(client, tokens, material_id, chave).status_code == 201
+
+    assert _post(client, tokens, material_id, chave, quantidade=2).status_code == 422
+    response = client.post('/api/atividades/bulk', headers={**tokens['supervisor'], 'Idempotency-Key': chave},
+                           json={'atividades': []})
+    assert response.status_code == 422
+
+
+def test_erro_http_da_rota_fica_registrado(app, client, tokens):
+    chave = str(uuid.uuid4())
+    primeira = _post(client, tokens, 999999, chave)
+    segunda = _post(client, tokens, 999999, chave)
+    assert primeira.status_code == segunda.status_code == 404
+    assert segunda.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_excecao_da_rota_libera_a_chave(app, client, tokens, monkeypatch):
+    material_id = _material_id(app)
+    chave = str(uuid.uuid4())
+
+    class MaterialQuebrado:
+        class query:
+            @staticmethod
+            def get_or_404(_):
+                raise RuntimeError('falha simulada')
+
+    with monkeypatch.context() as m:
+        m.setattr(material_routes, 'Material', MaterialQuebrado)
+        with pytest.raises(RuntimeError):
+            _post(client, tokens, material_id, chave)
+
+    with app.app_context():
+        assert IdempotencyKey.query.filter_by(chave=chave).count() == 0
+    assert _post(client, tokens, material_id, chave).status_code == 201
@@ -0,0 +1,45 @@
+import pytest
+
+from src.models.auth import db
+from src.models.material import Material
+from src.utils.importacao import aplicar_lote, validar_linha
+
+
+@pytest.mark.parametrize('campo, valor', [
+    ('quantidade', 'inf'),
+    ('quantidade', 'nan'),
+    ('quantidade', '1e30'),
+    ('quantidade', '-1'),
+    ('quantidade_minima', 'abc'),
+    ('preco_unitario', 'nan'),
+    ('preco_unitario', 'inf'),
+    ('preco_unitario', '-2,50'),
+])
+def test_validar_linha_rejeita_valores_fora_do_intervalo(campo, valor):
+    dados, erros = validar_linha({'codigo_interno': 'X-1', campo: valor})
+    assert campo not in dados
+    assert len(erros) == 1 and erros[0].startswith(campo)
+
+
+def test_validar_linha_converte_numeros():
+    dados, erros = validar_linha({'codigo_interno': 'X-1', 'quantidade': '12,0', 'preco_unitario': '1.234,56'})
+    assert erros == []
+    assert dados['quantidade'] == 12 and dados['preco_unitario'] == 1234.56
+
+
+def test_atualizacao_nao_deixa_quantidade_abaixo_do_reservado(app, escala):
+    with app.app_context():
+        material = Material(nome='Importação reservada', categoria='cabos', codigo_interno='IMP-RESERVA',
+                            quantidade=10, quantidade_reservada=6, quantidade_minima=0, unidade='metro')
+        db.session.add(material)
+        db.session.flush()
+        try:
+            _, atualizados, erros = aplicar_lote([(2, {'codigo_interno': 'IMP-RESERVA', 'quantidade': 5})])
+            assert atualizados == 0
+            assert erros[0]['linha'] == 2 and 'reservado' in erros[0]['erros'][0]
+            assert material.quantidade == 10
+
+            _, atualizados, erros = aplicar_lote([(3, {'codigo_interno': 'IMP-RESERVA', 'quantidade': 6})], dry_run=True)
+            assert (atualizados, erros) == (1, [])
+        finally:
+            db.session.rollback()
@@ -0,0 +1,72 @@
+import time
+
+from src.models.auth import db, User
+from src.utils import limite_login, senhas
+from src.utils.gerador import SENHA_PADRAO
+
+
+def _login(client, username, senha=SENHA_PADRAO, ip='10.0.0.1'):
+    return client.post('/api/login', json={'username': username, 'password': senha},
+                       environ_base={'REMOTE_ADDR': ip})
+
+
+def test_limite_por_username_recusa_antes_do_hash(app, client, escala, contar_consultas, monkeypatch):
+    monkeypatch.setitem(app.config, 'LOGIN_RATE_USERNAME_BURST', 3)
+    limite_login.por_usuario.limpar()
+    for _ in range(3):
+        assert _login(client, 'tecnico3', 'errada').status_code == 401
+
+    with contar_consultas() as consultas:
+        response = _login(client, 'TECNICO3', 'errada', ip='10.0.0.2')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert consultas.total == 0
+    limite_login.por_usuario.limpar()
+
+
+def test_limite_por_ip(app, client, escala, monkeypatch):
+    monkeypatch.setitem(app.config, 'LOGIN_RATE_IP_BURST', 2)
+    limite_login.por_ip.limpar()
+    assert _login(client, 'ninguem1', 'x', ip='10.0.0.3').status_code == 401
+    assert _login(client, 'ninguem2', 'x', ip='10.0.0.3').status_code == 401
+    assert _login(client, 'ninguem3', 'x', ip='10.0.0.3').status_code == 429
+    assert _login(client, 'ninguem3', 'x', ip='10.0.0.4').status_code == 401
+    limite_login.por_ip.limpar()
+
+
+def test_rehash_no_login(app, client, escala, monkeypatch):
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    assert _login(client, 'tecnico3').status_code == 200
+    with app.app_context():
+        senha_hash = db.session.execute(db.select(User.password_hash).filter_by(username='tecnico3')).scalar()
+    assert senha_hash.startswith('pbkdf2:sha256:1000$')
+
+    # O hash novo continua válido e não é regravado de novo
+    assert _login(client, 'tecnico3').status_code == 200
+    with app.app_context():
+        assert db.session.execute(db.select(User.password_hash).filter_by(username='tecnico3')).scalar() == senha_hash
+
+
+def test_hash_alem_do_timeout_responde_503(app, client, escala, monkeypatch):
+    def hash_lento(*args):
+        time.sleep(0.2)
+        return False
+
+    monkeypatch.setattr(senhas, 'check_password_hash', hash_lento)
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_TIMEOUT', 0.01)
+    response = _login(client, 'tecnico3')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_ip_real_atras_de_proxy_confiavel():
+    from flask import Flask, request
+
+    proxy = Flask(__name__)
+    proxy.config['TRUSTED_PROXIES'] = 1
+    limite_login.init_limite_login(proxy)
+    proxy.add_url_rule('/ip', 'ip', lambda: request.remote_addr)
+
+    response = proxy.test_client().get('/ip', headers={'X-Forwarded-For': '1.1.1.1, 203.0.113.7'},
+                                       environ_base={'REMOTE_ADDR': '127.0.0.1'})
+    assert response.get_data(as_text=True) == '203.0.113.7'
@@ -0,0 +1,26 @@
+from datetime import date
+
+import pytest
+
+from src.models.auth import db
+from src.models.consumo import ConsumoDiario
+from src.models.material import Material
+from src.utils import previsao
+
+
+@pytest.mark.parametrize('nativo', [True, False], ids=['upsert', 'update-insert'])
+def test_somar_consumo_acumula_por_material_e_dia(app, escala, monkeypatch, nativo):
+    if not nativo:
+        monkeypatch.setattr(previsao, 'UPSERTS', {})
+    dia = date(2000, 1, 1)  # fora da janela da previsão
+    with app.app_context():
+        material_id = db.session.execute(db.select(Material.id)).scalars().first()
+        try:
+            for quantidade in (3, 4):
+                previsao.somar_consumo(db.session.connection(), [
+                    {'material_id': material_id, 'dia': dia, 'quantidade': quantidade, 'movimentos': 1}
+                ])
+            linha = db.session.get(ConsumoDiario, (material_id, dia))
+            assert (linha.quantidade, linha.movimentos) == (7, 2)
+        finally:
+            db.session.rollback()
@@ -0,0 +1,44 @@
+import pytest
+
+from src.models.auth import db, User, UserRole
+from src.models.material import Material, MovimentacaoEstoque
+from src.utils.principal import Principal, escopo_materiais, escopo_movimentacoes
+
+
+def _id(app, username):
+    with app.app_context():
+        return db.session.execute(db.select(User.id).filter_by(username=username)).scalar()
+
+
+@pytest.mark.parametrize('perfil,username', [('tecnico', 'tecnico1'), ('supervisor', 'supervisor1'), ('admin', 'admin')])
+def test_escopo_de_atividades(app, client, tokens, perfil, username):
+    user_id = _id(app, username)
+    atividades = client.get('/api/atividades', headers=tokens[perfil]).get_json()
+    assert atividades
+    for atividade in atividades:
+        if perfil == 'tecnico':
+            assert atividade['usuario_id'] == user_id
+        elif perfil == 'supervisor':
+            assert atividade['supervisor_id'] == user_id
+
+
+def test_escopo_de_materiais_e_movimentacoes(app, escala):
+    # Os materiais gerados pertencem ao admin; um principal com role de usuário
+    # comum e o mesmo id enxerga exatamente esses
+    admin_id = _id(app, 'admin')
+    with app.app_context():
+        principal = Principal(admin_id, UserRole.USER)
+        materiais = escopo_materiais(Material.query, principal).all()
+        assert materiais and all(m.usuario_id == admin_id for m in materiais)
+
+        movimentacoes = escopo_movimentacoes(MovimentacaoEstoque.query, principal).count()
+        esperado = MovimentacaoEstoque.query.join(Material).filter(Material.usuario_id == admin_id).count()
+        assert movimentacoes == esperado > 0
+
+        # Consulta que já faz join com Material continua válida
+        com_join = escopo_movimentacoes(MovimentacaoEstoque.query.join(Material), principal).count()
+        assert com_join == esperado
+
+        outro = Principal(admin_id + 10000, UserRole.USER)
+        assert escopo_movimentacoes(MovimentacaoEstoque.query, outro).count() == 0
+        assert escopo_materiais(Material.query, Principal(admin_id, UserRole.SUPERVISOR)).count() == Material.query.count()
@@ -0,0 +1,256 @@
+"""Orçamento de consultas SQL por rota
+
+Cada rota de ``material_bp``, ``auth_bp`` e ``notifications_bp`` tem um número
+máximo de comandos SQL por requisição, verificado nas duas escalas de dados do
+conftest. O orçamento é o mesmo nas duas: se a contagem cresce com o número de
+linhas (N+1), o teste falha e mostra os comandos repetidos.
+"""
+import io
+import json
+import os
+from collections import namedtuple
+
+import pytest
+
+from src.models.auth import db, User, UserRole
+from src.models.material import Material, MovimentacaoEstoque, Atividade
+from src.models.notification import Notification
+from src.utils.gerador import SENHA_PADRAO
+
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads')
+
+# Rotas sem orçamento, com o motivo
+SEM_ORCAMENTO = {
+    'material.serve_uploaded_file': 'mesma URL de material.uploaded_file, que é registrada antes e atende a rota',
+}
+
+
+# ``preparar`` cria o que a rota altera ou remove e devolve os valores usados
+# na URL (e, opcionalmente, ``json``, ``data``, ``content_type`` e ``headers``)
+Rota = namedtuple('Rota', 'endpoint metodo url perfil orcamento status preparar')
+
+
+def rota(endpoint, metodo, url, perfil, orcamento, status=200, preparar=None):
+    return Rota(endpoint, metodo, url, perfil, orcamento, status, preparar)
+
+
+def _usuario_id(username):
+    return User.query.filter_by(username=username).first().id
+
+
+def _material(contexto):
+    material = Material(nome='Cabo de Teste', categoria='cabos', quantidade=100, quantidade_minima=1,
+                        unidade='metro', usuario_id=_usuario_id('admin'))
+    db.session.add(material)
+    db.session.commit()
+    return {'material_id': material.id}
+
+
+def _material_existente(contexto):
+    return {'material_id': Material.query.order_by(Material.id).first().id}
+
+
+def _atividade(contexto, **valores):
+    atividade = Atividade(titulo='Atividade de teste', usuario_id=_usuario_id('tecnico1'),
+                          supervisor_id=_usuario_id('supervisor1'), **valores)
+    db.session.add(atividade)
+    db.session.commit()
+    return {'atividade_id': atividade.id}
+
+
+def _atividade_concluida(contexto):
+    atividade = Atividade.query.filter_by(status='concluida', usuario_id=_usuario_id('tecnico1')).first()
+    return {'atividade_id': atividade.id}
+
+
+def _atividade_com_imagens(contexto):
+    return _atividade(contexto, status='concluida', imagens_conclusao=json.dumps(['/api/uploads/inexistente.jpg']))
+
+
+def _movimentacao(contexto):
+    return {'movimentacao_id': MovimentacaoEstoque.query.order_by(MovimentacaoEstoque.id.desc()).first().id}
+
+
+def _conclusao(contexto):
+    dados = _atividade(contexto)
+    material_id = _material_existente(contexto)['material_id']
+    dados['json'] = {'descricao_servico': 'Teste', 'latitude': -8.05, 'longitude': -34.9,
+                     'materiais_usados': [{'material_id': material_id, 'quantidade_usada': 1}]}
+    return dados
+
+
+def _novo_usuario(contexto, username='usuario_teste'):
+    User.query.filter_by(username=username).delete()
+    usuario = User(username=username, email=f'{username}@teste.local', nome_completo='Usuário Teste',
+                   role=UserRole.USER)
+    usuario.set_password(SENHA_PADRAO)
+    db.session.add(usuario)
+    db.session.commit()
+    return {'user_id': usuario.id}
+
+
+def _dados_novo_usuario(contexto):
+    User.query.filter_by(username='criado_teste').delete()
+    db.session.commit()
+    return {'json': {'username': 'criado_teste', 'email': 'criado_teste@teste.local', 'password': SENHA_PADRAO,
+                     'nome_completo': 'Criado Teste', 'role': 'user'}}
+
+
+def _login_novo_usuario(contexto):
+    dados = _novo_usuario(contexto, 'usuario_sessao')
+    response = contexto['client'].post('/api/login', json={'username': 'usuario_sessao', 'password': SENHA_PADRAO})
+    dados['headers'] = {'Authorization': f"Bearer {response.get_json()['token']}"}
+    return dados
+
+
+def _notificacao(contexto, username='tecnico1'):
+    notificacao = Notification(user_id=_usuario_id(username), title='Teste', message='Teste', type='teste')
+    db.session.add(notificacao)
+    db.session.commit()
+    return {'notification_id': notificacao.id}
+
+
+def _usuario_com_notificacoes(contexto):
+    dados = _login_novo_usuario(contexto)
+    for _ in range(5):
+        _notificacao(contexto, 'usuario_sessao')
+    return dados
+
+
+def _arquivo_enviado(contexto):
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    with open(os.path.join(UPLOAD_DIR, 'teste_orcamento.txt'), 'w') as f:
+        f.write('teste')
+    return {'filename': 'teste_orcamento.txt'}
+
+
+ROTAS = [
+    # material_bp
+    rota('material.get_materiais', 'GET', '/api/materiais', 'admin', 5),
+    rota('material.get_alertas', 'GET', '/api/alertas', 'supervisor', 5),
+    rota('material.search_materiais', 'GET', '/api/materiais/search?q=cabo', 'admin', 6),
+    # Sessão e usuário; com o índice desatualizado, mais o cursor de alterações e a recarga do índice
+    rota('material.autocomplete_materiais', 'GET', '/api/materiais/autocomplete?prefix=ca', 'admin', 4),
+    rota('material.create_material', 'POST', '/api/materiais', 'admin', 10, 201, lambda c: {'json': {
+        'nome': 'Conector Novo', 'categoria': 'conectores', 'quantidade': 10, 'quantidade_minima': 2, 'unidade': 'unidade'
+    }}),
+    rota('material.importar_materiais_csv', 'POST', '/api/materiais/import', 'admin', 19, preparar=lambda c: {
+        'data': 'codigo_interno,nome,categoria,quantidade\nIMP-1,Tubete Importado,tubetes,10\nIMP-2,Tubete Importado 2,tubetes,5\n',
+        'content_type': 'text/csv'
+    }),
+    rota('material.get_material', 'GET', '/api/materiais/{material_id}', 'admin', 4, preparar=_material_existente),
+    rota('material.update_material', 'PUT', '/api/materiais/{material_id}', 'admin', 8,
+         preparar=lambda c: dict(_material(c), json={'quantidade_minima': 5, 'localizacao': 'Prateleira 1'})),
+    rota('material.delete_material', 'DELETE', '/api/materiais/{material_id}', 'admin', 6, 204, _material),
+    rota('material.get_movimentacoes_material', 'GET', '/api/materiais/{material_id}/movimentacoes', 'admin', 6,
+         preparar=_material_existente),
+    rota('material.get_previsao_material', 'GET', '/api/materiais/{material_id}/previsao', 'admin', 4,
+         preparar=_material_existente),
+    rota('material.get_reposicao', 'GET', '/api/reposicao', 'supervisor', 4),
+    rota('material.criar_movimentacao', 'POST', '/api/materiais/{material_id}/movimentacao', 'supervisor', 7, 201,
+         preparar=lambda c: dict(_material_existente(c), json={
+             'tipo_movimentacao': 'entrada', 'quantidade': 1, 'motivo': 'Teste'})),
+    rota('material.get_categorias', 'GET', '/api/categorias', 'admin', 4),
+    rota('material.get_subcategorias', 'GET', '/api/subcategorias?categoria=cabos', 'admin', 4),
+    rota('material.get_usuarios', 'GET', '/api/usuarios', 'supervisor', 4),
+    rota('material.upload_image', 'POST', '/api/upload', 'admin', 2, preparar=lambda c: {
+        'data': {'file': (io.BytesIO(b'\x89PNG\r\n\x1a\n'), 'teste_orcamento.png')},
+        'content_type': 'multipart/form-data'
+    }),
+    rota('material.uploaded_file', 'GET', '/api/uploads/{filename}', 'admin', 0, preparar=_arquivo_enviado),
+    rota('material.gerar_pdf_movimentacao', 'GET', '/api/movimentacoes/{movimentacao_id}/pdf', 'admin', 4,
+         preparar=_movimentacao),
+    rota('material.get_atividades', 'GET', '/api/atividades', 'admin', 4),
+    rota('material.get_atividades', 'GET', '/api/atividades?page=1&per_page=20&fields=summary', 'supervisor', 5),
+    rota('material.get_atividade', 'GET', '/api/atividades/{atividade_id}', 'tecnico', 6,
+         preparar=_atividade_concluida),
+    rota('material.create_atividade', 'POST', '/api/atividades', 'supervisor', 21, 201, lambda c: {'json': {
+        'titulo': 'Nova atividade', 'usuario_id': _usuario_id('tecnico1'),
+        'material_id': _material_existente(c)['material_id'], 'quantidade_necessaria': 1
+    }}),
+    rota('material.create_atividades_bulk', 'POST', '/api/atividades/bulk', 'supervisor', 17, 201, lambda c: {'json': {
+        'padrao': {'usuario_id': _usuario_id('tecnico1')},
+        'atividades': [{'titulo': f'Atividade em lote {i}'} for i in range(5)]
+    }}),
+    rota('material.concluir_atividade', 'POST', '/api/atividades/{atividade_id}/concluir', 'tecnico', 14,
+         preparar=_conclusao),
+    rota('material.update_atividade', 'PUT', '/api/atividades/{atividade_id}', 'supervisor', 10,
+         preparar=lambda c: dict(_atividade(c), json={'titulo': 'Atividade alterada', 'observacoes': 'Teste'})),
+    rota('material.delete_atividade', 'DELETE', '/api/atividades/{atividade_id}', 'supervisor', 9, preparar=_atividade),
+    rota('material.cancelar_atividade', 'POST', '/api/atividades/{atividade_id}/cancelar', 'admin', 10,
+         preparar=lambda c: dict(_atividade(c), json={'motivo': 'Teste'})),
+    rota('material.relatorio_mensal', 'GET', '/api/relatorios/mensal', 'admin', 5),
+    rota('material.gerar_pdf_atividade', 'GET', '/api/atividades/{atividade_id}/pdf', 'admin', 8,
+         preparar=_atividade_concluida),
+    rota('material.visualizar_imagens_atividade', 'GET', '/api/atividades/{atividade_id}/imagens', 'admin', 3,
+         preparar=_atividade_com_imagens),
+    rota('material.get_dashboard', 'GET', '/api/dashboard', 'admin', 10),
+    rota('material.get_dashboard', 'GET', '/api/dashboard', 'tecnico', 9),
+    rota('material.get_dashboard_graficos', 'GET', '/api/dashboard/graficos', 'admin', 9),
+    rota('material.get_dashboard_graficos', 'GET', '/api/dashboard/graficos', 'tecnico', 9),
+
+    # auth_bp
+    rota('auth.login', 'POST', '/api/login', None, 6, preparar=lambda c: {'json': {
+        'username': 'tecnico2', 'password': SENHA_PADRAO}}),
+    rota('auth.logout', 'POST', '/api/logout', None, 4, preparar=_login_novo_usuario),
+    rota('auth.get_current_user', 'GET', '/api/me', 'tecnico', 2),
+    rota('auth.list_users', 'GET', '/api/users', 'admin', 3),
+    rota('auth.create_user', 'POST', '/api/users', 'admin', 7, 201, preparar=_dados_novo_usuario),
+    rota('auth.update_user', 'PUT', '/api/users/{user_id}', 'admin', 6,
+         preparar=lambda c: dict(_novo_usuario(c), json={'nome_completo': 'Nome Alterado'})),
+    rota('auth.delete_user', 'DELETE', '/api/users/{user_id}', 'admin', 10, preparar=_novo_usuario),
+    rota('auth.get_user', 'GET', '/api/users/{user_id}', 'admin', 3, preparar=lambda c: {
+        'user_id': _usuario_id('tecnico1')}),
+    rota('auth.change_password', 'POST', '/api/change-password', None, 4, preparar=lambda c: dict(
+        _login_novo_usuario(c), json={'current_password': SENHA_PADRAO, 'new_password': 'nova-senha-123'})),
+
+    # notifications_bp
+    rota('notifications.get_notifications', 'GET', '/api/notifications', 'tecnico', 4),
+    rota('notifications.mark_notification_read', 'PUT', '/api/notifications/{notification_id}/read', 'tecnico', 6,
+         preparar=_notificacao),
+    rota('notifications.mark_all_notifications_read', 'PUT', '/api/notifications/read-all', None, 6,
+         preparar=_usuario_com_notificacoes),
+    rota('notifications.delete_notification', 'DELETE', '/api/notifications/{notification_id}', 'tecnico', 6,
+         preparar=_notificacao),
+    rota('notifications.delete_all_notifications', 'DELETE', '/api/notifications/delete-all', None, 6,
+         preparar=_usuario_com_notificacoes),
+]
+
+
+def _id_rota(rota):
+    return f"{rota.endpoint}[{rota.perfil or 'sessao'}]{'?' + rota.url.split('?')[1] if '?' in rota.url else ''}"
+
+
+@pytest.mark.parametrize('rota', ROTAS, ids=_id_rota)
+def test_orcamento_de_consultas(app, client, tokens, escala, contar_consultas, rota):
+    with app.app_context():
+        dados = rota.preparar({'client': client}) if rota.preparar else {}
+        db.session.remove()
+
+    kwargs = {}
+    for chave in ('json', 'data', 'content_type'):
+        if chave in dados:
+            kwargs[chave] = dados.pop(chave)
+    headers = dados.pop('headers', None) or (tokens[rota.perfil] if rota.perfil else None)
+    url = rota.url.format(**dados)
+
+    with contar_consultas() as consultas:
+        response = client.open(url, method=rota.metodo, headers=headers, **kwargs)
+
+    if rota.endpoint == 'material.upload_image' and response.status_code == 200:
+        os.remove(os.path.join(UPLOAD_DIR, response.get_json()['filename']))
+    if rota.endpoint == 'material.uploaded_file':
+        os.remove(os.path.join(UPLOAD_DIR, dados['filename']))
+
+    assert response.status_code == rota.status, response.get_data(as_text=True)[:500]
+    assert consultas.total <= rota.orcamento, (
+        f'{rota.metodo} {url} fez {consultas.total} consultas na escala {escala} '
+        f'(orçamento: {rota.orcamento}):\n{consultas.resumo()}'
+    )
+
+
+def test_todas_as_rotas_tem_orcamento(app):
+    blueprints = ('material', 'auth', 'notifications')
+    endpoints = {regra.endpoint for regra in app.url_map.iter_rules() if regra.endpoint.split('.')[0] in blueprints}
+    cobertos = {rota.endpoint for rota in ROTAS} | set(SEM_ORCAMENTO)
+    assert not endpoints - cobertos, f'Rotas sem orçamento de consultas: {sorted(endpoints - cobertos)}'
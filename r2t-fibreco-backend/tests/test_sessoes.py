@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+from src.models.auth import db, Session, User
+from src.utils.gerador import SENHA_PADRAO
+from src.utils.sessoes import limpar_sessoes
+
+
+def _sessoes(app, username):
+    with app.app_context():
+        return db.session.execute(
+            db.select(Session.ativo).join(User).where(User.username == username).order_by(Session.id)
+        ).scalars().all()
+
+
+def test_limite_de_sessoes_por_usuario(app, client, escala, monkeypatch):
+    monkeypatch.setitem(app.config, 'SESSION_MAX_PER_USER', 2)
+    for _ in range(4):
+        assert client.post('/api/login', json={'username': 'tecnico3', 'password': SENHA_PADRAO}).status_code == 200
+
+    ativas = _sessoes(app, 'tecnico3')
+    assert ativas[-2:] == [True, True]
+    assert not any(ativas[:-2])
+
+
+def test_limpeza_remove_expiradas_e_encerradas_em_lotes(app, client, escala):
+    response = client.post('/api/login', json={'username': 'tecnico3', 'password': SENHA_PADRAO})
+    token = response.get_json()['token']
+    client.post('/api/logout', headers={'Authorization': f'Bearer {token}'})
+    valida = client.post('/api/login', json={'username': 'tecnico3', 'password': SENHA_PADRAO}).get_json()['token']
+
+    with app.app_context():
+        usuario = User.query.filter_by(username='tecnico3').first()
+        db.session.add_all([Session(user_id=usuario.id, token=f'expirada-{escala}-{i}',
+                                    data_expiracao=datetime.utcnow() - timedelta(hours=1)) for i in range(5)])
+        db.session.commit()
+
+        assert limpar_sessoes(lote=2) >= 6
+        restantes = db.session.execute(db.select(Session.token).where(Session.user_id == usuario.id)).scalars().all()
+    assert valida in restantes
+    assert token not in restantes
+    assert client.get('/api/me', headers={'Authorization': f'Bearer {valida}'}).status_code == 200
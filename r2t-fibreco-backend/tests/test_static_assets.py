@@ -0,0 +1,15 @@
+import pytest
+
+from src.utils.static_assets import HASHED_ASSET_RE
+
+
+@pytest.mark.parametrize('rel_path, imutavel', [
+    ('assets/index-DMMZWwYZ.js', True),
+    ('assets/vendor-B-x_aZ3q.css', True),
+    ('apple-touch-icon.png', False),
+    ('logo-horizontal.svg', False),
+    ('assets/logo-horizontal.svg', False),
+    ('index.html', False),
+])
+def test_so_assets_com_hash_sao_imutaveis(rel_path, imutavel):
+    assert bool(HASHED_ASSET_RE.search(rel_path)) is imutavel
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from src.models.auth import db, User
+from src.models.material import Material
+from src.models.sync import ChangeLog
+from src.utils.change_log import cursor_atual, expurgar_alteracoes
+from src.utils.gerador import SENHA_PADRAO
+
+
+def _sync(client, headers, since):
+    response = client.get(f'/api/sync?since={since}', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def _material_id(app, *filtros):
+    with app.app_context():
+        return db.session.execute(
+            db.select(Material.id).where(Material.ativo == True, *filtros)
+        ).scalars().first()
+
+
+def _movimentar(client, tokens, material_id):
+    response = client.post(f'/api/materiais/{material_id}/movimentacao', headers=tokens['supervisor'],
+                           json={'tipo_movimentacao': 'entrada', 'quantidade': 1, 'motivo': 'Teste sync'})
+    assert response.status_code == 201
+
+
+def _cursor(app, client, tokens, material_id):
+    """Cursor depois de uma alteração (since=0 pediria a carga completa)"""
+    _movimentar(client, tokens, material_id)
+    with app.app_context():
+        return cursor_atual()
+
+
+def test_cursor_anterior_ao_historico_retido_recebe_carga_completa(app, client, tokens):
+    material_id = _material_id(app)
+    inicio = _cursor(app, client, tokens, material_id)
+    for _ in range(2):
+        _movimentar(client, tokens, material_id)
+    assert _sync(client, tokens['supervisor'], inicio)['reset'] is False
+
+    with app.app_context():
+        dias = app.config['SYNC_CHANGES_RETENTION_DAYS']
+        expurgar_alteracoes(agora=datetime.utcnow() + timedelta(days=dias + 1))
+        ultimo = cursor_atual()
+        assert ChangeLog.query.count() == 1
+
+    resposta = _sync(client, tokens['supervisor'], inicio)
+    assert resposta['reset'] is True
+    assert resposta['cursor'] == ultimo
+    assert _sync(client, tokens['supervisor'], ultimo)['reset'] is False
+
+
+def test_tombstones_so_para_linhas_que_o_usuario_via(app, client, tokens):
+    with app.app_context():
+        tecnico_id = db.session.execute(db.select(User.id).where(User.username == 'tecnico1')).scalar_one()
+    material_id = _material_id(app, Material.usuario_id != tecnico_id)
+    inicio = _cursor(app, client, tokens, material_id)
+    login = client.post('/api/login', json={'username': 'tecnico2', 'password': SENHA_PADRAO})
+    outro_tecnico = {'Authorization': f"Bearer {login.get_json()['token']}"}
+
+    response = client.post('/api/atividades', headers=tokens['supervisor'],
+                           json={'titulo': 'Tombstone', 'usuario_id': tecnico_id})
+    atividade_id = response.get_json()['id']
+    _movimentar(client, tokens, material_id)
+    assert client.delete(f'/api/atividades/{atividade_id}', headers=tokens['supervisor']).status_code == 200
+
+    for headers, esperado in ((tokens['tecnico'], [atividade_id]), (tokens['supervisor'], [atividade_id]),
+                              (outro_tecnico, [])):
+        resposta = _sync(client, headers, inicio)
+        assert resposta['reset'] is False
+        assert resposta['atividades']['tombstones'] == esperado
+    # O material alterado não pertence ao técnico: o id não é exposto
+    assert _sync(client, tokens['tecnico'], inicio)['materiais']['tombstones'] == []
@@ -0,0 +1,11 @@
+from src.utils.gerador import SENHA_PADRAO
+
+
+def test_login_nao_invalida_etags(client, tokens, escala):
+    primeira = client.get('/api/materiais', headers=tokens['supervisor'])
+    etag = primeira.headers['ETag']
+
+    assert client.post('/api/login', json={'username': 'tecnico2', 'password': SENHA_PADRAO}).status_code == 200
+
+    segunda = client.get('/api/materiais', headers={**tokens['supervisor'], 'If-None-Match': etag})
+    assert segunda.status_code == 304
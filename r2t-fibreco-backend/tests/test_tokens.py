@@ -0,0 +1,63 @@
+import pytest
+
+from src.models.auth import db, User
+from src.utils import tokens
+from src.utils.gerador import SENHA_PADRAO
+
+
+@pytest.fixture
+def assinado(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'AUTH_TOKEN_MODE', 'signed')
+    monkeypatch.setitem(app.config, 'AUTH_REVOCATION_REFRESH', 3600)
+    monkeypatch.setattr(tokens, '_ultima_atualizacao', float('-inf'))
+
+
+def _login(client, username):
+    response = client.post('/api/login', json={'username': username, 'password': SENHA_PADRAO})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+def test_token_assinado_sem_consulta_a_sessoes(client, escala, assinado, contar_consultas):
+    headers = _login(client, 'supervisor1')
+    assert headers['Authorization'].startswith('Bearer v1.')
+    client.get('/api/materiais', headers=headers)  # primeira carga das revogações
+
+    with contar_consultas() as consultas:
+        assert client.get('/api/materiais', headers=headers).status_code == 200
+    assert not [c for c in consultas.comandos if 'FROM sessions' in c]
+    # O escopo vem do principal: o usuário da requisição não é carregado
+    assert not [c for c in consultas.comandos if 'WHERE users.id = ?' in c]
+
+    # Role vem do token: a recusa não carrega o usuário
+    with contar_consultas() as consultas:
+        assert client.get('/api/users', headers=headers).status_code == 403
+    assert consultas.total == 0
+
+
+def test_token_adulterado_ou_revogado(client, escala, assinado):
+    headers = _login(client, 'tecnico3')
+    versao, payload, assinatura = headers['Authorization'][7:].split('.')
+    adulterado = {'Authorization': f'Bearer {versao}.{payload}.{assinatura[:-2]}AA'}
+    assert client.get('/api/me', headers=adulterado).status_code == 401
+
+    assert client.post('/api/logout', headers=headers).status_code == 200
+    assert client.get('/api/me', headers=headers).status_code == 401
+
+
+def test_revogacao_vem_da_tabela_sessions(app, client, escala, assinado):
+    headers = _login(client, 'tecnico2')
+    assert client.get('/api/me', headers=headers).status_code == 200
+
+    # Outro processo desativou o usuário: vale na próxima atualização
+    with app.app_context():
+        usuario = User.query.filter_by(username='tecnico2').first()
+        usuario.ativo = False
+        db.session.commit()
+        assert client.get('/api/me', headers=headers).status_code == 200
+        tokens.atualizar_revogacoes()
+    assert client.get('/api/me', headers=headers).status_code == 401
+
+    with app.app_context():
+        User.query.filter_by(username='tecnico2').first().ativo = True
+        db.session.commit()